@@ -111,11 +111,27 @@ ACCOUNTS_SESSION_REDIS_URL = "redis://localhost:6379/2"
 ACCESS_CACHE = "invenio_cache:current_cache"
 RT_USERS_CACHE_TIMEOUT = 86400
 RT_QUEUES_CACHE_TIMEOUT = 86400
+INSPIRE_REFERENCES_CACHE_TIMEOUT = 3600
+"""Seconds for which the rendered references datatable of a record version
+is cached."""
+REFEXTRACT_JOURNAL_KB_CACHE_TIMEOUT = 86400
+"""Seconds for which a version of the journal KB dictionary is cached."""
 
 # Files
 # =====
 BASE_FILES_LOCATION = os.path.join(sys.prefix, 'var/data')
 
+FEATURE_FLAG_ENABLE_DOCUMENT_CACHE = False
+"""Keep a local copy of the downloaded documents, shared between workflows
+and record updates, and store identical documents once in the files API."""
+
+DOCUMENT_CACHE_DIRECTORY = os.path.join(sys.prefix, 'var/cache/documents')
+"""Directory of the local copies of the downloaded documents."""
+
+DOCUMENT_CACHE_MAX_SIZE = 10 * 1024 * 1024 * 1024
+"""Size in bytes after which the least recently used documents are removed
+from the local cache."""
+
 # This is needed in order to be able to use EOS files locations
 MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100 MiB
 
@@ -1161,6 +1177,12 @@ Note:
   This variable takes precedence over ``RECORDS_SKIP_FILES``, but can be
   overriden by the tasks in the ``inspirehep.modules.migrator.tasks`` module.
 """
+RECORDS_DOWNLOAD_THREADS = 8
+"""Maximum number of documents and figures of a record downloaded at the
+same time."""
+RECORDS_DOWNLOAD_THREADS_PER_HOST = 4
+"""Maximum number of documents and figures of a record downloaded at the
+same time from the same host."""
 
 JSONSCHEMAS_HOST = "localhost:5000"
 JSONSCHEMAS_REPLACE_REFS = True
@@ -1232,6 +1254,29 @@ AUTHENTICATION_TOKEN = "CHANGE_ME"
 INSPIREHEP_URL = "http://web:8000"
 FEATURE_FLAG_ENABLE_REST_RECORD_MANAGEMENT = False
 
+HTTP_CLIENTS_DEFAULTS = {
+    'timeout': 60,
+    'pool_size': 10,
+    'max_tries': 5,
+}
+"""Default options of the pooled HTTP client of each external service.
+
+``timeout`` is in seconds, ``pool_size`` is the number of connections kept
+alive per host and ``max_tries`` the number of attempts of a request failing
+with a connection error. See :mod:`inspirehep.utils.http`.
+"""
+HTTP_CLIENTS = {
+    'arxiv': {'max_tries': 1},
+    'crossref': {'timeout': 30},
+    'documents': {'max_tries': 1},
+    'refextract': {'timeout': 300, 'max_tries': 1},
+}
+"""Per-service overrides of ``HTTP_CLIENTS_DEFAULTS``.
+
+Services whose callers already retry with a broader policy don't retry on
+their own, so that attempts don't multiply.
+"""
+
 # Harvesting and Workflows
 # ========================
 AFFILIATIONS_TO_HIDDEN_COLLECTIONS_MAPPING = {
@@ -1282,6 +1327,15 @@ WORKFLOWS_OBJECT_CLASS = "invenio_workflows_files.api.WorkflowObject"
 WORKFLOWS_RESTART_LIMIT = 3
 """Max number of times a workflow can be restarted."""
 
+FEATURE_FLAG_ENABLE_INSTITUTIONS_CACHE = False
+"""Share the institutions matched to affiliations between workflows."""
+
+WORKFLOWS_INSTITUTIONS_CACHE_TIMEOUT = 604800
+"""Seconds for which the institution with a given ICN is cached."""
+
+WORKFLOWS_INSTITUTIONS_NEGATIVE_CACHE_TIMEOUT = 86400
+"""Seconds for which the absence of an institution with a given ICN is cached."""
+
 WORKFLOWS_UI_BASE_TEMPLATE = BASE_TEMPLATE
 WORKFLOWS_UI_INDEX_TEMPLATE = "inspire_workflows/index.html"
 WORKFLOWS_UI_LIST_TEMPLATE = "inspire_workflows/list.html"
@@ -1711,3 +1765,10 @@ BATCHUPLOADER_WEB_ROBOT_TOKEN = 'change me'
 # ==========
 FEATURE_FLAG_ENABLE_REFEXTRACT_SERVICE = False
 REFEXTRACT_SERVICE_URL = 'http://example_refextract_url.cern.ch'
+FEATURE_FLAG_ENABLE_REFERENCE_MATCHER_CACHE = False
+"""Reuse the result of matching a reference with the same identifiers and
+publication info in other workflows, see :mod:`inspirehep.modules.refextract.matcher`."""
+REFERENCE_MATCHER_CACHE_TIMEOUT = 604800
+"""Seconds for which the record matched by a reference is cached."""
+REFERENCE_MATCHER_NEGATIVE_CACHE_TIMEOUT = 86400
+"""Seconds for which the absence of a match for a reference is cached."""
@@ -24,15 +24,16 @@
 
 from __future__ import absolute_import, division, print_function
 
-import requests
 from flask import current_app
 from lxml.etree import fromstring
 
+from inspirehep.utils.proxies import http_clients
+
 from .utils import etree_to_dict
 
 
 def get_response(arxiv_id):
-    response = requests.get(
+    response = http_clients.get('arxiv').get(
         current_app.config['ARXIV_API_URL'],
         params=dict(
             verb='GetRecord',
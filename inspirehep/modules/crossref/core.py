@@ -24,13 +24,14 @@
 
 from __future__ import absolute_import, division, print_function
 
-import requests
 from flask import current_app
 from six.moves.urllib.parse import urljoin
 
+from inspirehep.utils.proxies import http_clients
+
 
 def get_response(crossref_doi):
-    response = requests.get(
+    response = http_clients.get('crossref').get(
         urljoin(
             current_app.config['CROSSREF_API_URL'],
             '{term}'.format(term=crossref_doi),
@@ -24,11 +24,16 @@
 
 from __future__ import absolute_import, division, print_function
 
+import logging
+import os
+import threading
 from copy import deepcopy
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 from urllib import quote
 import uuid
 import arrow
+from backports.tempfile import TemporaryDirectory
 from elasticsearch.exceptions import NotFoundError
 from flask import current_app
 from fs.opener import fsopen
@@ -50,14 +55,99 @@ from sqlalchemy.sql.functions import GenericFunction
 from inspirehep.modules.pidstore.minters import inspire_recid_minter
 from inspirehep.modules.pidstore.utils import get_pid_type_from_schema, get_endpoint_from_pid_type
 from inspirehep.modules.records.utils import get_pid_from_record_uri, populate_earliest_date
+from inspirehep.utils.file_cache import (
+    CachedFile,
+    get_file_cache,
+    put_cached_file,
+)
+from inspirehep.utils.proxies import http_clients
+from inspirehep.utils.url import copy_file
 from inspirehep.utils.record_getter import (
     RecordGetterError,
     get_es_record_by_uuid
 )
 
+LOGGER = logging.getLogger(__name__)
+
 MAX_UNIQUE_KEY_COUNT = 50000
 
 
+def _download_file(url, path, file_cache, session, host_semaphore):
+    """Download a file of a record.
+
+    The HTTP(S) files go through the document cache, if it is enabled, with
+    the pooled ``session`` of the documents.
+
+    Returns:
+        Union[CachedFile, str, Exception]: the file in the document cache,
+        or ``path``, or the error which prevented the download.
+    """
+    scheme = urlparse(url).scheme
+    if scheme == 'file':
+        url = unquote(url)
+
+    try:
+        with host_semaphore:
+            if file_cache and scheme in ('http', 'https'):
+                cached_file = file_cache.fetch(url, session=session)
+                if cached_file:
+                    return cached_file
+
+            with fsopen(url, mode='rb') as remote_file, open(path, 'wb') as local_file:
+                copy_file(remote_file, local_file)
+    except Exception as exc:
+        LOGGER.warning('Error downloading %s.', url, exc_info=True)
+        return exc
+
+    return path
+
+
+def _download_files(urls, directory):
+    """Download the files of a record concurrently.
+
+    At most ``RECORDS_DOWNLOAD_THREADS`` files are downloaded at the same
+    time, and at most ``RECORDS_DOWNLOAD_THREADS_PER_HOST`` from the same
+    host.
+
+    Args:
+        urls(list(str)): the urls of the files.
+        directory(str): the directory where the files are downloaded.
+
+    Returns:
+        iterator: for each url, in order, what :func:`_download_file`
+        returned.
+    """
+    if not urls:
+        return iter([])
+
+    file_cache = get_file_cache()
+    session = http_clients.get('documents') if file_cache else None
+    threads_per_host = current_app.config['RECORDS_DOWNLOAD_THREADS_PER_HOST']
+    host_semaphores = {
+        urlparse(url).netloc: threading.BoundedSemaphore(threads_per_host)
+        for url in urls
+    }
+
+    def _download(index_and_url):
+        index, url = index_and_url
+        return _download_file(
+            url,
+            os.path.join(directory, str(index)),
+            file_cache,
+            session,
+            host_semaphores[urlparse(url).netloc],
+        )
+
+    pool = ThreadPool(min(len(urls), current_app.config['RECORDS_DOWNLOAD_THREADS']))
+    try:
+        downloads = pool.map(_download, enumerate(urls))
+    finally:
+        pool.close()
+        pool.join()
+
+    return iter(downloads)
+
+
 class referenced_records(GenericFunction):
     type = ARRAY(Text)
 
@@ -311,19 +401,22 @@ class InspireRecord(Record):
         if stream is not None:
             self.files[key] = stream
 
-        builder = LiteratureBuilder(record=self.to_dict())
         metadata['key'] = key
         metadata['url'] = '/api/files/{bucket}/{key}'.format(
             bucket=self.files[key].bucket_id,
             key=quote(key),
         )
+        self._add_document_or_figure_metadata(metadata, is_document)
+        return metadata
+
+    def _add_document_or_figure_metadata(self, metadata, is_document):
+        builder = LiteratureBuilder(record=self.to_dict())
         if is_document:
             builder.add_document(**metadata)
         else:
             builder.add_figure(**metadata)
 
         super(InspireRecord, self).update(builder.record)
-        return metadata
 
     def _resolve_doc_or_fig_url(
         self,
@@ -439,24 +532,7 @@ class InspireRecord(Record):
             doc_or_fig_obj,
         )
 
-    def _download_to_docs_or_figs(
-        self,
-        document=None,
-        figure=None,
-        src_records=(),
-        only_new=False,
-    ):
-        if not document and not figure:
-            raise TypeError(
-                'No document nor figure passed, at least one is needed.'
-            )
-
-        is_document = bool(document)
-        doc_or_fig_obj = self._resolve_doc_or_fig_url(
-            doc_or_fig_obj=document or figure,
-            src_records=src_records,
-            only_new=only_new,
-        )
+    def _store_doc_or_fig(self, doc_or_fig_obj, is_document, downloaded):
         if doc_or_fig_obj['url'].startswith('/api/files/'):
             return self.add_document_or_figure(
                 metadata=doc_or_fig_obj,
@@ -468,18 +544,21 @@ class InspireRecord(Record):
         if key not in self.files:
             key = self._get_unique_files_key(base_file_name=key)
 
-        url = doc_or_fig_obj['url']
-        scheme = urlparse(url).scheme
-        if scheme == 'file':
-            url = unquote(url)
-
-        stream = fsopen(url, mode='rb')
-        return self.add_document_or_figure(
-            metadata=doc_or_fig_obj,
-            key=key,
-            stream=stream,
-            is_document=is_document,
-        )
+        if isinstance(downloaded, CachedFile):
+            put_cached_file(self.files, key, downloaded)
+            return self.add_document_or_figure(
+                metadata=doc_or_fig_obj,
+                key=key,
+                is_document=is_document,
+            )
+
+        with open(downloaded, 'rb') as stream:
+            return self.add_document_or_figure(
+                metadata=doc_or_fig_obj,
+                key=key,
+                stream=stream,
+                is_document=is_document,
+            )
 
     def download_documents_and_figures(self, only_new=False, src_records=()):
         """Gets all the documents and figures of the record, and downloads them
@@ -531,6 +610,11 @@ class InspireRecord(Record):
         * if `url` field does not point to the files api: it will try to
           download the new file.
 
+        The files are downloaded concurrently, and then stored in the order
+        of the documents and figures. A document or figure whose file can't
+        be downloaded is kept with its original `url`, and doesn't prevent
+        the others from being stored.
+
         Args:
             only_new(bool): If True, will not re-download any files if the
                 document['key'] matches an existing downloaded file.
@@ -541,23 +625,56 @@ class InspireRecord(Record):
         if 'control_number' not in self:
             return
 
-        documents_to_download = self.pop('documents', [])
-        figures_to_download = self.pop('figures', [])
-
-        for document in documents_to_download:
-            self._download_to_docs_or_figs(
-                document=document,
+        docs_and_figs = [
+            (True, document) for document in self.pop('documents', [])
+        ] + [
+            (False, figure) for figure in self.pop('figures', [])
+        ]
+        resolved_docs_and_figs = [
+            self._resolve_doc_or_fig_url(
+                doc_or_fig_obj=doc_or_fig_obj,
                 src_records=src_records,
                 only_new=only_new,
             )
-
-        for figure in figures_to_download:
-            self._download_to_docs_or_figs(
-                figure=figure,
-                src_records=src_records,
-                only_new=only_new,
+            for _, doc_or_fig_obj in docs_and_figs
+        ]
+
+        with TemporaryDirectory(prefix='record_files') as scratch_space:
+            downloads = _download_files(
+                [
+                    doc_or_fig_obj['url']
+                    for doc_or_fig_obj in resolved_docs_and_figs
+                    if not doc_or_fig_obj['url'].startswith('/api/files/')
+                ],
+                scratch_space,
             )
 
+            for (is_document, doc_or_fig_obj), resolved_doc_or_fig_obj in zip(
+                docs_and_figs,
+                resolved_docs_and_figs,
+            ):
+                downloaded = None
+                if not resolved_doc_or_fig_obj['url'].startswith('/api/files/'):
+                    downloaded = next(downloads)
+
+                if isinstance(downloaded, Exception):
+                    LOGGER.error(
+                        'Cannot download %s for record %s.',
+                        doc_or_fig_obj['url'],
+                        self['control_number'],
+                    )
+                    self._add_document_or_figure_metadata(
+                        deepcopy(doc_or_fig_obj),
+                        is_document,
+                    )
+                    continue
+
+                self._store_doc_or_fig(
+                    resolved_doc_or_fig_obj,
+                    is_document,
+                    downloaded,
+                )
+
     def _get_unique_files_key(self, base_file_name):
         def _strip_old_control_number(base_name):
             base_name = base_name.split('_', 1)[-1]
@@ -26,12 +26,23 @@ from __future__ import absolute_import, division, print_function
 
 from collections import defaultdict
 
-from sqlalchemy import type_coerce
+from elasticsearch.helpers import scan
+from elasticsearch_dsl.query import Q
+from sqlalchemy import cast, distinct, func, not_, or_, type_coerce
 from sqlalchemy.dialects.postgresql import JSONB
 
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_records.models import RecordMetadata
+from invenio_search import current_search_client as es
 from inspire_utils.record import get_value
 
+from inspirehep.modules.records.api import referenced_records
+from inspirehep.modules.records.errors import IncompleteCitationCountsError
+from inspirehep.modules.search import LiteratureSearch
+
+CITATION_COUNTS_PARTITION_SIZE = 10000
+
 
 def increase_cited_count(result, identifier, core):
     """Increases the number of times a reference with the same identifier has appeared"""
@@ -122,3 +133,244 @@ def check_unlinked_references():
     result_arxiv = order_dictionary_into_list(result_arxiv)
 
     return result_doi, result_arxiv
+
+
+def _filter_deleted_records():
+    return or_(
+        not_(type_coerce(RecordMetadata.json, JSONB).has_key('deleted')),  # noqa: W601
+        not_(RecordMetadata.json['deleted'] == cast(True, JSONB)),
+    )
+
+
+def get_db_literature_uuids(from_pid_value=None, to_pid_value=None):
+    """Yield ``(uuid, pid_value)`` of all non deleted literature records.
+
+    Records are streamed from a server side cursor, ordered by uuid.
+
+    Args:
+        from_pid_value (str): if given, only the records whose PID value is
+            greater than or equal to it, as compared by the pidstore.
+        to_pid_value (str): if given, only the records whose PID value is
+            less than or equal to it.
+    """
+    query = (
+        db.session.query(RecordMetadata.id, PersistentIdentifier.pid_value)
+        .join(
+            PersistentIdentifier,
+            PersistentIdentifier.object_uuid == RecordMetadata.id,
+        )
+        .filter(
+            PersistentIdentifier.pid_type == 'lit',
+            PersistentIdentifier.object_type == 'rec',
+            PersistentIdentifier.status == PIDStatus.REGISTERED,
+            _filter_deleted_records(),
+        )
+    )
+    if from_pid_value is not None:
+        query = query.filter(PersistentIdentifier.pid_value >= from_pid_value)
+    if to_pid_value is not None:
+        query = query.filter(PersistentIdentifier.pid_value <= to_pid_value)
+    query = query.order_by(RecordMetadata.id).execution_options(stream_results=True)
+
+    for uuid, pid_value in query.yield_per(2000):
+        yield str(uuid), pid_value
+
+
+def get_es_literature_uuids():
+    """Yield the ids of all documents of the literature index, ordered.
+
+    The ids are sorted as strings, which for uuids is the same order as the
+    one used by PostgreSQL.
+    """
+    hits = scan(
+        es,
+        index=LiteratureSearch.Meta.index,
+        query={'sort': ['_id']},
+        _source=False,
+        preserve_order=True,
+        size=2000,
+    )
+
+    for hit in hits:
+        yield hit['_id']
+
+
+def find_missing_and_orphan_records(db_records, es_uuids):
+    """Merge join the records of the DB and of ES.
+
+    Args:
+        db_records: iterable of ``(uuid, pid_value)`` sorted by uuid.
+        es_uuids: iterable of uuids sorted in the same order.
+
+    Yields:
+        tuple: ``('missing', uuid, pid_value)`` for each record of the DB which
+        is not in ES and ``('orphan', uuid, None)`` for each document of ES
+        which is not in the DB.
+    """
+    db_records = iter(db_records)
+    es_uuids = iter(es_uuids)
+    db_record = next(db_records, None)
+    es_uuid = next(es_uuids, None)
+
+    while db_record is not None or es_uuid is not None:
+        if es_uuid is None or (db_record is not None and db_record[0] < es_uuid):
+            yield 'missing', db_record[0], db_record[1]
+            db_record = next(db_records, None)
+        elif db_record is None or es_uuid < db_record[0]:
+            yield 'orphan', es_uuid, None
+            es_uuid = next(es_uuids, None)
+        else:
+            db_record = next(db_records, None)
+            es_uuid = next(es_uuids, None)
+
+
+def get_db_citation_counts():
+    """Return the number of citations in the DB of all cited literature records.
+
+    The counts of all records are computed in a single grouped query, with
+    the same rules as ``InspireRecord.get_citations_count``.
+
+    Returns:
+        dict: a mapping from control number to citation count. Records which
+        are not cited are not included.
+    """
+    json = type_coerce(RecordMetadata.json, JSONB)
+    filter_superseded_records = or_(
+        not_(json.has_key('related_records')),  # noqa: W601
+        not_(json['related_records'].contains([{'relation': 'successor'}])),
+    )
+    citing_records = (
+        db.session.query(
+            func.unnest(referenced_records(RecordMetadata.json)).label('cited'),
+            json['control_number'].astext.label('control_number'),
+        )
+        .filter(
+            _filter_deleted_records(),
+            filter_superseded_records,
+            json['_collections'].contains(['Literature']),
+        )
+        .subquery()
+    )
+    query = (
+        db.session.query(
+            citing_records.c.cited,
+            func.count(distinct(citing_records.c.control_number)),
+        )
+        .filter(citing_records.c.cited.like('%lit'))
+        .group_by(citing_records.c.cited)
+    )
+
+    return {
+        int(cited[:-len('lit')]): count
+        for cited, count in query.yield_per(10000)
+        if cited[:-len('lit')].isdigit()
+    }
+
+
+def _count_es_cited_records():
+    search = LiteratureSearch().query(
+        ~Q('match', related_records__relation='successor')
+    ).extra(size=0)
+    search.aggs.metric(
+        'cited_records',
+        'cardinality',
+        field='references.recid',
+        precision_threshold=40000,
+    )
+    return search.execute().aggregations.cited_records.value
+
+
+def get_es_citation_counts(num_partitions=None):
+    """Return the number of citations in ES of all cited literature records.
+
+    The citations are counted with a ``terms`` aggregation on
+    ``references.recid``, which is split in ``num_partitions`` requests of
+    at most ``CITATION_COUNTS_PARTITION_SIZE`` buckets. By default, the
+    number of partitions is computed from the approximate number of cited
+    records, so that each one is about half full.
+
+    Returns:
+        dict: a mapping from control number to citation count. Records which
+        are not cited are not included.
+
+    Raises:
+        IncompleteCitationCountsError: if a partition had more cited records
+            than it could return.
+    """
+    if num_partitions is None:
+        num_partitions = 2 * _count_es_cited_records() // CITATION_COUNTS_PARTITION_SIZE + 1
+
+    citation_counts = {}
+
+    for partition in range(num_partitions):
+        search = LiteratureSearch().query(
+            ~Q('match', related_records__relation='successor')
+        ).extra(size=0)
+        search.aggs.bucket(
+            'citations',
+            'terms',
+            field='references.recid',
+            size=CITATION_COUNTS_PARTITION_SIZE,
+            include={'partition': partition, 'num_partitions': num_partitions},
+        )
+        citations = search.execute().aggregations.citations
+        if citations.sum_other_doc_count:
+            raise IncompleteCitationCountsError(
+                'Partition {} of {} has more than {} cited records, use more '
+                'partitions.'.format(partition, num_partitions, CITATION_COUNTS_PARTITION_SIZE)
+            )
+        citation_counts.update(
+            (bucket.key, bucket.doc_count) for bucket in citations.buckets
+        )
+
+    return citation_counts
+
+
+def get_es_citation_count_fields():
+    """Return the ``citation_count`` field of all literature records in ES.
+
+    Returns:
+        dict: a mapping from control number to the stored citation count.
+    """
+    search = LiteratureSearch().params(
+        _source=['control_number', 'citation_count'],
+        size=2000,
+    )
+
+    return {
+        hit.control_number: hit.to_dict().get('citation_count')
+        for hit in search.scan()
+    }
+
+
+def compare_citation_counts(db_records, db_counts, es_counts, es_fields):
+    """Join the citation counts of the DB and ES for every record.
+
+    Args:
+        db_records: iterable of ``(uuid, pid_value)`` of the records to check.
+        db_counts (dict): citation counts computed by
+            :func:`get_db_citation_counts`.
+        es_counts (dict): citation counts computed by
+            :func:`get_es_citation_counts`.
+        es_fields (dict): stored citation counts returned by
+            :func:`get_es_citation_count_fields`.
+
+    Yields:
+        tuple: ``(success, no_citations, data)`` for every record, where
+        ``data`` is the row to report for inconsistent records.
+    """
+    for _, pid_value in db_records:
+        recid = int(pid_value)
+        db_cits = db_counts.get(recid, 0)
+        es_cits = es_counts.get(recid, 0)
+        es_citation_count_field = es_fields.get(recid)
+
+        if db_cits == es_cits == es_citation_count_field:
+            yield True, es_cits == 0, {}
+        else:
+            yield False, False, {
+                'pid_value': pid_value,
+                'db_citations_count': db_cits,
+                'es_citations_count': es_cits,
+                'es_citations_field': es_citation_count_field,
+            }
@@ -47,18 +47,25 @@ from invenio_workflows.models import WorkflowObjectModel
 from inspirehep.utils.record_getter import (
     get_db_record,
     get_db_records,
-    get_es_record,
-    RecordGetterError,
 )
-from inspirehep.modules.records.checkers import check_unlinked_references
+from inspirehep.modules.records.checkers import (
+    check_unlinked_references,
+    compare_citation_counts,
+    find_missing_and_orphan_records,
+    get_db_citation_counts,
+    get_db_literature_uuids,
+    get_es_citation_count_fields,
+    get_es_citation_counts,
+    get_es_literature_uuids,
+)
 from inspirehep.modules.records.tasks import batch_reindex
 
 from invenio_records.models import RecordMetadata
-from inspirehep.modules.search.api import LiteratureSearch
 
 
 from sqlalchemy import (
     cast,
+    tuple_,
 )
 
 from sqlalchemy.dialects.postgresql import JSONB
@@ -450,15 +457,69 @@ def _prepare_logdir(log_path):
 
 
 def _gen_query(query, page_start=1, page_end=-1, window_size=100):
-    query = query.paginate(page_start, window_size)
-    while query and (page_start <= page_end or page_end == -1):
-        for item in query.items:
+    """Iterate over the PIDs returned by ``query`` page by page.
+
+    Pages are ``window_size`` long and ordered by ``(pid_type, pid_value)``.
+    They are fetched with keyset pagination, so reading a page costs the
+    same wherever it is in the pidstore. Only the start of ``page_start`` is
+    located with an ``OFFSET``, once. A ``page_end`` of -1 means until the
+    last page.
+    """
+    keys = (PersistentIdentifier.pid_type, PersistentIdentifier.pid_value)
+    query = query.order_by(*keys)
+
+    last_key = None
+    if page_start > 1:
+        last_key = query.with_entities(*keys).offset(
+            (page_start - 1) * window_size - 1
+        ).first()
+        if last_key is None:
+            return
+
+    while page_start <= page_end or page_end == -1:
+        page_query = query
+        if last_key is not None:
+            page_query = page_query.filter(tuple_(*keys) > tuple_(*last_key))
+        items = page_query.limit(window_size).all()
+
+        for item in items:
             yield item
-        if query.has_next:
-            query = query.next()
-            page_start += 1
-        else:
-            query = None
+
+        if len(items) < window_size:
+            return
+        last_key = (items[-1].pid_type, items[-1].pid_value)
+        page_start += 1
+
+
+def _get_pid_value_range(query, page_start=1, page_end=-1, window_size=100):
+    """Return the first and last PID values of a range of pages of ``query``.
+
+    Pages are the same as in :func:`_gen_query`, so a run of a command split
+    with ``--from-page``/``--to-page`` covers the same PIDs whether it
+    iterates over them or filters by their range.
+
+    Returns:
+        tuple: ``(first, last, empty)``, where ``first`` or ``last`` is
+        ``None`` for an open end, and ``empty`` is ``True`` when
+        ``page_start`` is past the last PID.
+    """
+    query = query.order_by(
+        PersistentIdentifier.pid_type, PersistentIdentifier.pid_value
+    ).with_entities(PersistentIdentifier.pid_value)
+
+    first = None
+    if page_start > 1:
+        first = query.offset((page_start - 1) * window_size).first()
+        if first is None:
+            return None, None, True
+        first = first[0]
+
+    last = None
+    if page_end != -1:
+        last = query.offset(page_end * window_size - 1).first()
+        last = last[0] if last is not None else None
+
+    return first, last, False
 
 
 class MyThreadPool(ThreadPool):
@@ -483,31 +544,37 @@ class MyThreadPool(ThreadPool):
 
 @check.command()
 @click.option('-o', '--data-output', default='/tmp/inspire/missing_records.txt')
+@click.option('--orphans-output', default='/tmp/inspire/orphan_records.txt')
 @with_appcontext
-def check_missing_records_in_es(data_output):
-    """Checks if all not deleted records from pidstore are also in ElasticSearch"""
-    all_records = int(PersistentIdentifier.query.filter(
-        PersistentIdentifier.pid_type == 'lit').count())
+def check_missing_records_in_es(data_output, orphans_output):
+    """Checks if all not deleted records from pidstore are also in ElasticSearch
+
+    The uuids of the records in the DB and of the documents in ES are both
+    streamed in order and compared in a single pass. The pid values of the
+    records missing from ES are saved in ``data_output``, the uuids of the
+    documents only present in ES in ``orphans_output``.
+    """
     _prepare_logdir(data_output)
+    _prepare_logdir(orphans_output)
     click.echo("All missing records pids will be saved in %s file" % data_output)
+    click.echo("All orphan documents uuids will be saved in %s file" % orphans_output)
     missing = 0
-    _query = _gen_query(PersistentIdentifier.query.filter(
-        PersistentIdentifier.pid_type == 'lit'))
-    with click.progressbar(_query,
-                           length=all_records,
-                           label="Processing pids (%s pids)..." % all_records) as pidstore:
-        with open(data_output, 'w') as data_file:
-            for pid in pidstore:
-                db_rec = get_db_record('lit', pid.pid_value)
-                if db_rec.get('deleted'):
-                    continue
-                try:
-                    get_es_record('lit', pid.pid_value)
-                except RecordGetterError:
+    orphans = 0
+    differences = find_missing_and_orphan_records(
+        get_db_literature_uuids(),
+        get_es_literature_uuids(),
+    )
+    with open(data_output, 'w') as data_file, open(orphans_output, 'w') as orphans_file:
+        with click_spinner.spinner():
+            for kind, uuid, pid_value in differences:
+                if kind == 'missing':
                     missing += 1
-                    data_file.write("%s\n" % pid.pid_value)
-                    data_file.flush()
+                    data_file.write("%s\n" % pid_value)
+                else:
+                    orphans += 1
+                    orphans_file.write("%s\n" % uuid)
     click.echo("%s records are missing from es" % missing)
+    click.echo("%s documents in es are not in the db" % orphans)
 
 
 def _benchmark_record(pid, app):
@@ -601,123 +668,79 @@ def benchmark_citations(from_page, to_page, pagesize, data_output, pool_size):
             click.echo("Results saved in %s" % data_output)
 
 
-def _process_record(pid, app):
-    if stop:
-        return
-    with app.app_context():
-        success = False
-        deleted = False
-        no_cits = False
-        db_cits = None
-        es_cits = None
-        es_citation_count_field = None
-        data = {}
-        rec = get_db_record('lit', pid.pid_value)
-        if rec.get('deleted'):
-            success = True
-            deleted = True
-        if not deleted:
-            try:
-                es_cits = LiteratureSearch.citations(rec).total
-                search = LiteratureSearch().source(includes=['citation_count'])
-                results = search.get_record(rec.id).execute()
-                if not results.hits:
-                    es_citation_count_field = None
-                else:
-                    es_citation_count_field = results.hits[0]['citation_count']
-                db_cits = rec.get_citations_count()
-            except Exception as err:
-                click.echo("Cannot prepare data for %s record. %s",
-                           pid.pid_value,
-                           err)
-        if not deleted and es_cits is not None and es_cits == db_cits == es_citation_count_field:
-            if es_cits == 0:
-                no_cits = True
-            success = True
-        else:
-            data = {'pid_value': pid.pid_value,
-                    'db_citations_count': db_cits,
-                    'es_citations_count': es_cits,
-                    'es_citations_field': es_citation_count_field}
-        return (success, deleted, no_cits, data)
-
-
 @check.command()
 @click.option('-f', '--from-page', default=1)
 @click.option('-t', '--to-page', default=-1)
 @click.option('-s', '--pagesize', default=100)
 @click.option('-o', '--output', default='/tmp/inspire/citations_inconsistencies.txt')
-@click.option('-p', '--pool-size', default=10)
+@click.option('-n', '--es-partitions', type=int, help='Number of ES requests, by default computed from the number of cited records.')
+@click.option('-p', '--pool-size', type=int, help='Deprecated, ignored.')
 @with_appcontext
-def find_citations_inconsistencies(from_page, to_page, pagesize, output, pool_size):
+def find_citations_inconsistencies(from_page, to_page, pagesize, output, es_partitions, pool_size):
     """Process all non deleted records and check if citation in ES
-    are the same like in DB"""
-    if pool_size > 10:
-        click.echo("Using more than 10 threads is unsafe. It will propably"
-                   " break as flask sets db connection limit per process"
-                   " to 10!")
-        click.confirm("Are you sure you want to continue?", abort=True)
-    global stop
-    stop = False
+    are the same like in DB
+
+    The citation counts of all records are computed in bulk: once in the DB
+    with a grouped query, once in ES with a terms aggregation split in
+    ``es_partitions`` requests, and the stored ``citation_count`` fields are
+    read with a scroll. They are then compared in memory.
+
+    ``--from-page``, ``--to-page`` and ``--pagesize`` select, as in the other
+    checks, a range of the literature PIDs ordered by ``(pid_type,
+    pid_value)``, so that a run can be split across machines. Only the
+    records of that range are compared, but each run still computes the
+    counts of all records.
+    """
+    if pool_size is not None:
+        click.secho("--pool-size is deprecated and ignored, the citation"
+                    " counts are computed in bulk.", fg='yellow')
     ok = 0
     fail = 0
     no_cits = 0
-    deleted = 0
 
-    all_recs = int(PersistentIdentifier.query.filter(
-        PersistentIdentifier.pid_type == 'lit').count())
-    all_pages = int(all_recs / pagesize) + 1
-    if -1 < to_page < all_pages:
-        all_recs = (all_pages - (all_pages - to_page)) * pagesize
-    if from_page > 1:
-        all_recs -= int((from_page - 1) * pagesize)
-    with click.progressbar(length=all_recs,
-                           label="Processing %s records..." % all_recs) as bar:
-        _prepare_logdir(output)
-        with open(output, 'w') as data_file:
-            keys = ['pid_value', 'db_citations_count',
-                    'es_citations_count', 'es_citations_field']
-            out_data = csv.DictWriter(data_file, keys)
-            out_data.writeheader()
-            _query = _gen_query(
-                PersistentIdentifier.query.filter(PersistentIdentifier.pid_type == 'lit'),
-                from_page,
-                to_page,
-                pagesize
-            )
-            _threads_pool = MyThreadPool(pool_size)
-            _threads = _threads_pool.imap_unordered(_process_record, _query,
-                                                    current_app._get_current_object())
-            try:
-                for _thread in _threads:
-                    success, record_deleted, no_citations, data = _thread
-                    bar.update(1)
-                    if success:
-                        ok += 1
-                        if record_deleted:
-                            deleted += 1
-                        elif no_citations:
-                            no_cits += 1
-                    else:
-                        fail += 1
-                        out_data.writerow(data)
-                        data_file.flush()
-            except AttributeError as err:
-                click.echo("Cannot process. Threads exception :%s" % err)
-            except Exception as err:
-                click.echo("Other exception during Threads management: %s" % err)
-            stop = True
-            _threads_pool.close()
-            _threads_pool.join()
+    from_pid_value, to_pid_value, empty = _get_pid_value_range(
+        PersistentIdentifier.query.filter(PersistentIdentifier.pid_type == 'lit'),
+        from_page,
+        to_page,
+        pagesize
+    )
+    if empty:
+        click.echo("No records in pages %s to %s" % (from_page, to_page))
+        return
 
-            output_msg = "\nProcessed {all_recs} records. {ok} were ok, {failed}"\
-                         " had difference between db an es ctations count!"\
-                         "\n{no_citations} records had no citations"\
-                         " at all.\n{deleted} records"\
-                         " were deleted\n".format(all_recs=ok + fail,
-                                                  ok=ok, failed=fail,
-                                                  no_citations=no_cits,
-                                                  deleted=deleted)
-            click.echo(output_msg)
-            click.echo("Additional statistics for incosistent records"
-                       "was saved in %s file" % output)
+    _prepare_logdir(output)
+    with click_spinner.spinner():
+        click.echo("Counting citations in db...")
+        db_counts = get_db_citation_counts()
+        click.echo("Counting citations in es...")
+        es_counts = get_es_citation_counts(es_partitions)
+        click.echo("Reading citation_count fields from es...")
+        es_fields = get_es_citation_count_fields()
+
+    with open(output, 'w') as data_file:
+        keys = ['pid_value', 'db_citations_count',
+                'es_citations_count', 'es_citations_field']
+        out_data = csv.DictWriter(data_file, keys)
+        out_data.writeheader()
+        results = compare_citation_counts(
+            get_db_literature_uuids(from_pid_value, to_pid_value),
+            db_counts, es_counts, es_fields
+        )
+        for success, no_citations, data in results:
+            if success:
+                ok += 1
+                if no_citations:
+                    no_cits += 1
+            else:
+                fail += 1
+                out_data.writerow(data)
+
+    output_msg = "\nProcessed {all_recs} records. {ok} were ok, {failed}"\
+                 " had difference between db an es ctations count!"\
+                 "\n{no_citations} records had no citations"\
+                 " at all.\n".format(all_recs=ok + fail,
+                                     ok=ok, failed=fail,
+                                     no_citations=no_cits)
+    click.echo(output_msg)
+    click.echo("Additional statistics for incosistent records"
+               "was saved in %s file" % output)
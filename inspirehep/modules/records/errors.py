@@ -35,3 +35,7 @@ class MissingCitedRecordError(RecordsError):
 
 class MissingUUIDOrRevisionInHEPResponse(RecordsError):
     pass
+
+
+class IncompleteCitationCountsError(RecordsError):
+    pass
@@ -53,6 +53,7 @@ from inspirehep.modules.records.api import InspireRecord
 from inspirehep.modules.records.errors import MissingInspireRecordError
 from inspirehep.modules.records.serializers.schemas.json import RecordMetadataSchemaV1
 from inspirehep.modules.records.tasks import index_modified_citations_from_record
+from inspirehep.modules.refextract.matcher import invalidate_reference_matches
 from inspirehep.modules.records.utils import (
     is_author,
     is_book,
@@ -79,6 +80,8 @@ from inspirehep.modules.records.utils import (
     populate_facet_author_name,
     populate_ui_display,
 )
+from inspirehep.utils.institutions import invalidate_institutions
+from inspirehep.utils.journals import invalidate_journal_kb
 from invenio_indexer.api import RecordIndexer
 
 LOGGER = logging.getLogger(__name__)
@@ -201,6 +204,41 @@ def index_after_commit(sender, changes):
             index_modified_citations_from_record.delay(pid_type, pid_value, db_version)
 
 
+@models_committed.connect
+def invalidate_journal_kb_after_commit(sender, changes):
+    """Invalidate the journal KB and titles index when a Journals record was committed."""
+    for model_instance, change in changes:
+        if isinstance(model_instance, RecordMetadata) and is_journal(model_instance.json):
+            invalidate_journal_kb()
+            return
+
+
+@models_committed.connect
+def invalidate_institutions_after_commit(sender, changes):
+    """Invalidate the cached institutions when an Institutions record was committed."""
+    if not current_app.config.get('FEATURE_FLAG_ENABLE_INSTITUTIONS_CACHE'):
+        return
+
+    for model_instance, change in changes:
+        if isinstance(model_instance, RecordMetadata) and is_institution(model_instance.json):
+            invalidate_institutions()
+            return
+
+
+@models_committed.connect
+def invalidate_reference_matches_after_commit(sender, changes):
+    """Invalidate the cached matches of references to deleted or merged records."""
+    if not current_app.config.get('FEATURE_FLAG_ENABLE_REFERENCE_MATCHER_CACHE'):
+        return
+
+    for model_instance, change in changes:
+        if not isinstance(model_instance, RecordMetadata):
+            continue
+        record = model_instance.json
+        if (change == 'delete' or record.get('deleted')) and (is_hep(record) or is_data(record)):
+            invalidate_reference_matches(record['control_number'])
+
+
 def enhance_before_index(record):
     """Run all the receivers that enhance the record for ES in the right order.
 
@@ -236,3 +236,8 @@ REFERENCE_MATCHER_DATA_CONFIG = {
 }
 """Configuration for matching data records. Please note that the
 index is different for data records."""
+
+
+REFERENCE_MATCHER_MSEARCH_BATCH_SIZE = 100
+"""Number of searches sent in a single ``msearch`` request when matching
+references in bulk."""
@@ -22,13 +22,40 @@
 
 from __future__ import absolute_import, division, print_function
 
+import hashlib
+import json
+
+import six
+from flask import current_app
 from inspire_dojson.utils import get_record_ref, get_recid_from_ref
-from inspire_matcher import match
+from inspire_matcher.core import compile
 from inspire_utils.dedupers import dedupe_list
 from inspire_utils.record import get_value
+from invenio_cache import current_cache
+from invenio_search import current_search_client as es
+from invenio_search.utils import prefix_index
+from werkzeug.utils import import_string
 
 from inspirehep.modules.refextract import config
 
+REFERENCE_FINGERPRINT_PATHS = (
+    'arxiv_eprint',
+    'dois',
+    'isbn',
+    'publication_info.artid',
+    'publication_info.journal_issue',
+    'publication_info.journal_title',
+    'publication_info.journal_volume',
+    'publication_info.page_start',
+    'publication_info.year',
+    'report_numbers',
+    'texkey',
+)
+"""Fields of a reference used by the matcher configurations."""
+
+MATCH_CACHE_KEY = 'refextract::match::{fingerprint}'
+INVALIDATED_MATCH_CACHE_KEY = 'refextract::match::invalidated::{recid}'
+
 
 def _add_match_to_reference(reference, matched_recid, es_index):
     """Modifies a reference to include its record id."""
@@ -38,91 +65,329 @@ def _add_match_to_reference(reference, matched_recid, es_index):
         reference['record'] = get_record_ref(matched_recid, 'literature')
 
 
-def match_reference_with_config(reference, config, previous_matched_recid=None):
-    """Match a reference using inspire-matcher given the config.
+def _get_validator(validator_param):
+    if callable(validator_param):
+        return validator_param
 
-    Args:
-        reference (dict): the metadata of the reference.
-        config (dict): the list of inspire-matcher configurations for queries.
-        previous_matched_recid (int): the record id of the last matched
-            reference from the list of references.
+    try:
+        return import_string(validator_param)
+    except (KeyError, ImportError):
+        return import_string('inspire_matcher.validators:default_validator')
 
-    Returns:
-        dict: the matched reference.
-    """
+
+def _cast_publication_info_year(reference, type_):
     # XXX: avoid this type casting.
     try:
-        reference['reference']['publication_info']['year'] = str(
+        reference['reference']['publication_info']['year'] = type_(
             reference['reference']['publication_info']['year'])
     except KeyError:
         pass
 
-    matched_recids = [matched_record['_source']['control_number'] for matched_record in match(reference, config)]
-    matched_recids = dedupe_list(matched_recids)
 
+def get_reference_configs(reference):
+    """Return the inspire-matcher configurations to try on a reference, in order."""
+    journal_title = get_value(reference, 'reference.publication_info.journal_title')
+    config_publication_info = config.REFERENCE_MATCHER_JHEP_AND_JCAP_PUBLICATION_INFO_CONFIG if \
+        journal_title in ['JCAP', 'JHEP'] else config.REFERENCE_MATCHER_DEFAULT_PUBLICATION_INFO_CONFIG
+
+    return [
+        config.REFERENCE_MATCHER_UNIQUE_IDENTIFIERS_CONFIG,
+        config_publication_info,
+        config.REFERENCE_MATCHER_TEXKEY_CONFIG,
+        config.REFERENCE_MATCHER_DATA_CONFIG,
+    ]
+
+
+def _compile_searches(reference, matcher_config):
+    """Compile all the queries of an inspire-matcher configuration.
+
+    Mirrors what ``inspire_matcher.match`` does, but returns the searches
+    instead of sending them one by one.
+
+    Returns:
+        list: tuples of the ES index, the search body and the validators to
+        apply to its hits.
+    """
+    index = prefix_index(matcher_config['index'])
+    collections = matcher_config.get('collections')
+    match_deleted = matcher_config.get('match_deleted', False)
+
+    searches = []
+    for step in matcher_config['algorithm']:
+        validator_params = step.get('validator')
+        if not isinstance(validator_params, list):
+            validator_params = [validator_params]
+        validators = [_get_validator(param) for param in validator_params]
+
+        for query in step['queries']:
+            body = compile(query, reference, collections=collections, match_deleted=match_deleted)
+            if not body:
+                continue
+            body['size'] = matcher_config.get('size', 10)
+            if matcher_config.get('source'):
+                body['_source'] = matcher_config['source']
+            searches.append((index, body, validators))
+
+    return searches
+
+
+def _msearch(searches):
+    """Run searches in batches of ``msearch`` and return their hits."""
+    batch_size = config.REFERENCE_MATCHER_MSEARCH_BATCH_SIZE
+    hits = []
+    for start in range(0, len(searches), batch_size):
+        batch = searches[start:start + batch_size]
+        body = []
+        for index, search_body in batch:
+            body.extend([{'index': index}, search_body])
+
+        responses = es.msearch(body=body)['responses']
+        for (index, search_body), response in zip(batch, responses):
+            if 'error' in response:
+                current_app.logger.debug(
+                    'Retrying failed search %r: %r', search_body, response['error'])
+                response = es.search(index=index, body=search_body)
+            hits.append(response['hits']['hits'])
+
+    return hits
+
+
+def _get_matched_recids(references_and_configs):
+    """Return the ids of the records matching each reference with its config.
+
+    All searches are sent together with :func:`_msearch`. For each pair of
+    reference and configuration, the result is the same as the deduplicated
+    ids of the records returned by ``inspire_matcher.match``.
+    """
+    searches, owners = [], []
+    for position, (reference, matcher_config) in enumerate(references_and_configs):
+        for index, body, validators in _compile_searches(reference, matcher_config):
+            searches.append((index, body))
+            owners.append((position, reference, validators))
+
+    matched_recids = [[] for _ in references_and_configs]
+    for (position, reference, validators), hits in zip(owners, _msearch(searches)):
+        for hit in hits:
+            if all(validator(reference, hit) for validator in validators):
+                matched_recids[position].append(hit['_source']['control_number'])
+
+    return [dedupe_list(recids) for recids in matched_recids]
+
+
+def _apply_matched_recids(reference, matched_recids, matcher_config, previous_matched_recid):
     same_as_previous = any(matched_recid == previous_matched_recid for matched_recid in matched_recids)
     if len(matched_recids) == 1:
-        _add_match_to_reference(reference, matched_recids[0], config['index'])
+        _add_match_to_reference(reference, matched_recids[0], matcher_config['index'])
     elif same_as_previous:
-        _add_match_to_reference(reference, previous_matched_recid, config['index'])
+        _add_match_to_reference(reference, previous_matched_recid, matcher_config['index'])
 
-    # XXX: avoid this type casting.
-    try:
-        reference['reference']['publication_info']['year'] = int(
-            reference['reference']['publication_info']['year'])
-    except KeyError:
-        pass
 
-    return reference
+def _normalize_fingerprint_value(value):
+    if isinstance(value, list):
+        return sorted(set(_normalize_fingerprint_value(element) for element in value))
+    return six.text_type(value).strip()
 
 
-def match_reference(reference, previous_matched_recid=None):
-    """Match a reference using inspire-matcher.
+def get_reference_fingerprint(reference):
+    """Return a key identifying the searches the matcher runs for a reference.
 
-    Args:
-        reference (dict): the metadata of a reference.
-        previous_matched_recid (int): the record id of the last matched
-            reference from the list of references.
+    Two references with the same fingerprint get the same candidates from
+    every matcher configuration. ``None`` is returned if the reference has
+    none of the fields used for matching.
+    """
+    fingerprint = {}
+    for path in REFERENCE_FINGERPRINT_PATHS:
+        value = get_value(reference, 'reference.' + path)
+        if value not in (None, '', []):
+            fingerprint[path] = _normalize_fingerprint_value(value)
 
-    Returns:
-        dict: the matched reference.
+    if not fingerprint:
+        return None
+
+    return hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def invalidate_reference_matches(recid):
+    """Stop using the cached matches of references to the given record."""
+    current_cache.set(
+        INVALIDATED_MATCH_CACHE_KEY.format(recid=recid),
+        True,
+        timeout=current_app.config['REFERENCE_MATCHER_CACHE_TIMEOUT'],
+    )
+
+
+def _get_cached_matches(references):
+    """Return the cached matches of the references, by reference id."""
+    fingerprints = {
+        id(reference): get_reference_fingerprint(reference)
+        for reference in references
+    }
+    references = [reference for reference in references if fingerprints[id(reference)]]
+    if not references:
+        return {}
+
+    cached = current_cache.get_many(*[
+        MATCH_CACHE_KEY.format(fingerprint=fingerprints[id(reference)])
+        for reference in references
+    ])
+    cached_matches = {
+        id(reference): match
+        for reference, match in zip(references, cached)
+        if match is not None
+    }
+
+    matched_recids = dedupe_list([
+        match['recid'] for match in cached_matches.values() if match['recid']
+    ])
+    invalidated = current_cache.get_many(*[
+        INVALIDATED_MATCH_CACHE_KEY.format(recid=recid) for recid in matched_recids
+    ]) if matched_recids else []
+    invalidated_recids = {
+        recid for recid, is_invalidated in zip(matched_recids, invalidated) if is_invalidated
+    }
+
+    return {
+        reference_id: match for reference_id, match in cached_matches.items()
+        if match['recid'] not in invalidated_recids
+    }
+
+
+def _get_context_free_match(reference, configs, matched_recids):
+    """Return the match of a reference if it doesn't depend on the previous one.
+
+    That is the case when the first configuration finding something finds a
+    single record, or when no configuration finds anything.
     """
-    if reference.get('curated_relation'):
-        return reference
+    for stage, matcher_config in enumerate(configs):
+        recids = matched_recids.get((id(reference), stage))
+        if recids is None:
+            return None
+        if len(recids) == 1:
+            return {'recid': recids[0], 'index': matcher_config['index']}
+        if recids:
+            return None
 
-    config_unique_identifiers = config.REFERENCE_MATCHER_UNIQUE_IDENTIFIERS_CONFIG
-    config_texkey = config.REFERENCE_MATCHER_TEXKEY_CONFIG
-    config_default_publication_info = config.REFERENCE_MATCHER_DEFAULT_PUBLICATION_INFO_CONFIG
-    config_jcap_and_jhep_publication_info = config.REFERENCE_MATCHER_JHEP_AND_JCAP_PUBLICATION_INFO_CONFIG
-    config_data = config.REFERENCE_MATCHER_DATA_CONFIG
+    return {'recid': None}
 
-    journal_title = get_value(reference, 'reference.publication_info.journal_title')
-    config_publication_info = config_jcap_and_jhep_publication_info if \
-        journal_title in ['JCAP', 'JHEP'] else config_default_publication_info
 
-    configs = [config_unique_identifiers, config_publication_info, config_texkey, config_data]
+def _cache_matches(references, configs, matched_recids):
+    matches, no_matches = {}, {}
+    for reference in references:
+        fingerprint = get_reference_fingerprint(reference)
+        match = _get_context_free_match(reference, configs[id(reference)], matched_recids)
+        if not fingerprint or not match:
+            continue
 
-    matches = (match_reference_with_config(reference, config, previous_matched_recid) for config in configs)
-    matches = (matched_record for matched_record in matches if 'record' in matched_record)
-    reference = next(matches, reference)
+        key = MATCH_CACHE_KEY.format(fingerprint=fingerprint)
+        if match['recid']:
+            matches[key] = match
+        else:
+            no_matches[key] = match
 
-    return reference
+    if matches:
+        current_cache.set_many(
+            matches, timeout=current_app.config['REFERENCE_MATCHER_CACHE_TIMEOUT'])
+    if no_matches:
+        current_cache.set_many(
+            no_matches, timeout=current_app.config['REFERENCE_MATCHER_NEGATIVE_CACHE_TIMEOUT'])
 
 
-def match_references(references):
+def match_references(references, previous_matched_recid=None):
     """Match references to their respective records in INSPIRE.
 
+    The configurations of :func:`get_reference_configs` are tried in order
+    on each reference until one of them matches a record. A configuration
+    matches when it finds a single record, or when one of the records it
+    finds is the one matched by the previous reference in the list.
+
+    Instead of matching references one by one, the searches of each
+    configuration are sent for all the references at once, and the next
+    configuration is only tried on the references that didn't match a
+    single record. The matches are then assigned in order, which gives the
+    same results as matching the references one after the other.
+
+    If ``FEATURE_FLAG_ENABLE_REFERENCE_MATCHER_CACHE`` is set, the matches
+    that don't depend on the previous reference are cached by
+    :func:`get_reference_fingerprint`, and reused by the following calls
+    until they expire or the matched record is deleted or merged.
+
     Args:
         references (list): the list of references.
+        previous_matched_recid (int): the record id matched by the reference
+            preceding ``references``, if any.
 
     Returns:
         list: the matched references.
     """
-    matched_references, previous_matched_recid = [], None
-    for ref in references:
-        ref = match_reference(ref, previous_matched_recid)
-        matched_references.append(ref)
-        if 'record' in ref:
-            previous_matched_recid = get_recid_from_ref(ref['record'])
-
-    return matched_references
+    references = list(references)
+    to_match = [reference for reference in references if not reference.get('curated_relation')]
+    configs = {id(reference): get_reference_configs(reference) for reference in to_match}
+    matched_recids = {}
+
+    for reference in to_match:
+        _cast_publication_info_year(reference, str)
+
+    use_cache = current_app.config.get('FEATURE_FLAG_ENABLE_REFERENCE_MATCHER_CACHE')
+    cacheable = [reference for reference in to_match if 'record' not in reference] if use_cache else []
+    cached_matches = _get_cached_matches(cacheable) if cacheable else {}
+
+    stage, pending = 0, [reference for reference in to_match if id(reference) not in cached_matches]
+    searched = pending
+    while pending:
+        results = _get_matched_recids(
+            [(reference, configs[id(reference)][stage]) for reference in pending]
+        )
+        for reference, recids in zip(pending, results):
+            matched_recids[(id(reference), stage)] = recids
+
+        stage += 1
+        pending = [
+            reference for reference, recids in zip(pending, results)
+            if len(recids) != 1 and 'record' not in reference and stage < len(configs[id(reference)])
+        ]
+
+    for reference in to_match:
+        _cast_publication_info_year(reference, int)
+
+    if use_cache:
+        _cache_matches(
+            [reference for reference in searched if 'record' not in reference],
+            configs,
+            matched_recids,
+        )
+
+    for reference in references:
+        if id(reference) in cached_matches:
+            cached_match = cached_matches[id(reference)]
+            if cached_match['recid']:
+                _add_match_to_reference(reference, cached_match['recid'], cached_match['index'])
+        elif not reference.get('curated_relation'):
+            for stage, matcher_config in enumerate(configs[id(reference)]):
+                if (id(reference), stage) not in matched_recids:
+                    break
+                _apply_matched_recids(
+                    reference,
+                    matched_recids[(id(reference), stage)],
+                    matcher_config,
+                    previous_matched_recid,
+                )
+                if 'record' in reference:
+                    break
+        if 'record' in reference:
+            previous_matched_recid = get_recid_from_ref(reference['record'])
+
+    return references
+
+
+def match_reference(reference, previous_matched_recid=None):
+    """Match a reference using inspire-matcher.
+
+    Args:
+        reference (dict): the metadata of a reference.
+        previous_matched_recid (int): the record id of the last matched
+            reference from the list of references.
+
+    Returns:
+        dict: the matched reference.
+    """
+    return match_references([reference], previous_matched_recid)[0]
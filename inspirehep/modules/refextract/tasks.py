@@ -24,16 +24,24 @@
 
 from __future__ import absolute_import, division, print_function
 import re
+import threading
 from celery import shared_task
 from flask import current_app
+from invenio_cache import current_cache
 from invenio_db import db
 from invenio_records.models import RecordMetadata
 from sqlalchemy import cast, not_, type_coerce
 from sqlalchemy.dialects.postgresql import JSONB
 from inspirehep.modules.refextract.utils import KbWriter
+from inspirehep.utils.journals import get_journal_kb_version
 
 RE_PUNCTUATION = re.compile(r"[\.,;'\(\)-]", re.UNICODE)
 
+JOURNAL_KB_KEY = 'refextract::journal_kb::{version}'
+
+_journal_kb = {'version': None, 'kb_dict': None}
+_journal_kb_lock = threading.Lock()
+
 
 @shared_task()
 def create_journal_kb_file():
@@ -152,3 +160,33 @@ def create_journal_kb_dict():
         title_dict.update(sub_dict)
 
     return title_dict
+
+
+def get_journal_kb_dict():
+    """Return the journal KB built by :func:`create_journal_kb_dict`.
+
+    The KB is kept in memory by each worker, and in the cache under its
+    current version, so it is only built from the database after it was
+    invalidated by a change to a Journals record. The returned dictionary
+    is shared and must not be modified.
+    """
+    version = get_journal_kb_version()
+
+    with _journal_kb_lock:
+        if _journal_kb['version'] == version:
+            return _journal_kb['kb_dict']
+
+        key = JOURNAL_KB_KEY.format(version=version)
+        kb_dict = current_cache.get(key)
+        if kb_dict is None:
+            kb_dict = create_journal_kb_dict()
+            current_cache.set(
+                key,
+                kb_dict,
+                timeout=current_app.config['REFEXTRACT_JOURNAL_KB_CACHE_TIMEOUT'],
+            )
+
+        _journal_kb['version'] = version
+        _journal_kb['kb_dict'] = kb_dict
+
+        return kb_dict
@@ -66,6 +66,23 @@ class SearchMixin(object):
             **kwargs
         )
 
+    def get_source_and_version(self, uuid, **kwargs):
+        """Get source and version from a given uuid.
+
+        The version is the revision of the record when it was indexed.
+
+        :param uuid: uuid of document to be retrieved.
+        :type uuid: UUID
+        :returns: tuple of the source dict and the version
+        """
+        document = es.get(
+            index=self.Meta.index,
+            doc_type=self.Meta.doc_types,
+            id=uuid,
+            **kwargs
+        )
+        return document['_source'], document['_version']
+
     def mget(self, uuids, **kwargs):
         """Get source from a list of uuids.
 
@@ -39,10 +39,10 @@ from werkzeug.urls import url_decode
 from inspire_utils.date import format_date as _format_date
 from inspire_utils.dedupers import dedupe_list
 from inspirehep.modules.records.wrappers import LiteratureRecord
-from inspirehep.modules.search import InstitutionsSearch, LiteratureSearch
 from inspirehep.utils.jinja2 import render_template_to_string
 from inspirehep.utils.template import render_macro_from_template
 
+from .lookups import get_lookup
 from .views import blueprint
 
 
@@ -221,9 +221,7 @@ def proceedings_link(record):
     if not cnum:
         return out
 
-    records = LiteratureSearch().query_from_iq(
-        'cnum:%s and 980__a:proceedings' % cnum
-    ).execute()
+    records = get_lookup('proceedings', cnum)
 
     if len(records):
         if len(records) > 1:
@@ -312,9 +310,7 @@ def link_to_hep_affiliation(record):
     except KeyError:
         return ''
 
-    records = InstitutionsSearch().query_from_iq(
-        'affiliation:%s' % icn
-    ).execute()
+    records = get_lookup('hep_affiliation', icn)
     results = records.hits.total
 
     if results:
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Request-scoped memo of the ES lookups done by Jinja filters.
+
+Some filters need to query Elasticsearch while a template is being
+rendered. They run those lookups with :func:`get_lookup`, which stores the
+responses in a memo that lives as long as the request, so that a template
+rendering the same filter many times only hits Elasticsearch once per value.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+from collections import Hashable
+
+from flask import _request_ctx_stack
+
+from inspirehep.modules.search import InstitutionsSearch, LiteratureSearch
+
+
+def proceedings_search(cnum):
+    """Search for the proceedings of the conference with the given CNUM."""
+    return LiteratureSearch().query_from_iq(
+        'cnum:%s and 980__a:proceedings' % cnum
+    )
+
+
+def hep_affiliation_search(icn):
+    """Search for the papers affiliated with the institution with given ICN."""
+    return InstitutionsSearch().query_from_iq(
+        'affiliation:%s' % icn
+    )
+
+
+LOOKUPS = {
+    'proceedings': proceedings_search,
+    'hep_affiliation': hep_affiliation_search,
+}
+
+
+def _get_memo():
+    # Stored on the request context rather than on ``g``, which belongs to
+    # the application context and can outlive a single request.
+    request_ctx = _request_ctx_stack.top
+    if request_ctx is None:
+        return None
+
+    if not hasattr(request_ctx, 'inspirehep_theme_lookups'):
+        request_ctx.inspirehep_theme_lookups = {}
+
+    return request_ctx.inspirehep_theme_lookups
+
+
+def get_lookup(name, value):
+    """Return the response of a lookup, running it on a miss of the memo.
+
+    :param name: name of the lookup, a key of ``LOOKUPS``.
+    :type name: string
+    :param value: value to look up.
+    :returns: the Elasticsearch DSL response.
+    """
+    memo = _get_memo()
+    if not isinstance(value, Hashable):
+        memo = None
+
+    if memo is not None and (name, value) in memo:
+        return memo[(name, value)]
+
+    response = LOOKUPS[name](value).execute()
+    if memo is not None:
+        memo[(name, value)] = response
+
+    return response
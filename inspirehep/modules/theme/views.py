@@ -438,9 +438,9 @@ def ajax_references():
     pid_type = get_pid_type_from_endpoint(endpoint)
     pid = PersistentIdentifier.get(pid_type, recid)
 
-    record = LiteratureSearch().get_source(pid.object_uuid)
+    record, version = LiteratureSearch().get_source_and_version(pid.object_uuid)
 
-    return jsonify({'data': get_and_format_references(record)})
+    return jsonify({'data': get_and_format_references(record, version)})
 
 
 @blueprint.route('/ajax/citations', methods=['GET'])
@@ -26,13 +26,17 @@ from __future__ import absolute_import, division, print_function
 
 import click
 import datetime
-from sqlalchemy import or_
+from sqlalchemy import or_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
 
 from flask.cli import with_appcontext
 from invenio_db import db
 from invenio_search import current_search
 from invenio_workflows import workflow_object_class, ObjectStatus
 from invenio_workflows.models import WorkflowObjectModel
+from invenio_workflows.tasks import resume
+
+from inspirehep.modules.workflows.metrics import get_step_metrics_report
 
 
 TABLES = [
@@ -92,28 +96,59 @@ def purge(yes_i_know):
     is_flag=True,
     help="Use this option to restart the workflows from the first step."
 )
+@click.option(
+    '--batch-size',
+    '-b',
+    type=int,
+    default=100,
+    show_default=True,
+    help="Number of workflows updated per transaction before being sent to the workers.",
+)
+@click.option(
+    '--dry-run',
+    is_flag=True,
+    help="Only count the workflows that would be restarted.",
+)
 @with_appcontext
-def restart_by_error(error_message, from_beginning):
-    """Restart all the workflows in ERROR matching the given error message."""
-    errors = WorkflowObjectModel.query.filter_by(status=ObjectStatus.ERROR).all()
-    to_restart = [e.id for e in errors if error_message in e.extra_data['_error_msg']]
+def restart_by_error(error_message, from_beginning, batch_size, dry_run):
+    """Restart all the workflows in ERROR matching the given error message.
+
+    The workflows are restarted by the workers, each batch of them is sent
+    after its status was updated in the DB.
+    """
+    query = WorkflowObjectModel.query.with_entities(WorkflowObjectModel.id).filter(
+        WorkflowObjectModel.status == ObjectStatus.ERROR,
+        type_coerce(WorkflowObjectModel.extra_data, JSONB)['_error_msg'].astext.contains(
+            error_message, autoescape=True
+        ),
+    ).order_by(WorkflowObjectModel.id)
 
     click.secho("Found {} workflows to restart from {}".format(
-        len(to_restart),
+        query.count(),
         "first step" if from_beginning else "current step"
     ))
-
-    for wf_id in to_restart:
-        obj = workflow_object_class.get(wf_id)
-        if from_beginning:
-            obj.callback_pos = [0]
-            obj.status = ObjectStatus.INITIAL
-        else:
-            obj.status = ObjectStatus.RUNNING
-        obj.save()
+    if dry_run:
+        return
+
+    if from_beginning:
+        values = {
+            WorkflowObjectModel.status: ObjectStatus.INITIAL,
+            WorkflowObjectModel.callback_pos: [0],
+        }
+    else:
+        values = {WorkflowObjectModel.status: ObjectStatus.RUNNING}
+
+    to_restart = [wf_id for (wf_id,) in query.yield_per(batch_size)]
+    for start in range(0, len(to_restart), batch_size):
+        batch = to_restart[start:start + batch_size]
+        WorkflowObjectModel.query.filter(WorkflowObjectModel.id.in_(batch)).update(
+            values, synchronize_session=False
+        )
         db.session.commit()
-        obj.continue_workflow('restart_task', True)
-        click.secho("Workflow {} restarted successfully".format(wf_id))
+
+        for wf_id in batch:
+            resume.delay(wf_id, 'restart_task')
+        click.secho("Restarting workflows {}".format(', '.join(str(wf_id) for wf_id in batch)))
 
 
 @workflows.command(help="Deletes edit_article workflows in WAITING state older than the number of hours given.")
@@ -145,3 +180,47 @@ def delete_edit_article_older_than(hours):
         wf.delete()
         db.session.commit()
         click.secho("Workflow {} deleted successfully".format(wf.id))
+
+
+@workflows.command()
+@click.option(
+    "--hours",
+    "-h",
+    help="Number of hours",
+    type=int,
+    default=24,
+    show_default=True,
+)
+@click.option(
+    "--workflow",
+    "-w",
+    "workflow_name",
+    help="Only report the steps of this workflow, e.g. HEP.",
+)
+@with_appcontext
+def step_metrics(hours, workflow_name):
+    """Report the duration of the workflow steps run in the last hours."""
+    since = datetime.datetime.utcnow() - datetime.timedelta(hours=hours)
+    report = get_step_metrics_report(since, workflow_name)
+    if not report:
+        click.secho("No workflow steps ran in the last {} hours".format(hours))
+        return
+
+    row = "{step:<50} {count:>8} {errors:>8} {p50:>10} {p95:>10} {total:>12} {data_size_delta:>12}"
+    click.secho(row.format(
+        step="step",
+        count="runs",
+        errors="errors",
+        p50="p50 (ms)",
+        p95="p95 (ms)",
+        total="total (ms)",
+        data_size_delta="data delta",
+    ))
+    for stats in report:
+        click.secho(row.format(**dict(
+            stats,
+            p50=int(stats['p50']),
+            p95=int(stats['p95']),
+            total=int(stats['total']),
+            data_size_delta='' if stats['data_size_delta'] is None else stats['data_size_delta'],
+        )))
@@ -30,4 +30,41 @@ WORKFLOWS_REFEXTRACT_TIMEOUT = 10 * 60
 
 WORKFLOWS_PLOTEXTRACT_TIMEOUT = 5 * 60
 """Time in seconds a plotextract task is allowed to run before it is killed."""
+
+WORKFLOWS_PLOTEXTRACT_CONVERSION_TIMEOUT = 4 * 60
+"""Time in seconds allowed for converting the figures of a tarball.
+
+The figures converted by then are kept, the others are left out.
+"""
+
+WORKFLOWS_PLOTEXTRACT_PROCESSES = 4
+"""Maximum number of processes converting the figures of a tarball."""
+
+WORKFLOWS_PLOTEXTRACT_MEMORY_LIMIT = 2 * 1024 * 1024 * 1024
+"""Maximum address space in bytes of each process converting figures.
+
+The limit applies to each process, so converting the figures of a tarball
+can use up to ``WORKFLOWS_PLOTEXTRACT_PROCESSES`` times as much memory.
+"""
+
 WORKFLOWS_MAX_AUTHORS_COUNT_FOR_GROBID_EXTRACTION = 50
+
+WORKFLOWS_HOLDINGPEN_INDEX_INTERVAL = 60
+"""Minimum time in seconds between two updates of the Holding Pen index of a
+running workflow by ``save_workflow``.
+
+The changes saved in between are indexed by the next update, at the latest
+when the engine saves the workflow at the end of the run.
+"""
+
+WORKFLOWS_STEP_METRICS_MEASURE_DATA_SIZE = False
+"""Record how much each workflow step changes the size of ``obj.data``.
+
+This serializes ``obj.data`` twice per step, so enable it only while
+profiling the workflows.
+"""
+
+WORKFLOWS_STEP_METRICS_RUNS = 10
+"""Number of the last runs of each step kept in the extra data of a workflow
+object for ``inspirehep workflows step_metrics``.
+"""
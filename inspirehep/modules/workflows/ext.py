@@ -45,6 +45,9 @@ class InspireWorkflows(object):
         app.extensions['inspire-workflows'] = self
         app.cli.add_command(workflows)
 
+        # Register the receivers:
+        from inspirehep.modules.workflows import receivers  # noqa: F401
+
     def init_config(self, app):
         for k in dir(config):
             if k.startswith('WORKFLOWS_'):
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Metrics of the steps run by the workflow engines.
+
+Every step of the workflows is wrapped with :func:`with_step_metrics` by
+:func:`instrument_workflow`. The duration of the step, the change in size of
+``obj.data`` and the exception it raised are sent to the application metrics.
+``obj.extra_data['_step_metrics']`` keeps for each step the number of runs on
+that object and its last ``WORKFLOWS_STEP_METRICS_RUNS`` runs, from which
+:func:`get_step_metrics_report` computes the statistics of each step over the
+runs started in a time window.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import six
+from flask import current_app
+from fqn_decorators.decorators import get_fqn
+from invenio_workflows.models import Workflow, WorkflowObjectModel
+from sqlalchemy import type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from time_execution.decorator import SHORT_HOSTNAME, write_metric
+from workflow.errors import (
+    AbortProcessing,
+    HaltProcessing,
+    StopProcessing,
+    WorkflowTransition,
+)
+
+STEP_METRICS_KEY = '_step_metrics'
+
+RECORDED_TRANSITIONS = (AbortProcessing, HaltProcessing, StopProcessing)
+"""Transitions recorded as the outcome of a step.
+
+The other transitions are the jumps of the control flow patterns (``IF``,
+``IF_ELSE``, ``BREAK``...), which are not steps on their own.
+"""
+
+
+def _get_data_size(obj):
+    return len(json.dumps(obj.data))
+
+
+def _record_step_metric(obj, eng, metric):
+    write_metric(
+        'inspirehep.workflows.step',
+        workflow=getattr(eng, 'name', None),
+        hostname=SHORT_HOSTNAME,
+        **metric
+    )
+
+    summary = obj.extra_data.setdefault(STEP_METRICS_KEY, {})
+    step = summary.setdefault(metric['step'], {'count': 0})
+    step['count'] += 1
+    runs = step.setdefault('runs', [])
+    runs.append([
+        metric['started'],
+        metric['value'],
+        int('exc_fqn' in metric),
+        metric.get('data_size_delta'),
+    ])
+    del runs[:-current_app.config['WORKFLOWS_STEP_METRICS_RUNS']]
+
+
+def with_step_metrics(task):
+    """Decorator recording the metrics of a workflow step."""
+    @six.wraps(task)
+    def _task(obj, eng):
+        measure_data_size = current_app.config['WORKFLOWS_STEP_METRICS_MEASURE_DATA_SIZE']
+        data_size = _get_data_size(obj) if measure_data_size else None
+        metric = {
+            'step': getattr(task, '__name__', repr(task)),
+            'started': datetime.utcnow().isoformat(),
+        }
+        start_time = time.time()
+
+        try:
+            return task(obj, eng)
+        except RECORDED_TRANSITIONS as exc:
+            metric['transition'] = exc.__class__.__name__
+            raise
+        except WorkflowTransition:
+            metric = None
+            raise
+        except Exception as exc:
+            metric['exc_fqn'] = get_fqn(exc.__class__)
+            raise
+        finally:
+            if metric is not None:
+                metric['value'] = round((time.time() - start_time) * 1000, 3)
+                if data_size is not None:
+                    metric['data_size_delta'] = _get_data_size(obj) - data_size
+                _record_step_metric(obj, eng, metric)
+
+    return _task
+
+
+def instrument_workflow(tasks):
+    """Wrap all the steps of a workflow definition with :func:`with_step_metrics`.
+
+    Args:
+        tasks: a workflow definition, that is a list of steps and of nested
+            lists of steps.
+
+    Returns:
+        a copy of the workflow definition with the same structure.
+    """
+    if isinstance(tasks, (list, tuple)):
+        return type(tasks)(instrument_workflow(task) for task in tasks)
+    if callable(tasks):
+        return with_step_metrics(tasks)
+    return tasks
+
+
+def _percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    index = int(math.ceil(percent / 100 * len(values))) - 1
+    return values[max(index, 0)]
+
+
+def aggregate_step_metrics(runs):
+    """Compute the statistics of each step from its runs.
+
+    Args:
+        runs (iterable): the runs of the steps, as yielded by
+            :func:`get_step_metrics`.
+
+    Returns:
+        list: for each step, the number of runs, of errors, the median, 95th
+        percentile and total duration in milliseconds of a run, and the mean
+        change of the size of the data per run, sorted by decreasing total
+        duration.
+    """
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    data_size_deltas = defaultdict(list)
+    for run in runs:
+        durations[run['step']].append(run['value'])
+        errors[run['step']] += run['error']
+        if run['data_size_delta'] is not None:
+            data_size_deltas[run['step']].append(run['data_size_delta'])
+
+    report = []
+    for step, values in durations.items():
+        values.sort()
+        deltas = data_size_deltas[step]
+        report.append({
+            'step': step,
+            'count': len(values),
+            'errors': errors[step],
+            'p50': _percentile(values, 50),
+            'p95': _percentile(values, 95),
+            'total': sum(values),
+            'data_size_delta': sum(deltas) // len(deltas) if deltas else None,
+        })
+
+    return sorted(report, key=lambda stats: stats['total'], reverse=True)
+
+
+def get_step_metrics(since, workflow_name=None):
+    """Return the runs of the steps started after the given date.
+
+    Only the last ``WORKFLOWS_STEP_METRICS_RUNS`` runs of a step on each
+    workflow object are kept, so the earlier runs of a step repeated on the
+    same object are missing; the application metrics have all of them.
+
+    Args:
+        since (datetime.datetime): the start of the time window, in UTC.
+        workflow_name (str): if given, only the steps of that workflow.
+
+    Yields:
+        dict: a run of a step on a workflow object.
+    """
+    step_metrics = type_coerce(WorkflowObjectModel.extra_data, JSONB)[STEP_METRICS_KEY]
+    query = WorkflowObjectModel.query.with_entities(step_metrics).filter(
+        WorkflowObjectModel.modified >= since,
+        step_metrics.isnot(None),
+    )
+    if workflow_name:
+        query = query.filter(WorkflowObjectModel.workflow.has(Workflow.name == workflow_name))
+
+    since = since.isoformat()
+    for (summary,) in query.yield_per(1000):
+        for step, metric in six.iteritems(summary or {}):
+            for started, value, error, data_size_delta in metric.get('runs', []):
+                if started >= since:
+                    yield {
+                        'step': step,
+                        'started': started,
+                        'value': value,
+                        'error': error,
+                        'data_size_delta': data_size_delta,
+                    }
+
+
+def get_step_metrics_report(since, workflow_name=None):
+    """Return the statistics of the steps run after the given date."""
+    return aggregate_step_metrics(get_step_metrics(since, workflow_name))
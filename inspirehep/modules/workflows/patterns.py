@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Workflow control flow patterns, in addition to the ``workflow`` ones."""
+
+from __future__ import absolute_import, division, print_function
+
+import sys
+from copy import deepcopy
+from functools import wraps
+from multiprocessing.pool import ThreadPool
+
+from flask import current_app
+from six import reraise
+
+
+class _ParallelTaskObject(object):
+    """Proxy of a workflow object given to a task run by ``PARALLEL``.
+
+    It shares everything with the proxied object, except ``extra_data``
+    which is a private copy, so that tasks running concurrently don't see
+    each other's changes.
+    """
+
+    def __init__(self, obj):
+        self.__dict__['_obj'] = obj
+        self.__dict__['extra_data'] = deepcopy(obj.extra_data)
+
+    def __getattr__(self, name):
+        return getattr(self._obj, name)
+
+    def __setattr__(self, name, value):
+        if name == 'extra_data':
+            self.__dict__['extra_data'] = value
+        else:
+            setattr(self._obj, name, value)
+
+
+def _merge_extra_data(extra_data, original, changed):
+    """Apply to ``extra_data`` the top level keys that changed."""
+    for key, value in changed.items():
+        if key not in original or original[key] != value:
+            extra_data[key] = value
+
+    for key in original:
+        if key not in changed:
+            extra_data.pop(key, None)
+
+
+def WHEN(condition, task):
+    """Run ``task`` only if ``condition`` is true.
+
+    Unlike ``IF`` it returns a single task, so that it can be used inside
+    ``PARALLEL``.
+    """
+    @wraps(task)
+    def _when(obj, eng):
+        if condition(obj, eng):
+            return task(obj, eng)
+
+    return _when
+
+
+def PARALLEL(tasks):
+    """Run independent tasks concurrently in a pool of threads.
+
+    Meant for tasks which spend their time waiting on network requests and
+    which only read ``obj.data``. Each task works on its own copy of
+    ``obj.extra_data``. When all of them are done, the top level keys they
+    changed are merged back in the order of ``tasks``, so the result is the
+    same as running them one after the other.
+
+    If some tasks fail, the changes of the successful ones are still merged
+    and the error of the first failed task in ``tasks`` is raised.
+
+    Args:
+        tasks (list): workflow tasks, i.e. callables taking ``obj`` and
+            ``eng``. Control flow patterns returning lists, like ``IF``,
+            can't be used, see :func:`WHEN`.
+
+    Returns:
+        callable: the workflow task.
+    """
+    def _parallel(obj, eng):
+        app = current_app._get_current_object()
+
+        def _run_task(task_and_obj):
+            task, task_obj = task_and_obj
+            with app.app_context():
+                try:
+                    task(task_obj, eng)
+                except Exception:
+                    return sys.exc_info()
+
+        task_objs = [_ParallelTaskObject(obj) for _ in tasks]
+        original_extra_data = deepcopy(obj.extra_data)
+
+        pool = ThreadPool(len(tasks))
+        try:
+            errors = pool.map(_run_task, zip(tasks, task_objs))
+        finally:
+            pool.close()
+            pool.join()
+
+        for task_obj, error in zip(task_objs, errors):
+            if error is None:
+                _merge_extra_data(
+                    obj.extra_data,
+                    original_extra_data,
+                    task_obj.extra_data,
+                )
+
+        for error in errors:
+            if error is not None:
+                reraise(*error)
+
+    _parallel.__name__ = 'PARALLEL({})'.format(
+        ', '.join(getattr(task, '__name__', repr(task)) for task in tasks)
+    )
+    return _parallel
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Workflows receivers."""
+
+from __future__ import absolute_import, division, print_function
+
+from invenio_workflows.signals import workflow_object_after_save
+from workflow.signals import workflow_finished, workflow_halted
+
+from inspirehep.modules.workflows.utils import mark_workflow_saved
+from inspirehep.modules.workflows.utils.archives import close_source_archives
+
+
+@workflow_finished.connect
+@workflow_halted.connect
+def remove_source_archives(sender, *args, **kwargs):
+    """Remove the source tarballs extracted while running a workflow.
+
+    The engine also sends ``workflow_halted`` before re-raising an
+    exception of a step, so the tarballs are removed when a workflow fails.
+    """
+    close_source_archives()
+
+
+@workflow_object_after_save.connect
+def record_saved_workflow(sender, *args, **kwargs):
+    """Record the state of a workflow object when it is saved."""
+    mark_workflow_saved(sender)
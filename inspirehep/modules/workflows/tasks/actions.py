@@ -29,7 +29,7 @@ import logging
 import re
 from elasticsearch_dsl import Q, MultiSearch, Search
 from invenio_search import current_search_client
-from inspirehep.modules.refextract.tasks import create_journal_kb_dict
+from inspirehep.modules.refextract.tasks import get_journal_kb_dict
 from urlparse import urljoin
 from urllib import quote
 
@@ -48,18 +48,11 @@ from flask import current_app
 from jsonschema.exceptions import ValidationError
 from parsel import Selector
 from six.moves.urllib.parse import urlparse
-from sqlalchemy import (
-    JSON,
-    String,
-    cast,
-    type_coerce,
-)
 from werkzeug import secure_filename
 
 from invenio_db import db
 from invenio_workflows import ObjectStatus, workflow_object_class, start
 from invenio_workflows.errors import WorkflowsError
-from invenio_records.models import RecordMetadata
 from inspire_json_merger.api import merge
 from inspire_json_merger.config import GrobidOnArxivAuthorsOperations
 from inspire_schemas.builders import LiteratureBuilder
@@ -75,11 +68,12 @@ from inspirehep.modules.workflows.tasks.refextract import (
     extract_references_from_pdf_url,
     extract_references_from_raw_refs,
     extract_references_from_pdf,
+    extract_references_from_pdf_and_text,
     extract_references_from_text,
     extract_references_from_text_data,
 )
 from inspirehep.modules.refextract.matcher import match_references
-from inspirehep.modules.search import InstitutionsSearch, LiteratureSearch
+from inspirehep.modules.search import LiteratureSearch
 from inspirehep.modules.workflows.tasks.upload import create_error
 from inspirehep.modules.workflows.errors import BadGatewayError, CannotFindProperSubgroup, MissingRecordControlNumber
 from inspirehep.modules.workflows.utils import (
@@ -90,10 +84,13 @@ from inspirehep.modules.workflows.utils import (
     get_resolve_validation_callback_url,
     get_validation_errors,
     log_workflows_action,
+    save_workflow_changes,
     with_debug_logging, check_mark, set_mark, get_mark, get_record_from_hep,
 )
 from inspirehep.modules.workflows.utils.grobid_authors_parser import GrobidAuthors
-from inspirehep.utils.normalizers import normalize_journal_title
+from inspirehep.utils.institutions import get_institutions_refs
+from inspirehep.utils.normalizers import get_journal_titles_index
+from inspirehep.utils.proxies import http_clients
 from inspirehep.utils.url import is_pdf_link
 
 
@@ -427,6 +424,9 @@ def download_documents(obj, eng):
     for document in documents:
         filename = document['key']
         url = document['url']
+        if filename in obj.files and url == '/api/files/{bucket}/{key}'.format(
+                bucket=obj.files[filename].bucket_id, key=quote(filename)):
+            continue
         scheme = urlparse(url).scheme
         if scheme == 'file':
             downloaded = copy_file_to_workflow(obj, filename, url)
@@ -446,14 +446,14 @@ def download_documents(obj, eng):
     save_workflow(obj, eng)
 
 
-@backoff.on_exception(backoff.expo, (BadGatewayError, requests.exceptions.ConnectionError), base=4, max_tries=5)
+@backoff.on_exception(backoff.expo, BadGatewayError, base=4, max_tries=5)
 def match_references_hep(references):
     headers = {
         "content-type": "application/json",
     }
     data = {'references': references}
     inspirehep_url = current_app.config.get("INSPIREHEP_URL")
-    response = requests.post(
+    response = http_clients.get('hep').post(
         "{inspirehep_url}/api/matcher/linked_references/".format(
             inspirehep_url=inspirehep_url,
         ),
@@ -476,6 +476,7 @@ def refextract(obj, eng):
     Runs ``refextract`` on both the PDF attached to the workflow and the
     references provided by the submitter, if any, then chooses the one
     that generated the most and attaches them to the workflow object.
+    When both are extracted locally, the two extractions run concurrently.
 
     Args:
         obj: a workflow object.
@@ -493,33 +494,45 @@ def refextract(obj, eng):
 
     matched_pdf_references, matched_text_references = [], []
     source = LiteratureReader(obj.data).source
-    journal_kb_dict = create_journal_kb_dict()
+    journal_kb_dict = get_journal_kb_dict()
 
     url = get_document_url_for_reference_extraction(obj)
-    if current_app.config.get("FEATURE_FLAG_ENABLE_REFEXTRACT_SERVICE") and url:
-        pdf_references = dedupe_list(
-            extract_references_from_pdf_url(
-                url, source=source, custom_kbs_file=journal_kb_dict
+    text = get_value(obj.extra_data, 'formdata.references')
+    if current_app.config.get("FEATURE_FLAG_ENABLE_REFEXTRACT_SERVICE"):
+        if url:
+            pdf_references = dedupe_list(
+                extract_references_from_pdf_url(
+                    url, source=source, custom_kbs_file=journal_kb_dict
+                )
             )
-        )
-        matched_pdf_references = match_references_based_on_flag(pdf_references)
+            matched_pdf_references = match_references_based_on_flag(pdf_references)
+        else:
+            with get_document_in_workflow(obj) as tmp_document:
+                if tmp_document:
+                    pdf_references = dedupe_list(extract_references_from_pdf(tmp_document, source))
+                    matched_pdf_references = match_references_based_on_flag(pdf_references)
+
+        if text:
+            text_references = dedupe_list(
+                extract_references_from_text_data(
+                    text, source=source, custom_kbs_file=journal_kb_dict
+                )
+            )
+            matched_text_references = match_references_based_on_flag(text_references)
     else:
         with get_document_in_workflow(obj) as tmp_document:
-            if tmp_document:
-                pdf_references = dedupe_list(extract_references_from_pdf(tmp_document, source))
-                matched_pdf_references = match_references_based_on_flag(pdf_references)
-
-    text = get_value(obj.extra_data, 'formdata.references')
-    if text and current_app.config.get("FEATURE_FLAG_ENABLE_REFEXTRACT_SERVICE"):
-        text_references = dedupe_list(
-            extract_references_from_text_data(
-                text, source=source, custom_kbs_file=journal_kb_dict
-            )
-        )
-        matched_text_references = match_references_based_on_flag(text_references)
-    elif text:
-        text_references = dedupe_list(extract_references_from_text(text, source))
-        matched_text_references = match_references_based_on_flag(text_references)
+            if tmp_document and text:
+                pdf_references, text_references = extract_references_from_pdf_and_text(
+                    tmp_document, text, source)
+            elif tmp_document:
+                pdf_references = extract_references_from_pdf(tmp_document, source)
+            elif text:
+                text_references = extract_references_from_text(text, source)
+
+        if tmp_document:
+            matched_pdf_references = match_references_based_on_flag(dedupe_list(pdf_references))
+        if text:
+            matched_text_references = match_references_based_on_flag(dedupe_list(text_references))
 
     if not matched_pdf_references and not matched_text_references:
         obj.log.info('No references extracted.')
@@ -549,6 +562,10 @@ def save_workflow(obj, eng):
     """Save the current workflow.
 
     Saves the changes applied to the given workflow object in the database.
+    Nothing is written if the object did not change since it was last saved,
+    and its Holding Pen index is updated at most every
+    ``WORKFLOWS_HOLDINGPEN_INDEX_INTERVAL`` seconds, see
+    :func:`inspirehep.modules.workflows.utils.save_workflow_changes`.
 
     Note:
         The ``save`` function only indexes the current workflow. For this
@@ -564,7 +581,7 @@ def save_workflow(obj, eng):
     Returns:
         None
     """
-    obj.save()
+    save_workflow_changes(obj)
     db.session.commit()
 
 
@@ -611,11 +628,9 @@ def normalize_journal_titles(obj, eng):
     contained in `publication_info` and for each `publication_info.journal_title` in references.
 
     Note:
-        The DB is queried in order to get the `$ref` of each journal and add it in
-        `journal_record` as well as inspire categories.
-
-    TODO:
-        Refactor: it must be checked that `normalize_journal_title` is appropriate.
+        The titles, the `$ref` of each journal added in `journal_record` and the
+        inspire categories are looked up in the in-memory index of the Journals
+        records, see :func:`inspirehep.utils.normalizers.get_journal_titles_index`.
 
     Args:
         obj: a workflow object.
@@ -624,34 +639,43 @@ def normalize_journal_titles(obj, eng):
     Returns:
        None
     """
+    journal_titles_index = get_journal_titles_index()
     publications = obj.data.get('publication_info', [])
 
     for publication in publications:
-        normalize_journal_title_entry(obj, publication, add_inspire_categories=True)
+        normalize_journal_title_entry(
+            obj,
+            publication,
+            add_inspire_categories=True,
+            journal_titles_index=journal_titles_index,
+        )
 
     references = obj.data.get("references", [])
     for reference in references:
         publication_info = get_value(reference, 'reference.publication_info')
         if not publication_info:
             continue
-        normalize_journal_title_entry(obj, publication_info)
+        normalize_journal_title_entry(
+            obj,
+            publication_info,
+            journal_titles_index=journal_titles_index,
+        )
 
     if obj.extra_data.get('journal_inspire_categories'):
         obj.extra_data['journal_inspire_categories'] = dedupe_list(obj.extra_data['journal_inspire_categories'])
 
 
-def normalize_journal_title_entry(obj, publication_info, add_inspire_categories=False):
+def normalize_journal_title_entry(obj, publication_info, add_inspire_categories=False, journal_titles_index=None):
     if 'journal_title' not in publication_info:
         return
 
-    normalized_title = normalize_journal_title(publication_info['journal_title'])
+    if journal_titles_index is None:
+        journal_titles_index = get_journal_titles_index()
+
+    normalized_title = journal_titles_index.normalize(publication_info['journal_title'])
     publication_info['journal_title'] = normalized_title
 
-    ref_query = RecordMetadata.query.filter(
-        RecordMetadata.json['_collections'].op('?')('Journals')).filter(
-        cast(RecordMetadata.json['short_title'], String) == type_coerce(normalized_title, JSON))
-    result = db.session.execute(ref_query).fetchone()
-    journal_data = result.records_metadata_json if result else None
+    journal_data = journal_titles_index.get_journal(normalized_title)
 
     if not journal_data:
         return
@@ -995,27 +1019,12 @@ def normalize_collaborations(obj, eng):
 
 
 def _assign_institution(matched_affiliation):
-    query = Q("match", legacy_ICN=matched_affiliation["value"])
-    result = InstitutionsSearch().query(query).params(size=1).execute()
-    if result:
-        matched_affiliation["record"] = result.hits[0].to_dict()["self"]
+    ref = get_institutions_refs([matched_affiliation["value"]])[matched_affiliation["value"]]
+    if ref:
+        matched_affiliation["record"] = ref
         return matched_affiliation
 
 
-def _assign_institution_reference_to_affiliations(author_affiliations, already_matched_affiliations_refs):
-    for affiliation in author_affiliations:
-        if "record" in affiliation:
-            continue
-        if affiliation['value'] in already_matched_affiliations_refs:
-            affiliation['record'] = already_matched_affiliations_refs[affiliation['value']]
-        else:
-            complete_affiliation = _assign_institution(
-                affiliation
-            )
-            if complete_affiliation:
-                already_matched_affiliations_refs[complete_affiliation['value']] = complete_affiliation['record']
-
-
 def normalize_author_affiliations(obj, eng):
     search = LiteratureSearch()
     normalized_affiliations, ambiguous_affiliations = normalize_affiliations(
@@ -1047,11 +1056,21 @@ def normalize_author_affiliations(obj, eng):
 
 
 def link_institutions_with_affiliations(obj, eng):
-    affiliations = {}
-    for author in obj.data.get("authors", []):
-        author_affiliations = author.get("affiliations", [])
-        if author_affiliations:
-            _assign_institution_reference_to_affiliations(author_affiliations, affiliations)
+    affiliations = [
+        affiliation
+        for author in obj.data.get("authors", [])
+        for affiliation in author.get("affiliations", [])
+        if "record" not in affiliation and affiliation.get("value")
+    ]
+    if not affiliations:
+        return obj
+
+    institutions_refs = get_institutions_refs(
+        [affiliation["value"] for affiliation in affiliations]
+    )
+    for affiliation in affiliations:
+        if institutions_refs[affiliation["value"]]:
+            affiliation["record"] = institutions_refs[affiliation["value"]]
 
     return obj
 
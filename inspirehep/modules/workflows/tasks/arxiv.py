@@ -29,27 +29,27 @@ import re
 import itertools
 import backoff
 import requests
-from backports.tempfile import TemporaryDirectory
 from flask import current_app
 from requests import HTTPError
-from wand.exceptions import DelegateError
+from six.moves.urllib.parse import quote
 from wand.resource import limits
 from werkzeug import secure_filename
 from inspire_schemas.builders import LiteratureBuilder
 from inspire_schemas.readers import LiteratureReader
-from plotextractor.api import process_tarball
-from plotextractor.converter import untar
 from plotextractor.errors import InvalidTarball, NoTexFilesFound
 
 from inspirehep.utils.latex import decode_latex
-from inspirehep.utils.url import is_pdf_link, retrieve_uri
+from inspirehep.utils.proxies import http_clients
 from inspirehep.modules.workflows.errors import DownloadError
 from inspirehep.modules.workflows.utils import (
     download_file_to_workflow,
+    download_pdf_to_workflow,
     ignore_timeout_error,
     timeout_with_config,
     with_debug_logging, set_mark,
 )
+from inspirehep.modules.workflows.utils.archives import get_source_archive
+from inspirehep.modules.workflows.utils.plots import extract_plots
 # import lxml.html
 from parsel import Selector
 
@@ -65,23 +65,23 @@ NO_PDF_ON_ARXIV = 'The author has provided no source to generate PDF, and no PDF
 @backoff.on_exception(backoff.expo, DownloadError, base=4, max_tries=5)
 def populate_arxiv_document(obj, eng):
     arxiv_id = LiteratureReader(obj.data).arxiv_id
+    filename = secure_filename('{0}.pdf'.format(arxiv_id))
 
     for conf_name in ('ARXIV_PDF_URL', 'ARXIV_PDF_URL_ALTERNATIVE'):
         url = current_app.config[conf_name].format(arxiv_id=arxiv_id)
-        is_valid_pdf_link = is_pdf_link(url)
-        if is_valid_pdf_link:
+        downloaded = download_pdf_to_workflow(obj, filename, url, service='arxiv')
+        if downloaded:
             break
         try:
-            if NO_PDF_ON_ARXIV in requests.get(url).content:
+            if NO_PDF_ON_ARXIV in http_clients.get('arxiv').get(url).content:
                 obj.log.info('No PDF is available for %s', arxiv_id)
                 return
         except requests.exceptions.RequestException:
             raise DownloadError("Error accessing url {url}".format(url=url))
 
-    if not is_valid_pdf_link:
+    if not downloaded:
         raise DownloadError("{url} is not serving a PDF file.".format(url=url))
 
-    filename = secure_filename('{0}.pdf'.format(arxiv_id))
     obj.data['documents'] = [
         document for document in obj.data.get('documents', ())
         if document.get('key') != filename
@@ -94,7 +94,8 @@ def populate_arxiv_document(obj, eng):
         hidden=True,
         material='preprint',
         original_url=url,
-        url=url,
+        url='/api/files/{bucket}/{key}'.format(
+            bucket=downloaded.bucket_id, key=quote(filename)),
     )
 
     obj.data = lb.record
@@ -153,58 +154,51 @@ def arxiv_plot_extract(obj, eng):
         obj.log.info('No file named=%s for arxiv_id %s', filename, arxiv_id)
         return
 
-    with TemporaryDirectory(prefix='plot_extract') as scratch_space, \
-            retrieve_uri(tarball.file.uri, outdir=scratch_space) as tarball_file:
-        try:
-            plots = process_tarball(
-                tarball_file,
-                output_directory=scratch_space,
-            )
-        except (InvalidTarball, NoTexFilesFound):
-            obj.log.info(
-                'Invalid tarball %s for arxiv_id %s',
-                tarball.file.uri,
-                arxiv_id,
-            )
-            return
-        except DelegateError as err:
-            obj.log.error(
-                'Error extracting plots for %s. Report and skip.',
-                arxiv_id,
+    try:
+        plots = extract_plots(
+            get_source_archive(tarball.file.uri),
+            timeout=current_app.config['WORKFLOWS_PLOTEXTRACT_CONVERSION_TIMEOUT'],
+            processes=current_app.config['WORKFLOWS_PLOTEXTRACT_PROCESSES'],
+            memory_limit=current_app.config['WORKFLOWS_PLOTEXTRACT_MEMORY_LIMIT'],
+        )
+    except (InvalidTarball, NoTexFilesFound):
+        obj.log.info(
+            'Invalid tarball %s for arxiv_id %s',
+            tarball.file.uri,
+            arxiv_id,
+        )
+        return
+
+    if 'figures' in obj.data:
+        for figure in obj.data['figures']:
+            if figure['key'] in obj.files:
+                del obj.files[figure['key']]
+        del obj.data['figures']
+
+    lb = LiteratureBuilder(source='arxiv', record=obj.data)
+    for index, plot in enumerate(plots):
+        plot_name = os.path.basename(plot.get('url'))
+        key = plot_name
+        if plot_name in obj.files.keys:
+            key = 'w{number}_{name}'.format(
+                number=index,
+                name=plot_name,
             )
-            current_app.logger.exception(err)
-            return
-
-        if 'figures' in obj.data:
-            for figure in obj.data['figures']:
-                if figure['key'] in obj.files:
-                    del obj.files[figure['key']]
-            del obj.data['figures']
-
-        lb = LiteratureBuilder(source='arxiv', record=obj.data)
-        for index, plot in enumerate(plots):
-            plot_name = os.path.basename(plot.get('url'))
-            key = plot_name
-            if plot_name in obj.files.keys:
-                key = 'w{number}_{name}'.format(
-                    number=index,
-                    name=plot_name,
-                )
-            with open(plot.get('url')) as plot_file:
-                obj.files[key] = plot_file
-
-            lb.add_figure(
+        with open(plot.get('url')) as plot_file:
+            obj.files[key] = plot_file
+
+        lb.add_figure(
+            key=key,
+            caption=''.join(plot.get('captions', [])),
+            label=plot.get('label'),
+            material='preprint',
+            url='/api/files/{bucket}/{key}'.format(
+                bucket=obj.files[key].bucket_id,
                 key=key,
-                caption=''.join(plot.get('captions', [])),
-                label=plot.get('label'),
-                material='preprint',
-                url='/api/files/{bucket}/{key}'.format(
-                    bucket=obj.files[key].bucket_id,
-                    key=key,
-                )
             )
+        )
 
-        obj.data = lb.record
+    obj.data = lb.record
 
     if 'figures' in obj.data and len(obj.data['figures']) == 0:
         del obj.data['figures']
@@ -230,42 +224,68 @@ def arxiv_author_list(obj, eng):
         )
         return
 
-    with TemporaryDirectory(prefix='author_list') as scratch_space, \
-            retrieve_uri(tarball.file.uri, outdir=scratch_space) as tarball_file:
-        try:
-            file_list = untar(tarball_file, scratch_space)
-        except InvalidTarball:
-            obj.log.info(
-                'Invalid tarball %s for arxiv_id %s',
-                tarball.file.uri,
-                arxiv_id,
-            )
-            return
+    try:
+        xml_files_list = get_source_archive(tarball.file.uri).get_xml_files()
+    except InvalidTarball:
+        obj.log.info(
+            'Invalid tarball %s for arxiv_id %s',
+            tarball.file.uri,
+            arxiv_id,
+        )
+        return
 
-        obj.log.info('Extracted tarball to: {0}'.format(scratch_space))
-        xml_files_list = [path for path in file_list if path.endswith('.xml')]
-        obj.log.info('Found xmlfiles: {0}'.format(xml_files_list))
+    obj.log.info('Found xmlfiles: {0}'.format(xml_files_list))
 
-        extracted_authors = []
+    extracted_authors = []
 
-        for xml_file in xml_files_list:
-            with open(xml_file, 'r') as xml_file_fd:
-                xml_content = xml_file_fd.read()
-            match = REGEXP_AUTHLIST.findall(xml_content)
-            if match:
-                obj.log.info('Found a match for author extraction')
+    for xml_file in xml_files_list:
+        with open(xml_file, 'r') as xml_file_fd:
+            xml_content = xml_file_fd.read()
+        match = REGEXP_AUTHLIST.findall(xml_content)
+        if match:
+            obj.log.info('Found a match for author extraction')
 
-            extracted_authors.extend(extract_authors_from_xml(xml_content))
+        extracted_authors.extend(extract_authors_from_xml(xml_content))
 
-        if extracted_authors:
-            for author in extracted_authors:
-                author['full_name'] = decode_latex(author['full_name'])
+    if extracted_authors:
+        for author in extracted_authors:
+            author['full_name'] = decode_latex(author['full_name'])
 
-            obj.data['authors'] = extracted_authors
+        obj.data['authors'] = extracted_authors
 
-            set_mark(obj, "authors_xml", True)
-        else:
-            set_mark(obj, "authors_xml", False)
+        set_mark(obj, "authors_xml", True)
+    else:
+        set_mark(obj, "authors_xml", False)
+
+
+def _get_organizations(content):
+    """Index the organizations of an author list by their id.
+
+    The author list is walked only once, instead of looking up the
+    organizations of every affiliation of every author with a new query on
+    the whole document.
+
+    Args:
+        content(parsel.Selector): the author list, without namespaces.
+
+    Returns:
+        dict: for each organization id, a tuple with the ICNs, the values of
+        the ROR and GRID identifiers and their sources, in document order.
+    """
+    organizations = {}
+    for organization in content.xpath('//organizations/Organization[@id]'):
+        icns, identifiers_values, identifiers_sources = organizations.setdefault(
+            organization.xpath('@id').get(), ([], [], []))
+        for org_name in organization.xpath('./orgName'):
+            source = org_name.xpath('@source').get()
+            has_text = bool(org_name.xpath('text()[.!=""]'))
+            if source == 'spiresICN' or source == 'INSPIRE' and has_text:
+                icns.extend(org_name.xpath('text()').getall())
+            elif source == 'ROR' or source == 'GRID' and has_text:
+                identifiers_values.extend(org_name.xpath('text()').getall())
+                identifiers_sources.append(source)
+
+    return organizations
 
 
 def extract_authors_from_xml(xml_content):
@@ -285,6 +305,7 @@ def extract_authors_from_xml(xml_content):
     undefined_value_regex = re.compile("undefined", re.IGNORECASE)
     ror_path_value_regex = re.compile("https://ror.org/*")
     remove_new_line_regex = re.compile(u"\s*\n\s*")
+    organizations = _get_organizations(content)
 
     # Goes through all the authors in the file
     for author in content.xpath("//Person"):
@@ -305,15 +326,15 @@ def extract_authors_from_xml(xml_content):
                 else:
                     ids.append([source, id])
 
-        # Gets all the names for affiliated organizations using the organization ids from author
+        # Gets all the names and identifiers for affiliated organizations using the organization ids from author
         for affiliation in author.xpath("./authorAffiliations/authorAffiliation/@organizationid").getall():
-            orgName = str(content.xpath(u'//organizations/Organization[@id="{}"]/orgName[@source="spiresICN" or @source="INSPIRE" and text()!="" ]/text()'.format(affiliation)).get())
+            icns, identifiers_values, identifiers_sources = organizations.get(affiliation, ([], [], []))
+            orgName = str(icns[0] if icns else None)
             cleaned_org_name = re.sub(remove_new_line_regex, '', orgName)
             if orgName and not re.match(undefined_or_none_value_regex, cleaned_org_name):
                 affiliations.append(cleaned_org_name)
 
-            # Gets all the affiliations_identifiers for affiliated organizations using the organization ids from author
-            for value, source in itertools.izip(content.xpath(u'//organizations/Organization[@id="{}"]/orgName[@source="ROR" or @source="GRID" and text()!=""]/text()'.format(affiliation)).getall(), content.xpath(u'//organizations/Organization[@id="{}"]/orgName[@source="ROR" or @source="GRID" and text()!=""]/@source'.format(affiliation)).getall()):
+            for value, source in itertools.izip(identifiers_values, identifiers_sources):
                 source = re.sub(remove_new_line_regex, '', source)
                 value = re.sub(remove_new_line_regex, '', value)
                 if re.match(undefined_or_none_value_regex, source) or re.match(undefined_or_none_value_regex, value):
@@ -73,7 +73,7 @@ def guess_coreness(obj, eng):
         return
 
     payload = prepare_payload(obj.data)
-    results = json_api_request(predictor_url, payload)
+    results = json_api_request(predictor_url, payload, service='classifier')
 
     scores = results["scores"]
     max_score = scores[results['prediction']]
@@ -77,7 +77,7 @@ def guess_keywords(obj, eng):
         return
     payload = prepare_magpie_payload(obj.data, corpus="keywords")
     try:
-        results = json_api_request(magpie_url, payload)
+        results = json_api_request(magpie_url, payload, service='magpie')
     except requests.exceptions.RequestException:
         results = {}
 
@@ -104,7 +104,7 @@ def guess_categories(obj, eng):
         # Skip task if no API URL set
         return
     payload = prepare_magpie_payload(obj.data, corpus="categories")
-    results = json_api_request(magpie_url, payload)
+    results = json_api_request(magpie_url, payload, service='magpie')
     if results:
         labels = results.get('labels', [])
         categories = filter_magpie_response(labels, limit=0.22)
@@ -129,7 +129,7 @@ def guess_experiments(obj, eng):
         return
 
     payload = prepare_magpie_payload(obj.data, corpus="experiments")
-    results = json_api_request(magpie_url, payload)
+    results = json_api_request(magpie_url, payload, service='magpie')
     if results:
         all_predictions = results.get('labels', [])
         selected_experiments = filter_magpie_response(
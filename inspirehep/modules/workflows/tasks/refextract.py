@@ -27,6 +27,10 @@ from __future__ import absolute_import, division, print_function
 import backoff
 from itertools import chain
 import json
+import os
+import time
+from billiard import Pool
+from billiard.exceptions import WorkerLostError
 from flask import current_app
 from requests.exceptions import RequestException
 import requests
@@ -38,7 +42,7 @@ from inspire_schemas.utils import (
 )
 from inspire_utils.helpers import maybe_int
 from inspire_utils.logging import getStackTraceLogger
-from inspirehep.modules.refextract.tasks import create_journal_kb_dict
+from inspirehep.modules.refextract.tasks import get_journal_kb_dict
 from refextract import (
     extract_journal_reference,
     extract_references_from_file,
@@ -52,6 +56,7 @@ from inspirehep.modules.workflows.utils import (
     timeout_with_config,
 )
 
+from inspirehep.utils.proxies import http_clients
 from inspirehep.utils.references import (
     local_refextract_kbs_path,
     map_refextract_to_schema,
@@ -85,7 +90,7 @@ def extract_journal_info(obj, eng):
     if not obj.data.get('publication_info'):
         return
 
-    kbs_journal_dict = create_journal_kb_dict()
+    kbs_journal_dict = get_journal_kb_dict()
 
     if current_app.config.get("FEATURE_FLAG_ENABLE_REFEXTRACT_SERVICE"):
         publication_infos = obj.data['publication_info']
@@ -93,7 +98,7 @@ def extract_journal_info(obj, eng):
             "content-type": "application/json",
         }
         try:
-            response = requests.post(
+            response = http_clients.get('refextract').post(
                 "{}/extract_journal_info".format(current_app.config["REFEXTRACT_SERVICE_URL"]),
                 headers=refextract_request_headers,
                 data=json.dumps({"publication_infos": publication_infos, "journal_kb_data": kbs_journal_dict})
@@ -172,7 +177,7 @@ def extract_references_from_pdf_url(url, custom_kbs_file, source=None):
     refextract_request_headers = {
         "content-type": "application/json",
     }
-    response = requests.post(
+    response = http_clients.get('refextract').post(
         "{}/extract_references_from_url".format(current_app.config["REFEXTRACT_SERVICE_URL"]),
         headers=refextract_request_headers,
         data=json.dumps({"url": url, "journal_kb_data": custom_kbs_file})
@@ -189,22 +194,34 @@ def extract_references_from_pdf_url(url, custom_kbs_file, source=None):
     return map_refextract_to_schema(extracted_references, source=source)
 
 
+def _extract_references_from_file(filepath, kbs_path):
+    try:
+        return extract_references_from_file(
+            filepath,
+            override_kbs_files=kbs_path,
+            reference_format=u'{title},{volume},{page}',
+        )
+    except UnknownDocumentTypeError as e:
+        if 'xml' in e.message:
+            LOGGER.info('Skipping extracting references for xml file')
+            return []
+        raise
+
+
+def _extract_references_from_string(text, kbs_path):
+    return extract_references_from_string(
+        text,
+        override_kbs_files=kbs_path,
+        reference_format=u'{title},{volume},{page}',
+    )
+
+
 @ignore_timeout_error(return_value=[])
 @timeout_with_config('WORKFLOWS_REFEXTRACT_TIMEOUT')
 def extract_references_from_pdf(filepath, source=None, custom_kbs_file=None):
     """Extract references from PDF and return in INSPIRE format."""
     with local_refextract_kbs_path() as kbs_path:
-        try:
-            extracted_references = extract_references_from_file(
-                filepath,
-                override_kbs_files=kbs_path,
-                reference_format=u'{title},{volume},{page}',
-            )
-        except UnknownDocumentTypeError as e:
-            if 'xml' in e.message:
-                LOGGER.info('Skipping extracting references for xml file')
-                return []
-            raise
+        extracted_references = _extract_references_from_file(filepath, kbs_path)
 
     return map_refextract_to_schema(extracted_references, source=source)
 
@@ -214,15 +231,79 @@ def extract_references_from_pdf(filepath, source=None, custom_kbs_file=None):
 def extract_references_from_text(text, source=None, custom_kbs_file=None):
     """Extract references from text and return in INSPIRE format."""
     with local_refextract_kbs_path() as kbs_path:
-        extracted_references = extract_references_from_string(
-            text,
-            override_kbs_files=kbs_path,
-            reference_format=u'{title},{volume},{page}',
-        )
+        extracted_references = _extract_references_from_string(text, kbs_path)
 
     return map_refextract_to_schema(extracted_references, source=source)
 
 
+_refextract_pool = {'pid': None, 'pool': None}
+
+
+def _get_refextract_pool():
+    """Return the pool of two processes of the current process.
+
+    The pool is started on first use and kept, so that its start-up cost is
+    paid once per worker and not once per paper.
+    """
+    if _refextract_pool['pid'] != os.getpid():
+        _refextract_pool['pool'] = Pool(2)
+        _refextract_pool['pid'] = os.getpid()
+    return _refextract_pool['pool']
+
+
+def _reset_refextract_pool():
+    pool = _refextract_pool['pool']
+    _refextract_pool['pid'] = _refextract_pool['pool'] = None
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+
+
+def extract_references_from_pdf_and_text(filepath, text, source=None):
+    """Extract references from PDF and from text concurrently.
+
+    Same as :func:`extract_references_from_pdf` and
+    :func:`extract_references_from_text`, except that both extractions run
+    at the same time in a long-lived pool of two processes, and share a
+    single ``WORKFLOWS_REFEXTRACT_TIMEOUT``. An extraction which does not
+    finish in time, or whose process is lost, gives no references, and the
+    pool is then replaced so that no process is left busy with it.
+
+    Returns:
+        Tuple[List[dict], List[dict]]: the references extracted from the PDF
+        and the ones extracted from the text, in INSPIRE format.
+    """
+    deadline = time.time() + current_app.config['WORKFLOWS_REFEXTRACT_TIMEOUT']
+    with local_refextract_kbs_path() as kbs_path:
+        pool = _get_refextract_pool()
+        results = [
+            ('PDF', pool.apply_async(_extract_references_from_file, (filepath, kbs_path))),
+            ('text', pool.apply_async(_extract_references_from_string, (text, kbs_path))),
+        ]
+        for _, result in results:
+            result.wait(max(deadline - time.time(), 0))
+
+        references = []
+        broken_pool = False
+        for name, result in results:
+            extracted_references = []
+            if not result.ready():
+                LOGGER.error('Timeout error while extracting references from %s.', name)
+                broken_pool = True
+            else:
+                try:
+                    extracted_references = result.get()
+                except WorkerLostError:
+                    LOGGER.error('Lost the process extracting references from %s.', name)
+                    broken_pool = True
+            references.append(map_refextract_to_schema(extracted_references, source=source))
+
+        if broken_pool:
+            _reset_refextract_pool()
+
+    return tuple(references)
+
+
 @ignore_timeout_error(return_value=[])
 @backoff.on_exception(
     backoff.expo,
@@ -234,7 +315,7 @@ def extract_references_from_text_data(text, custom_kbs_file, source=None):
     refextract_request_headers = {
         "content-type": "application/json",
     }
-    response = requests.post(
+    response = http_clients.get('refextract').post(
         "{}/extract_references_from_text".format(current_app.config["REFEXTRACT_SERVICE_URL"]),
         headers=refextract_request_headers,
         data=json.dumps({"text": text, "journal_kb_data": custom_kbs_file})
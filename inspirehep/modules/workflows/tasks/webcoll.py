@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+
+"""Tasks continuing the workflows after webcoll processed their records."""
+
+from __future__ import absolute_import, division, print_function
+
+from os.path import join
+
+from celery import shared_task
+from flask import current_app
+from inspire_utils.urls import ensure_scheme
+from invenio_db import db
+from invenio_workflows import workflow_object_class
+from invenio_workflows.models import WorkflowObjectModel
+from invenio_workflows.tasks import resume
+
+
+def prepare_workflow_continuation(workflow_object, recid, result=None):
+    """Store in a workflow the record created or updated by legacy."""
+    base_url = ensure_scheme(current_app.config["SERVER_NAME"])
+    workflow_object.extra_data['url'] = join(
+        base_url,
+        'record',
+        str(recid)
+    )
+    workflow_object.extra_data['recid'] = recid
+    workflow_object.data['control_number'] = recid
+    workflow_object.extra_data['callback_result'] = result if result is not None else {}
+
+
+@shared_task(ignore_result=False)
+def continue_workflows_after_webcoll(pending_records):
+    """Continue the workflows waiting for webcoll to process their records.
+
+    The workflow objects are updated in a single transaction, then the
+    workflows are continued by the workers.
+
+    Args:
+        pending_records (list): pairs of workflow id and record id.
+
+    Returns:
+        dict: whether the workflow of each record id was continued, and a
+        message.
+    """
+    workflow_ids = [workflow_id for workflow_id, _ in pending_records]
+    models = WorkflowObjectModel.query.filter(WorkflowObjectModel.id.in_(workflow_ids))
+    workflow_objects = {model.id: workflow_object_class(model) for model in models}
+
+    response = {}
+    for workflow_id, recid in pending_records:
+        workflow_object = workflow_objects.get(workflow_id)
+        if not workflow_object:
+            current_app.logger.warning('The workflow %s was not found.', workflow_id)
+            response[recid] = {
+                'success': False,
+                'message': 'workflow with id %s not found.' % workflow_id,
+            }
+            continue
+
+        prepare_workflow_continuation(workflow_object, recid)
+        workflow_object.save()
+        response[recid] = {
+            'success': True,
+            'message': 'Successfully restarted workflow %s' % workflow_id,
+        }
+    db.session.commit()
+
+    for workflow_id in workflow_objects:
+        resume.delay(workflow_id, 'continue_next')
+
+    return response
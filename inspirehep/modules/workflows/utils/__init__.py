@@ -24,10 +24,15 @@
 
 from __future__ import absolute_import, division, print_function
 
+import hashlib
 import json
 import os
+import tempfile
+import threading
+import time
 import traceback
 from contextlib import closing, contextmanager
+from datetime import datetime
 from functools import wraps
 
 from invenio_db import db
@@ -35,6 +40,7 @@ from invenio_db import db
 import backoff
 import lxml.etree as ET
 import requests
+import six
 from flask import current_app, url_for
 from fs.opener import fsopen
 from inspire_schemas.utils import \
@@ -44,6 +50,7 @@ from invenio_pidstore.models import PersistentIdentifier
 from invenio_workflows.errors import WorkflowsError
 from six import text_type
 from six.moves.urllib.parse import unquote
+from sqlalchemy.orm.attributes import flag_modified
 from timeout_decorator import TimeoutError, timeout
 
 from inspirehep.modules.pidstore.utils import (get_endpoint_from_pid_type,
@@ -52,20 +59,21 @@ from inspirehep.modules.records.api import InspireRecord
 from inspirehep.modules.records.errors import (
     MissingInspireRecordError, MissingUUIDOrRevisionInHEPResponse)
 from inspirehep.modules.workflows.errors import InspirehepMissingDataError
+from inspirehep.modules.workflows.metrics import STEP_METRICS_KEY
 from inspirehep.modules.workflows.models import WorkflowsAudit, WorkflowsRecordSources
+from inspirehep.utils.file_cache import get_file_cache, put_cached_file
+from inspirehep.utils.proxies import http_clients
 from inspirehep.utils.url import retrieve_uri
 
 LOGGER = getStackTraceLogger(__name__)
 
 
-@backoff.on_exception(
-    backoff.expo,
-    requests.packages.urllib3.exceptions.ConnectionError,
-    base=4,
-    max_tries=5,
-)
-def json_api_request(url, data, headers=None):
-    """Make JSON API request and return JSON response."""
+def json_api_request(url, data, headers=None, service='default'):
+    """Make JSON API request and return JSON response.
+
+    The request goes through the pooled HTTP client of ``service``, which
+    also retries it on connection errors.
+    """
     final_headers = {"Content-Type": "application/json", "Accept": "application/json"}
     if headers:
         final_headers.update(headers)
@@ -73,7 +81,7 @@ def json_api_request(url, data, headers=None):
         "POST {0} with \n{1}".format(url, json.dumps(data, indent=4))
     )
     try:
-        response = requests.post(
+        response = http_clients.get(service).post(
             url=url,
             headers=final_headers,
             data=json.dumps(data),
@@ -327,7 +335,18 @@ def download_file_to_workflow(workflow, name, url):
     Consuming the stream might raise a ``ProtocolError`` because the server
     might terminate the connection before sending any data. In this case we
     retry 5 times with exponential backoff before giving up.
+
+    If the document cache is enabled, the file is only downloaded if it
+    changed since it was last downloaded, and stored once in the files API.
     """
+    file_cache = get_file_cache()
+    if file_cache:
+        cached_file = file_cache.fetch(url, session=http_clients.get('documents'))
+        if cached_file:
+            put_cached_file(workflow.files, name, cached_file)
+            return workflow.files[name]
+        return
+
     with closing(requests.get(url=url, stream=True)) as req:
         req.raise_for_status()
         if req.status_code == 200:
@@ -336,6 +355,167 @@ def download_file_to_workflow(workflow, name, url):
             return workflow.files[name]
 
 
+def _is_pdf_file(path):
+    with open(path, 'rb') as fd:
+        return fd.read(10000).find(b'%PDF') >= 0
+
+
+def download_pdf_to_workflow(workflow, name, url, service='documents'):
+    """Download a PDF to a specified workflow, in a single request.
+
+    The response is streamed once: its first chunk is checked for the
+    ``%PDF`` marker, like in :func:`inspirehep.utils.url.is_pdf_link`, and
+    only if it is found is the body spooled to a temporary file and stored
+    in the workflow. This avoids requesting the same URL twice, once to
+    check it and once to download it.
+
+    If the document cache is enabled, the file goes through it like in
+    :func:`download_file_to_workflow`, and the cached file is checked
+    instead.
+
+    Returns:
+        Optional[FileObject]: the stored file, or ``None`` if ``url`` does
+        not point to a PDF or could not be downloaded.
+    """
+    file_cache = get_file_cache()
+    if file_cache:
+        try:
+            cached_file = file_cache.fetch(url, session=http_clients.get(service))
+        except requests.exceptions.RequestException:
+            return
+        if not cached_file or not _is_pdf_file(cached_file.path):
+            return
+        put_cached_file(workflow.files, name, cached_file)
+        return workflow.files[name]
+
+    try:
+        with closing(http_clients.get(service).get(
+            url, allow_redirects=True, stream=True
+        )) as response, tempfile.TemporaryFile() as pdf_file:
+            chunks = response.iter_content(10000)
+            first_chunk = next(chunks, b'')
+            if first_chunk.find(b'%PDF') < 0:
+                return
+
+            pdf_file.write(first_chunk)
+            for chunk in chunks:
+                pdf_file.write(chunk)
+            pdf_file.seek(0)
+            workflow.files[name] = pdf_file
+    except requests.exceptions.RequestException:
+        return
+
+    return workflow.files[name]
+
+
+def _get_workflow_state(obj):
+    """Return the fingerprints of the saved fields of a workflow object.
+
+    The step metrics are left out, as they change after every step: they are
+    saved along with the next change, or when the engine saves the object.
+    """
+    extra_data = {
+        key: value for key, value in six.iteritems(obj.model.extra_data or {})
+        if key != STEP_METRICS_KEY
+    }
+    state = {
+        field: hashlib.sha1(
+            json.dumps(value, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        for field, value in (
+            ('data', obj.model.data),
+            ('extra_data', extra_data),
+            ('callback_pos', obj.model.callback_pos),
+        )
+    }
+    state['status'] = obj.model.status
+
+    return state
+
+
+def _save_workflow(obj, state):
+    obj._saving_state = state
+    obj.save()
+
+
+def mark_workflow_saved(obj):
+    """Record that a workflow object was saved and indexed in the Holding Pen.
+
+    Called whenever ``obj.save()`` is, as saving a workflow object also
+    updates its Holding Pen index. The fingerprints are not computed again:
+    those computed by :func:`save_workflow_changes` before saving are kept,
+    and an object saved by anything else is fully saved again by the next
+    :func:`save_workflow_changes`.
+    """
+    obj._saved_state = getattr(obj, '_saving_state', None)
+    obj._saving_state = None
+    obj._indexed_at = time.time()
+    obj._index_pending = False
+
+
+def save_workflow_changes(obj):
+    """Save the changes made to a workflow object since it was last saved.
+
+    Nothing is written if the object did not change, and only the changed
+    fields are written otherwise. The Holding Pen index of the object is
+    updated at most every ``WORKFLOWS_HOLDINGPEN_INDEX_INTERVAL`` seconds:
+    the changes saved in between are only written to the database, and are
+    indexed by the next update, at the latest when the engine saves the
+    object at the end of the run.
+    """
+    state = _get_workflow_state(obj)
+    saved_state = getattr(obj, '_saved_state', None)
+    if saved_state is None:
+        _save_workflow(obj, state)
+        return
+
+    changed = [field for field in state if state[field] != saved_state[field]]
+    if not changed and not obj._index_pending:
+        return
+
+    interval = current_app.config['WORKFLOWS_HOLDINGPEN_INDEX_INTERVAL']
+    if time.time() - obj._indexed_at >= interval:
+        _save_workflow(obj, state)
+        return
+
+    if changed:
+        with db.session.begin_nested():
+            obj.model.modified = datetime.now()
+            for field in changed:
+                flag_modified(obj.model, field)
+            db.session.merge(obj.model)
+        obj._saved_state = state
+        obj._index_pending = True
+
+
+_xslt_transforms = threading.local()
+
+
+def get_xslt_transform(xslt_filename):
+    """Return the compiled XSLT stylesheet with the given path.
+
+    The compiled stylesheets are cached by path and modification time, so
+    that they are built once per thread, and rebuilt when the file changes.
+    Each thread builds its own, so that no ``XSLT`` object is ever run
+    concurrently.
+    """
+    if not hasattr(_xslt_transforms, 'cache'):
+        _xslt_transforms.cache = {}
+
+    key = (xslt_filename, os.path.getmtime(xslt_filename))
+    transform = _xslt_transforms.cache.get(key)
+    if transform is None:
+        _xslt_transforms.cache = {
+            cached_key: cached_transform
+            for cached_key, cached_transform in _xslt_transforms.cache.items()
+            if cached_key[0] != xslt_filename
+        }
+        transform = ET.XSLT(ET.parse(xslt_filename))
+        _xslt_transforms.cache[key] = transform
+
+    return transform
+
+
 def convert(xml, xslt_filename):
     """Convert XML using given XSLT stylesheet."""
     if not os.path.isabs(xslt_filename):
@@ -343,8 +523,7 @@ def convert(xml, xslt_filename):
         xslt_filename = os.path.join(prefix_dir, "stylesheets", xslt_filename)
 
     dom = ET.fromstring(xml)
-    xslt = ET.parse(xslt_filename)
-    transform = ET.XSLT(xslt)
+    transform = get_xslt_transform(xslt_filename)
     newdom = transform(dom)
     return ET.tostring(newdom, pretty_print=False)
 
@@ -561,14 +740,11 @@ def _get_headers_for_hep_root_table_request():
     }
 
 
-@backoff.on_exception(
-    backoff.expo, (requests.exceptions.ConnectionError), base=4, max_tries=5
-)
 def get_record_from_hep(pid_type, pid_value):
     endpoint = get_endpoint_from_pid_type(pid_type)
     inspirehep_url = current_app.config.get("INSPIREHEP_URL")
     headers = _get_headers_for_hep()
-    response = requests.get(
+    response = http_clients.get('hep').get(
         "{inspirehep_url}/{endpoint}/{control_number}".format(
             inspirehep_url=inspirehep_url, endpoint=endpoint, control_number=pid_value
         ),
@@ -584,9 +760,6 @@ def get_record_from_hep(pid_type, pid_value):
     return record_data
 
 
-@backoff.on_exception(
-    backoff.expo, (requests.exceptions.ConnectionError), base=4, max_tries=5
-)
 def put_record_to_hep(pid_type, pid_value, data=None, headers=None):
     if not data:
         raise InspirehepMissingDataError
@@ -599,7 +772,7 @@ def put_record_to_hep(pid_type, pid_value, data=None, headers=None):
 
     endpoint = get_endpoint_from_pid_type(pid_type)
     inspirehep_url = current_app.config.get("INSPIREHEP_URL")
-    response = requests.put(
+    response = http_clients.get('hep').put(
         "{inspirehep_url}/{endpoint}/{control_number}".format(
             inspirehep_url=inspirehep_url, endpoint=endpoint, control_number=pid_value
         ),
@@ -610,9 +783,6 @@ def put_record_to_hep(pid_type, pid_value, data=None, headers=None):
     return response.json()
 
 
-@backoff.on_exception(
-    backoff.expo, (requests.exceptions.ConnectionError), base=4, max_tries=5
-)
 def post_record_to_hep(pid_type, data=None, headers=None):
     if not data:
         raise InspirehepMissingDataError
@@ -624,7 +794,7 @@ def post_record_to_hep(pid_type, data=None, headers=None):
         _headers.update(headers)
     endpoint = get_endpoint_from_pid_type(pid_type)
     inspirehep_url = current_app.config.get("INSPIREHEP_URL")
-    response = requests.post(
+    response = http_clients.get('hep').post(
         "{inspirehep_url}/{endpoint}".format(
             inspirehep_url=inspirehep_url,
             endpoint=endpoint,
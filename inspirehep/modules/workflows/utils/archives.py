@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Lazy access to the source tarballs of the workflows."""
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+
+from fs.opener import fsopen
+from plotextractor.converter import detect_images_and_tex
+from plotextractor.errors import InvalidTarball
+
+from inspirehep.utils.url import copy_file
+
+TEX_EXTENSIONS = ('', '.tex', '.ltx', '.latex')
+TEX_MARKERS = (b'\\documentclass', b'\\documentstyle', b'\\begin{document}')
+TEX_SNIFF_SIZE = 8192
+
+_source_archives = {}
+_source_archives_lock = threading.Lock()
+
+
+class SourceArchive(object):
+    """Source tarball whose members are extracted only when needed.
+
+    The members of the tarball are indexed once, and each of them is
+    extracted at most once, in a scratch space removed by :meth:`close`.
+    """
+
+    def __init__(self, uri):
+        self._scratch_space = tempfile.mkdtemp(prefix='source_archive')
+        self.directory = os.path.join(self._scratch_space, 'files')
+        try:
+            tarball_path = os.path.join(self._scratch_space, 'source.tar')
+            with fsopen(uri, mode='rb') as remote_file, \
+                    open(tarball_path, 'wb') as local_file:
+                copy_file(remote_file, local_file)
+
+            if not tarfile.is_tarfile(tarball_path):
+                raise InvalidTarball('{0} is not a tarball'.format(uri))
+
+            self._tarball = tarfile.open(tarball_path)
+        except Exception:
+            shutil.rmtree(self._scratch_space, ignore_errors=True)
+            raise
+
+        self._members = {}
+        for member in self._tarball.getmembers():
+            name = os.path.normpath(member.name)
+            if member.isfile() and not os.path.isabs(name) and not name.startswith(os.pardir):
+                self._members[name] = member
+        self._extracted = set()
+
+    @property
+    def names(self):
+        """list(str): the names of the files in the tarball."""
+        return sorted(self._members)
+
+    def extract(self, names):
+        """Extract the given members, if not already extracted.
+
+        The members are extracted in the order of the tarball, as seeking
+        backwards in a compressed tarball decompresses it again from the
+        start.
+
+        Returns:
+            list(str): the paths of the extracted files.
+        """
+        names = list(names)
+        members = sorted(
+            (self._members[name] for name in set(names) if name not in self._extracted),
+            key=lambda member: member.offset_data,
+        )
+        for member in members:
+            self._tarball.extract(member, self.directory)
+        self._extracted.update(names)
+
+        return [os.path.join(self.directory, name) for name in names]
+
+    def get_tex_files(self):
+        """Extract the TeX sources.
+
+        Only the members with one of ``TEX_EXTENSIONS`` are extracted and
+        sniffed at first. If none of them is a TeX source, the beginning of
+        all the other members is read from the tarball, and those starting
+        like a LaTeX document are extracted, for tarballs whose sources have
+        an unusual extension.
+
+        Returns:
+            list(str): the paths of the TeX sources.
+        """
+        candidates = [
+            name for name in self.names
+            if os.path.splitext(name)[1].lower() in TEX_EXTENSIONS
+        ]
+        _, tex_files = detect_images_and_tex(self.extract(candidates))
+        if not tex_files:
+            others = sorted(
+                (self._members[name] for name in set(self.names).difference(candidates)),
+                key=lambda member: member.offset_data,
+            )
+            tex_files = self.extract(
+                os.path.normpath(member.name) for member in others
+                if self._looks_like_tex(member)
+            )
+
+        return tex_files
+
+    def _looks_like_tex(self, member):
+        head = self._tarball.extractfile(member).read(TEX_SNIFF_SIZE)
+        return any(marker in head for marker in TEX_MARKERS)
+
+    def get_images(self, tex_files):
+        """Extract the images which might be referenced in the TeX sources.
+
+        An image is extracted if its name, without extension, appears in
+        one of ``tex_files``, so that the images and data files which are
+        not used by the article are left in the tarball.
+
+        Returns:
+            list(str): the paths of the images.
+        """
+        tex_source = ''
+        for tex_file in tex_files:
+            with open(tex_file, 'rb') as fd:
+                tex_source += fd.read()
+
+        candidates = []
+        for name in self.names:
+            stem, extension = os.path.splitext(os.path.basename(name))
+            if extension.lower() not in TEX_EXTENSIONS and stem and stem in tex_source:
+                candidates.append(name)
+        image_list, _ = detect_images_and_tex(self.extract(candidates))
+
+        return image_list
+
+    def get_xml_files(self):
+        """Extract the XML files, such as author lists.
+
+        Returns:
+            list(str): the paths of the XML files.
+        """
+        return self.extract(
+            name for name in self.names if name.lower().endswith('.xml')
+        )
+
+    def close(self):
+        self._tarball.close()
+        shutil.rmtree(self._scratch_space, ignore_errors=True)
+
+
+def get_source_archive(uri):
+    """Return the source tarball at ``uri``.
+
+    The tarball is shared by the steps of a workflow, so that it is copied
+    and indexed once, and its members are extracted once. Only the last
+    tarball is kept in each process.
+
+    Raises:
+        InvalidTarball: if the file is not a tarball.
+    """
+    with _source_archives_lock:
+        source_archive = _source_archives.get(uri)
+        if source_archive is None:
+            _close_source_archives()
+            source_archive = SourceArchive(uri)
+            _source_archives[uri] = source_archive
+
+    return source_archive
+
+
+def _close_source_archives():
+    for source_archive in _source_archives.values():
+        source_archive.close()
+    _source_archives.clear()
+
+
+def close_source_archives():
+    """Remove the source tarballs extracted by this process."""
+    with _source_archives_lock:
+        _close_source_archives()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Plot extraction in a pool of processes."""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import resource
+import time
+
+from billiard import Pool
+from billiard.exceptions import WorkerLostError
+from plotextractor.api import map_images_in_tex
+from plotextractor.converter import convert_images
+from plotextractor.errors import NoTexFilesFound
+from wand.exceptions import WandException
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _limit_memory(memory_limit):
+    """Cap the address space of a process converting figures."""
+    if memory_limit:
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard_limit))
+
+
+def _convert_image(image_file):
+    """Convert a figure to PNG.
+
+    Returns:
+        dict: the mapping from the converted figure to ``image_file``, empty
+        if it could not be converted.
+    """
+    try:
+        return convert_images([image_file])
+    except (MemoryError, WandException):
+        LOGGER.warning('Cannot convert %s.', image_file, exc_info=True)
+        return {}
+
+
+def extract_plots(source_archive, timeout, processes=1, memory_limit=None):
+    """Extract the plots and their captions from a tarball.
+
+    Same as :func:`plotextractor.api.process_tarball`, except that only the
+    TeX sources and the images they reference are extracted, and that the
+    figures are converted concurrently in a pool of processes. The figures
+    which are not converted after ``timeout`` seconds are left out, the
+    others are kept.
+
+    Args:
+        source_archive(SourceArchive): the tarball.
+        timeout(int): the time in seconds allowed for converting the figures.
+        processes(int): the maximum number of processes converting figures.
+        memory_limit(Optional[int]): the maximum address space in bytes of
+            each of the processes.
+
+    Returns:
+        list(dict): the plots, as returned by ``process_tarball``.
+
+    Raises:
+        NoTexFilesFound: if the tarball has no TeX files.
+    """
+    deadline = time.time() + timeout
+    tex_files = source_archive.get_tex_files()
+    if not tex_files:
+        raise NoTexFilesFound('No TeX files found in the tarball')
+
+    image_list = source_archive.get_images(tex_files)
+
+    image_mapping = {}
+    if image_list:
+        pool = Pool(
+            min(processes, len(image_list)),
+            initializer=_limit_memory,
+            initargs=(memory_limit,),
+        )
+        try:
+            results = [
+                pool.apply_async(_convert_image, (image_file,))
+                for image_file in image_list
+            ]
+            for result in results:
+                result.wait(max(deadline - time.time(), 0))
+
+            for image_file, result in zip(image_list, results):
+                if not result.ready():
+                    LOGGER.warning('Timeout while converting %s.', image_file)
+                    continue
+                try:
+                    image_mapping.update(result.get())
+                except WorkerLostError:
+                    LOGGER.warning('Lost the process converting %s.', image_file)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    return map_images_in_tex(tex_files, image_mapping, source_archive.directory)
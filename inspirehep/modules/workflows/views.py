@@ -25,7 +25,6 @@
 from __future__ import absolute_import, division, print_function
 
 import re
-from os.path import join
 import copy
 
 from functools import wraps
@@ -41,7 +40,6 @@ from flask import (
 from flask.views import MethodView
 from flask_login import current_user
 from inspire_schemas.api import validate
-from inspire_utils.urls import ensure_scheme
 from invenio_oauth2server.provider import oauth2
 from invenio_db import db
 from invenio_workflows import (
@@ -66,6 +64,10 @@ from inspirehep.modules.workflows.errors import (
 )
 from inspirehep.modules.workflows.loaders import workflow_loader
 from inspirehep.modules.workflows.models import WorkflowsPendingRecord
+from inspirehep.modules.workflows.tasks.webcoll import (
+    continue_workflows_after_webcoll,
+    prepare_workflow_continuation,
+)
 from inspirehep.modules.workflows.utils import (
     get_resolve_validation_callback_url,
     get_validation_errors,
@@ -122,8 +124,6 @@ def _continue_workflow(workflow_id, recid, result=None):
     :return: True if succeeded, False if the specified workflow id does not
         exist.
     """
-    result = result if result is not None else {}
-    base_url = ensure_scheme(current_app.config["SERVER_NAME"])
     try:
         workflow_object = workflow_object_class.get(workflow_id)
     except WorkflowsMissingObject:
@@ -133,14 +133,7 @@ def _continue_workflow(workflow_id, recid, result=None):
         )
         return False
 
-    workflow_object.extra_data['url'] = join(
-        base_url,
-        'record',
-        str(recid)
-    )
-    workflow_object.extra_data['recid'] = recid
-    workflow_object.data['control_number'] = recid
-    workflow_object.extra_data['callback_result'] = result
+    prepare_workflow_continuation(workflow_object, recid, result)
     workflow_object.save()
     db.session.commit()
     workflow_object.continue_workflow(delayed=True)
@@ -200,7 +193,9 @@ def webcoll_callback():
     """Handle a callback from webcoll with the record ids processed.
 
     Expects the request data to contain a list of record ids in the
-    recids field.
+    recids field. The pending records are removed and the workflows are
+    continued in a background job, whose status can be polled with
+    :func:`webcoll_callback_status`.
 
     Example:
         An example of callback::
@@ -213,41 +208,52 @@ def webcoll_callback():
 
     """
     recids = dict(request.form).get('recids', [])
-    pending_records = WorkflowsPendingRecord.query.filter(
-        WorkflowsPendingRecord.record_id.in_(recids)
-    ).all()
-    response = {}
-    for pending_record in pending_records:
-        recid = int(pending_record.record_id)
-        workflow_id = pending_record.workflow_id
-        continue_response = _find_and_continue_workflow(
-            workflow_id=workflow_id,
-            recid=recid,
-        )
-        if continue_response['success']:
-            current_app.logger.debug(
-                'Successfully restarted workflow %s',
-                workflow_id,
-            )
-            response[recid] = {
-                'success': True,
-                'message': 'Successfully restarted workflow %s' % workflow_id,
-            }
-        else:
-            current_app.logger.debug(
-                'Error restarting workflow %s: %s',
-                workflow_id,
-                continue_response['message'],
-            )
-            response[recid] = {
-                'success': False,
-                'message': continue_response['message'],
-            }
-
-        db.session.delete(pending_record)
+    pending_records = WorkflowsPendingRecord.__table__
+    deleted = db.session.execute(
+        pending_records.delete().where(
+            pending_records.c.record_id.in_(recids)
+        ).returning(pending_records.c.workflow_id, pending_records.c.record_id)
+    )
+    to_continue = [(workflow_id, int(recid)) for workflow_id, recid in deleted]
+    if not to_continue:
         db.session.commit()
+        return jsonify({'job_id': None, 'recids': []})
+
+    # Keep the pending records if the job cannot be sent, so that the
+    # workflows are continued by the next callback.
+    try:
+        job = continue_workflows_after_webcoll.delay(to_continue)
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.commit()
+
+    current_app.logger.debug(
+        'Continuing %d workflows after webcoll in job %s',
+        len(to_continue),
+        job.id,
+    )
+
+    return jsonify({
+        'job_id': job.id,
+        'recids': [recid for _, recid in to_continue],
+    })
+
+
+@callback_blueprint.route('/workflows/webcoll/<job_id>', methods=['GET'])
+def webcoll_callback_status(job_id):
+    """Return the status of the job continuing the workflows after webcoll.
+
+    Once the job has finished, ``result`` contains whether the workflow of
+    each record id was continued, and a message.
+    """
+    job = continue_workflows_after_webcoll.AsyncResult(job_id)
 
-    return jsonify(response)
+    return jsonify({
+        'job_id': job_id,
+        'state': job.state,
+        'result': job.result if job.successful() else None,
+    })
 
 
 def _robotupload_has_error(result):
@@ -30,6 +30,8 @@ from workflow.patterns.controlflow import (
     IF_ELSE,
 )
 
+from inspirehep.modules.workflows.metrics import instrument_workflow
+from inspirehep.modules.workflows.patterns import PARALLEL, WHEN
 from inspirehep.modules.workflows.tasks.refextract import extract_journal_info
 from inspirehep.modules.workflows.tasks.arxiv import (
     arxiv_author_list,
@@ -200,13 +202,15 @@ ENHANCE_RECORD = [
         with_author_keywords=True,
     ),
     filter_core_keywords,
-    guess_categories,
-    IF(
-        is_experimental_paper,
-        guess_experiments,
-    ),
-    guess_keywords,
-    guess_coreness,
+    PARALLEL([
+        guess_categories,
+        WHEN(
+            is_experimental_paper,
+            guess_experiments,
+        ),
+        guess_keywords,
+        guess_coreness,
+    ]),
     normalize_collaborations,
 ]
 
@@ -602,7 +606,7 @@ class Article(object):
     name = "HEP"
     data_type = "hep"
 
-    workflow = (
+    workflow = instrument_workflow(
         PRE_PROCESSING +
         NOTIFY_IF_SUBMISSION +
         MARK_IF_MATCH_IN_HOLDINGPEN +
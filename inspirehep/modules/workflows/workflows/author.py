@@ -26,6 +26,7 @@ from __future__ import absolute_import, division, print_function
 
 from workflow.patterns.controlflow import IF, IF_ELSE
 
+from inspirehep.modules.workflows.metrics import instrument_workflow
 from inspirehep.modules.workflows.tasks.actions import (
     halt_record,
     is_marked,
@@ -126,7 +127,7 @@ class Author(object):
     name = "Author"
     data_type = "authors"
 
-    workflow = [
+    workflow = instrument_workflow([
         load_from_source_data,
         # Make sure schema is set for proper indexing in Holding Pen
         set_schema,
@@ -151,4 +152,4 @@ class Author(object):
                 ),
             ],
         ),
-    ]
+    ])
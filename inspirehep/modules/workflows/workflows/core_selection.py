@@ -7,6 +7,7 @@
 from __future__ import absolute_import, division, print_function
 
 from inspirehep.modules.literaturesuggest.tasks import curation_ticket_context
+from inspirehep.modules.workflows.metrics import instrument_workflow
 from inspirehep.modules.workflows.tasks.actions import halt_record, normalize_author_affiliations, \
     link_institutions_with_affiliations, load_record_from_hep
 from inspirehep.modules.workflows.tasks.submission import prepare_keywords, create_ticket
@@ -25,7 +26,7 @@ class CoreSelection(object):
     name = "CORE_SELECTION"
     data_type = "hep"
 
-    workflow = (
+    workflow = instrument_workflow([
         halt_record(
             action='auto_non_core_record',
             message='Submission halted Waiting for curator to decide if record is CORE.'
@@ -44,5 +45,5 @@ class CoreSelection(object):
             ),
         ),
         store_record,
-        SEND_TO_LEGACY
-    )
+        SEND_TO_LEGACY,
+    ])
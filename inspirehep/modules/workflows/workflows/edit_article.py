@@ -28,6 +28,7 @@ from sqlalchemy_continuum import transaction_class
 from invenio_db import db
 from invenio_records.models import RecordMetadata
 
+from inspirehep.modules.workflows.metrics import instrument_workflow
 from inspirehep.modules.workflows.tasks.actions import validate_record
 from inspirehep.modules.workflows.tasks.submission import cleanup_pending_workflow, send_robotupload
 from inspirehep.modules.workflows.tasks.upload import send_record_to_hep
@@ -77,7 +78,7 @@ class EditArticle(object):
     name = 'edit_article'
     data_type = 'hep'
 
-    workflow = (
+    workflow = instrument_workflow(
         [
             store_head_version,
             change_status_to_waiting,
@@ -25,6 +25,7 @@ from __future__ import absolute_import, division, print_function
 from inspire_schemas.readers import LiteratureReader
 from invenio_workflows import start, workflow_object_class
 
+from inspirehep.modules.workflows.metrics import instrument_workflow
 from inspirehep.modules.workflows.tasks.manual_merging import (
     halt_for_merge_approval,
     merge_records,
@@ -39,7 +40,7 @@ class ManualMerge(object):
     name = 'MERGE'
     data_type = ''
 
-    workflow = ([
+    workflow = instrument_workflow([
         store_head_version,
         merge_records,
         halt_for_merge_approval,
@@ -28,6 +28,7 @@ from fqn_decorators.decorators import get_fqn
 
 from rt import AuthorizationError
 
+from .http import HttpClients
 from .tickets import InspireRt
 
 
@@ -43,6 +44,7 @@ class INSPIREUtils(object):
     def init_app(self, app):
         """Initialize the application."""
         self.rt_instance = self.create_rt_instance(app)
+        self.http_clients = HttpClients(app)
         app.extensions["inspire-utils"] = self
 
     def create_rt_instance(self, app):
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Local cache of the downloaded documents."""
+
+from __future__ import absolute_import, division, print_function
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+from collections import namedtuple
+from contextlib import closing, contextmanager
+
+import requests
+from flask import current_app
+from invenio_db import db
+from invenio_files_rest.models import FileInstance, ObjectVersion
+
+CachedFile = namedtuple('CachedFile', ['path', 'sha1', 'checksum', 'size'])
+"""A file of the cache, with its SHA1 and its checksum in the files API."""
+
+
+def _makedirs(directory):
+    try:
+        os.makedirs(directory)
+    except OSError:
+        if not os.path.isdir(directory):
+            raise
+
+
+class FileCache(object):
+    """Content-addressed cache of downloaded files.
+
+    The content of the files is stored once, under its SHA1. The URLs are
+    indexed with the ``ETag`` and ``Last-Modified`` headers of their last
+    response, so that a file is downloaded again only if it changed. The
+    total size of the files is kept in the ``size`` file of the cache, and
+    the least recently used files are removed when it gets bigger than
+    ``max_size`` bytes.
+    """
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+
+    def _get_object_path(self, sha1):
+        return os.path.join(self.directory, 'objects', sha1[:2], sha1)
+
+    def _get_url_path(self, url):
+        url_hash = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'urls', url_hash[:2], url_hash + '.json')
+
+    def _get_url_entry(self, url):
+        try:
+            with open(self._get_url_path(url)) as fd:
+                entry = json.load(fd)
+        except (IOError, ValueError):
+            return None
+
+        if entry.get('url') != url or not os.path.exists(self._get_object_path(entry['sha1'])):
+            return None
+        return entry
+
+    @staticmethod
+    def _write_temporary_file(directory, write):
+        _makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                result = write(tmp_file)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+        return tmp_path, result
+
+    def _store(self, stream):
+        sha1 = hashlib.sha1()
+        md5 = hashlib.md5()
+
+        def _write(tmp_file):
+            size = 0
+            for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+                sha1.update(chunk)
+                md5.update(chunk)
+                tmp_file.write(chunk)
+                size += len(chunk)
+            return size
+
+        tmp_path, size = self._write_temporary_file(
+            os.path.join(self.directory, 'objects'), _write)
+        path = self._get_object_path(sha1.hexdigest())
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            os.utime(path, None)
+        else:
+            _makedirs(os.path.dirname(path))
+            os.rename(tmp_path, path)
+            self._add_to_size(size, keep=sha1.hexdigest())
+
+        return CachedFile(path, sha1.hexdigest(), 'md5:' + md5.hexdigest(), size)
+
+    @contextmanager
+    def _lock_size_file(self):
+        _makedirs(self.directory)
+        fd = os.open(os.path.join(self.directory, 'size'), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            os.close(fd)
+
+    def _add_to_size(self, size, keep):
+        """Add a new file to the total size, and evict files if it is too big.
+
+        The store is only walked when the total is too big, or unknown.
+        """
+        with self._lock_size_file() as fd:
+            try:
+                total = int(os.read(fd, 32)) + size
+            except ValueError:
+                total = None
+
+            if total is None or total > self.max_size:
+                total = self._evict(keep)
+
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, str(total).encode('ascii'))
+
+    def _evict(self, keep):
+        cached_files = []
+        total_size = 0
+        for directory, _, filenames in os.walk(os.path.join(self.directory, 'objects')):
+            for filename in filenames:
+                if filename.startswith('.tmp'):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                total_size += stat.st_size
+                if filename != keep:
+                    cached_files.append((stat.st_mtime, stat.st_size, path))
+
+        for _, size, path in sorted(cached_files):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+
+        return total_size
+
+    def fetch(self, url, session=requests):
+        """Return the file at ``url``, downloading it only if it changed.
+
+        Args:
+            url(str): the URL of the file.
+            session: the HTTP session used for the download.
+
+        Returns:
+            Optional[CachedFile]: the file, or ``None`` if the server did not
+            send it.
+
+        Raises:
+            requests.exceptions.HTTPError: if the download failed.
+        """
+        entry = self._get_url_entry(url)
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        with closing(session.get(url, headers=headers, stream=True)) as response:
+            if entry and response.status_code == 304:
+                path = self._get_object_path(entry['sha1'])
+                os.utime(path, None)
+                return CachedFile(path, entry['sha1'], entry['checksum'], entry['size'])
+
+            response.raise_for_status()
+            if response.status_code != 200:
+                return None
+
+            response.raw.decode_content = True
+            cached_file = self._store(response.raw)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        if etag or last_modified:
+            entry = dict(
+                cached_file._asdict(),
+                url=url,
+                etag=etag,
+                last_modified=last_modified,
+            )
+            del entry['path']
+            url_path = self._get_url_path(url)
+            tmp_path, _ = self._write_temporary_file(
+                os.path.dirname(url_path), lambda fd: json.dump(entry, fd))
+            os.rename(tmp_path, url_path)
+
+        return cached_file
+
+
+def get_file_cache():
+    """Return the cache of the downloaded documents, if enabled."""
+    if not current_app.config.get('FEATURE_FLAG_ENABLE_DOCUMENT_CACHE'):
+        return None
+
+    return FileCache(
+        current_app.config['DOCUMENT_CACHE_DIRECTORY'],
+        current_app.config['DOCUMENT_CACHE_MAX_SIZE'],
+    )
+
+
+def _get_sha1(file_instance):
+    sha1 = hashlib.sha1()
+    with closing(file_instance.storage().open()) as stream:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+            sha1.update(chunk)
+
+    return sha1.hexdigest()
+
+
+def put_cached_file(files, key, cached_file):
+    """Store a cached file under ``key`` in the files of a record or workflow.
+
+    Nothing is written if the file is already stored under ``key``, and an
+    identical file already stored in the files API is reused instead of
+    being copied. As MD5 collisions can be crafted, a file with the same
+    checksum is only reused if it also has the same SHA1.
+
+    Args:
+        files(FilesIterator): the files of the record or workflow.
+        key(str): the key of the file.
+        cached_file(CachedFile): the file.
+    """
+    if key in files and files[key].file.checksum == cached_file.checksum:
+        return
+
+    file_instances = FileInstance.query.filter_by(
+        checksum=cached_file.checksum,
+        size=cached_file.size,
+        readable=True,
+    )
+    file_instance = next(
+        (
+            file_instance for file_instance in file_instances
+            if _get_sha1(file_instance) == cached_file.sha1
+        ),
+        None,
+    )
+    if file_instance is None:
+        with open(cached_file.path, 'rb') as stream:
+            files[key] = stream
+        return
+
+    with db.session.begin_nested():
+        obj = ObjectVersion.create(bucket=files.bucket, key=key, _file_id=file_instance)
+        files.filesmap[key] = files.file_cls(obj, {}).dumps()
+        files.flush()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Pooled HTTP clients for the external services INSPIRE talks to.
+
+Every service gets its own :class:`InstrumentedSession`, which keeps its
+connections alive between calls, applies the timeout and the retry policy
+configured in ``HTTP_CLIENTS`` and reports latency and errors of each
+request as a metric. Sessions are created on first use and shared by all
+the threads of the process, see :data:`inspirehep.utils.proxies.http_clients`.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import threading
+import time
+
+import backoff
+import requests
+from fqn_decorators.decorators import get_fqn
+from requests.adapters import HTTPAdapter
+from time_execution.decorator import SHORT_HOSTNAME, write_metric
+
+
+class InstrumentedSession(requests.Session):
+    """A ``requests`` session with a connection pool, timeout and retries.
+
+    Args:
+        service (str): name of the service, used in the metrics.
+        timeout (float): timeout in seconds used when a request doesn't
+            specify one. ``None`` means no timeout.
+        pool_size (int): maximum number of connections kept alive per host.
+        max_tries (int): maximum number of attempts of a request failing
+            with a connection error.
+    """
+
+    def __init__(self, service, timeout=None, pool_size=10, max_tries=5):
+        super(InstrumentedSession, self).__init__()
+        self.service = service
+        self.timeout = timeout
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+        self._request_with_retries = backoff.on_exception(
+            backoff.expo,
+            (
+                requests.exceptions.ConnectionError,
+                requests.packages.urllib3.exceptions.ConnectionError,
+            ),
+            base=4,
+            max_tries=max_tries,
+        )(self._timed_request)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self._request_with_retries(method, url, **kwargs)
+
+    def _timed_request(self, method, url, **kwargs):
+        metric = {
+            'method': method.upper(),
+            'hostname': SHORT_HOSTNAME,
+        }
+        start_time = time.time()
+        try:
+            response = super(InstrumentedSession, self).request(
+                method, url, **kwargs
+            )
+            metric['status_code'] = response.status_code
+            return response
+        except Exception as exc:
+            metric['exc_fqn'] = get_fqn(exc.__class__)
+            raise
+        finally:
+            metric['value'] = round(time.time() - start_time, 3) * 1000
+            write_metric('inspirehep.http.{}'.format(self.service), **metric)
+
+
+class HttpClients(object):
+    """Registry of the :class:`InstrumentedSession` of each service.
+
+    The options of a service are the ones in ``HTTP_CLIENTS_DEFAULTS``
+    updated with the ones in ``HTTP_CLIENTS[service]``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, service):
+        """Return the session of the given service, creating it if needed."""
+        session = self._sessions.get(service)
+        if session is not None:
+            return session
+
+        with self._lock:
+            if service not in self._sessions:
+                options = dict(self.app.config.get('HTTP_CLIENTS_DEFAULTS', {}))
+                options.update(self.app.config.get('HTTP_CLIENTS', {}).get(service, {}))
+                self._sessions[service] = InstrumentedSession(service, **options)
+            return self._sessions[service]
+
+    def clear(self):
+        """Close all the sessions, dropping their pooled connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Lookup of the Institutions records matching affiliations."""
+
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import uuid
+
+from elasticsearch_dsl import MultiSearch, Q
+from flask import current_app
+from invenio_cache import current_cache
+from invenio_search import current_search_client
+
+from inspire_utils.dedupers import dedupe_list
+from inspirehep.modules.search import InstitutionsSearch
+
+INSTITUTIONS_CACHE_VERSION_KEY = 'institutions::version'
+INSTITUTION_CACHE_KEY = 'institutions::{version}::{icn}'
+
+
+def invalidate_institutions():
+    """Stamp the cached institutions with a new version.
+
+    The ICNs are matched against the analyzed ``legacy_ICN`` of the
+    Institutions records, so a change to one record can change the match
+    of many affiliations: all of them are looked up again.
+    """
+    version = uuid.uuid4().hex
+    current_cache.set(INSTITUTIONS_CACHE_VERSION_KEY, version, timeout=0)
+    return version
+
+
+def _get_institution_cache_keys(icns):
+    version = current_cache.get(INSTITUTIONS_CACHE_VERSION_KEY)
+    if version is None:
+        version = invalidate_institutions()
+
+    # Affiliations that only differ in case and spacing match the same
+    # institution, and the keys must be valid for memcached.
+    return {
+        icn: INSTITUTION_CACHE_KEY.format(
+            version=version,
+            icn=hashlib.sha1(u' '.join(icn.lower().split()).encode('utf-8')).hexdigest(),
+        )
+        for icn in icns
+    }
+
+
+def _get_cached_institutions(keys):
+    icns = list(keys)
+    cached = current_cache.get_many(*[keys[icn] for icn in icns])
+    return {icn: ref for icn, ref in zip(icns, cached) if ref is not None}
+
+
+def _cache_institutions(institutions, keys):
+    matches = {keys[icn]: ref for icn, ref in institutions.items() if ref}
+    no_matches = {keys[icn]: {} for icn, ref in institutions.items() if not ref}
+    if matches:
+        current_cache.set_many(
+            matches, timeout=current_app.config['WORKFLOWS_INSTITUTIONS_CACHE_TIMEOUT'])
+    if no_matches:
+        current_cache.set_many(
+            no_matches, timeout=current_app.config['WORKFLOWS_INSTITUTIONS_NEGATIVE_CACHE_TIMEOUT'])
+
+
+def get_institutions_refs(icns):
+    """Return the reference of the institution with each legacy ICN.
+
+    The ICNs that are not cached are looked up with a single multi search.
+    Behind ``FEATURE_FLAG_ENABLE_INSTITUTIONS_CACHE`` the results, including
+    the ICNs without an institution, are cached until an Institutions record
+    is committed.
+
+    Args:
+        icns (list): the legacy ICNs of the institutions.
+
+    Returns:
+        dict: the ``$ref`` of each institution by ICN, ``None`` if there's
+        no institution with that ICN.
+    """
+    icns = dedupe_list(icns)
+    use_cache = current_app.config.get('FEATURE_FLAG_ENABLE_INSTITUTIONS_CACHE')
+    if use_cache:
+        keys = _get_institution_cache_keys(icns)
+        institutions = _get_cached_institutions(keys)
+    else:
+        institutions = {}
+
+    pending = [icn for icn in icns if icn not in institutions]
+    if pending:
+        multi_search = MultiSearch(using=current_search_client)
+        for icn in pending:
+            multi_search = multi_search.add(
+                InstitutionsSearch().query(Q("match", legacy_ICN=icn)).extra(size=1).source(['self'])
+            )
+        found = {
+            icn: response.hits[0].to_dict()["self"] if response else {}
+            for icn, response in zip(pending, multi_search.execute())
+        }
+        if use_cache:
+            _cache_institutions(found, keys)
+        institutions.update(found)
+
+    return {icn: institutions[icn] or None for icn in icns}
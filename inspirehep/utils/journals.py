@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Version of the journal KB shared by the workers."""
+
+from __future__ import absolute_import, division, print_function
+
+import uuid
+
+from invenio_cache import current_cache
+
+JOURNAL_KB_VERSION_KEY = 'refextract::journal_kb::version'
+
+
+def invalidate_journal_kb():
+    """Stamp the journal KB with a new version.
+
+    Every worker reloads its copy of the KB of
+    :func:`inspirehep.modules.refextract.tasks.get_journal_kb_dict`, and of
+    the journal titles index of
+    :func:`inspirehep.utils.normalizers.get_journal_titles_index`, the next
+    time it needs it.
+    """
+    version = uuid.uuid4().hex
+    current_cache.set(JOURNAL_KB_VERSION_KEY, version, timeout=0)
+    return version
+
+
+def get_journal_kb_version():
+    """Return the current version of the journal KB, stamping one if needed."""
+    version = current_cache.get(JOURNAL_KB_VERSION_KEY)
+    if version is None:
+        version = invalidate_journal_kb()
+    return version
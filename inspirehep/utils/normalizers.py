@@ -22,26 +22,101 @@
 
 from __future__ import absolute_import, division, print_function
 
-from flask import current_app
-from invenio_search import current_search
+import threading
+from copy import deepcopy
 
-from inspirehep.modules.search.api import JournalsSearch
+import six
+from invenio_records.models import RecordMetadata
+from sqlalchemy import cast, not_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+from inspirehep.utils.journals import get_journal_kb_version
+
+_journal_titles_index = {'version': None, 'index': None}
+_journal_titles_index_lock = threading.Lock()
+
+
+class JournalTitlesIndex(object):
+    """In-memory index of the titles of the Journals records.
+
+    Maps the lowercased short titles, journal titles and title variants to
+    the short title, and each short title to the ``self`` reference and the
+    ``inspire_categories`` of its journal.
+    """
+
+    def __init__(self, journals):
+        self.short_titles = {}
+        self.journals = {}
+
+        journals = [journal for journal in journals if journal['short_title']]
+        for journal in journals:
+            self.short_titles.setdefault(journal['short_title'].lower(), journal['short_title'])
+            self.journals.setdefault(journal['short_title'], journal)
+        for journal in journals:
+            if journal['journal_title']:
+                self.short_titles.setdefault(journal['journal_title'].lower(), journal['short_title'])
+        for journal in journals:
+            for title_variant in journal['title_variants'] or []:
+                self.short_titles.setdefault(title_variant.lower(), journal['short_title'])
+
+    def normalize(self, journal_title):
+        """Return the short title of a journal, or ``journal_title`` if unknown."""
+        if not isinstance(journal_title, six.string_types):
+            return journal_title
+        return self.short_titles.get(journal_title.lower(), journal_title)
+
+    def get_journal(self, short_title):
+        """Return the ``self`` and ``inspire_categories`` of a journal, if known.
+
+        The result is a copy, so that it can be stored in a record.
+        """
+        journal = self.journals.get(short_title)
+        if journal is None:
+            return None
+        return deepcopy(journal)
+
+
+def _load_journals():
+    json = type_coerce(RecordMetadata.json, JSONB)
+    only_journals = json['_collections'].contains(['Journals'])
+    only_not_deleted = not_(json.has_key('deleted')) | not_(  # noqa
+        json['deleted'] == cast(True, JSONB)
+    )
+
+    query = RecordMetadata.query.with_entities(
+        RecordMetadata.json['short_title'],
+        RecordMetadata.json['journal_title']['title'],
+        RecordMetadata.json['title_variants'],
+        RecordMetadata.json['self'],
+        RecordMetadata.json['inspire_categories'],
+    ).filter(only_journals, only_not_deleted)
+
+    for short_title, journal_title, title_variants, self_, inspire_categories in query:
+        yield {
+            'short_title': short_title,
+            'journal_title': journal_title,
+            'title_variants': title_variants,
+            'self': self_,
+            'inspire_categories': inspire_categories,
+        }
+
+
+def get_journal_titles_index():
+    """Return the :class:`JournalTitlesIndex` of the current Journals records.
+
+    The index is kept in memory and only rebuilt from the database when a
+    Journals record was committed, which stamps a new version of the
+    journal KB (see :func:`inspirehep.utils.journals.invalidate_journal_kb`).
+    """
+    version = get_journal_kb_version()
+
+    with _journal_titles_index_lock:
+        if _journal_titles_index['version'] != version:
+            _journal_titles_index['index'] = JournalTitlesIndex(_load_journals())
+            _journal_titles_index['version'] = version
+
+        return _journal_titles_index['index']
 
 
 def normalize_journal_title(journal_title):
-    current_search.flush_and_refresh('records-journals')
-
-    normalized_journal_title = journal_title
-    hits = JournalsSearch().query(
-        'match',
-        lowercase_journal_titles=journal_title
-    ).execute()
-
-    if hits:
-        try:
-            normalized_journal_title = hits[0].short_title
-        except (AttributeError, IndexError):
-            current_app.logger.debug(
-                "Failed to normalize journal title in: %s", repr(hits[0])
-            )
-    return normalized_journal_title
+    return get_journal_titles_index().normalize(journal_title)
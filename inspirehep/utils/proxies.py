@@ -32,3 +32,8 @@ rt_instance = LocalProxy(
     lambda: current_app.extensions['inspire-utils'].rt_instance
 )
 """Helper proxy to access the state object."""
+
+http_clients = LocalProxy(
+    lambda: current_app.extensions['inspire-utils'].http_clients
+)
+"""Helper proxy to access the registry of pooled HTTP clients."""
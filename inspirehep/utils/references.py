@@ -26,21 +26,36 @@ from contextlib import contextmanager
 
 from flask import current_app
 
+from invenio_cache import current_cache
 from inspire_schemas.api import ReferenceBuilder
 from inspire_utils.helpers import force_list
 from inspire_utils.dedupers import dedupe_list_of_dicts
 from inspire_utils.record import get_value
 
-from inspirehep.utils.jinja2 import render_template_to_string
 from inspirehep.utils.record_getter import get_es_records
 from inspirehep.utils.url import retrieve_uri
 
 
-def get_and_format_references(record):
+def get_and_format_references(record, version=None):
     """Format references.
 
+    All references are rendered with a single instance of the
+    ``render_reference`` macro. When ``version`` is given, the rendered
+    rows are cached per control number and version of the record, so it
+    must be the version ``record`` was read at, such as the ``_version`` of
+    its Elasticsearch document.
+
     .. deprecated:: 2018-06-07
     """
+    cache_key = None
+    if version is not None and record.get('control_number'):
+        cache_key = 'references::{}::{}'.format(
+            record['control_number'], version
+        )
+        cached_references = current_cache.get(cache_key)
+        if cached_references is not None:
+            return cached_references
+
     out = []
     references = record.get('references')
     if references:
@@ -67,29 +82,49 @@ def get_and_format_references(record):
         recid_to_reference = {
             ref['control_number']: ref for ref in resolved_references
         }
+
+        context = {}
+        current_app.update_template_context(context)
+        render_reference = current_app.jinja_env.get_template(
+            'inspirehep_theme/references_macros.html'
+        ).make_module(vars=context).render_reference
+
         for reference in references:
             row = []
             ref_record = recid_to_reference.get(
                 reference.get('recid'), {}
             )
-            if 'reference' in reference:
-                reference.update(reference['reference'])
-                del reference['reference']
-            if 'publication_info' in reference:
-                reference['publication_info'] = force_list(
-                    reference['publication_info']
-                )
-            row.append(render_template_to_string(
-                'inspirehep_theme/references.html',
-                record=ref_record,
-                reference=reference
-            ))
+            row.append(unicode(render_reference(
+                ref_record,
+                _flatten_reference(reference),
+            )))
             row.append(ref_record.get('citation_count', ''))
             out.append(row)
 
+    if cache_key:
+        current_cache.set(
+            cache_key,
+            out,
+            timeout=current_app.config.get(
+                'INSPIRE_REFERENCES_CACHE_TIMEOUT', 3600)
+        )
+
     return out
 
 
+def _flatten_reference(reference):
+    """Return a copy of the reference with the inner ``reference`` inlined."""
+    flat_reference = dict(reference)
+    if 'reference' in flat_reference:
+        flat_reference.update(flat_reference.pop('reference'))
+    if 'publication_info' in flat_reference:
+        flat_reference['publication_info'] = force_list(
+            flat_reference['publication_info']
+        )
+
+    return flat_reference
+
+
 def map_refextract_to_schema(extracted_references, source=None):
     """Convert refextract output to the schema using the builder."""
     result = []
@@ -28,12 +28,13 @@ import io
 import tempfile
 
 import requests
-from contextlib import contextmanager
+from contextlib import closing, contextmanager
 from flask import current_app
 from fs.opener import fsopen
 
 from inspire_utils.urls import record_url_by_pattern
 from inspirehep import __version__
+from inspirehep.utils.proxies import http_clients
 
 
 def make_user_agent_string(component=""):
@@ -47,7 +48,7 @@ def make_user_agent_string(component=""):
     return ret
 
 
-def is_pdf_link(url):
+def is_pdf_link(url, service='documents'):
     """Return ``True`` if ``url`` points to a PDF.
 
     Returns ``True`` if the first characters of the response contains
@@ -55,17 +56,21 @@ def is_pdf_link(url):
 
     Args:
         url (string): a URL.
+        service (string): name of the HTTP client to use.
 
     Returns:
         bool: whether the url points to a PDF.
 
     """
     try:
-        response = requests.get(url, allow_redirects=True, stream=True)
+        response = http_clients.get(service).get(
+            url, allow_redirects=True, stream=True
+        )
     except requests.exceptions.RequestException:
         return False
 
-    found = next(response.iter_content(10000), '').find('%PDF')
+    with closing(response):
+        found = next(response.iter_content(10000), '').find('%PDF')
 
     return found >= 0
 
@@ -0,0 +1,58 @@
+"""
+BENCHMARK THE XSLT CONVERSION OF HARVESTED RECORDS.
+
+Compares the throughput of ``inspirehep.modules.workflows.utils.convert``,
+which caches the compiled stylesheet, with parsing and compiling the
+stylesheet for every record, as it was done before.
+
+Example:
+    $ python scripts/benchmarks/workflows_convert.py --records 2000
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import os
+import timeit
+
+import lxml.etree as ET
+
+from inspirehep.modules.workflows.utils import convert
+
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), '..', '..',
+    'tests', 'unit', 'workflows', 'fixtures', 'oai_arxiv.xml',
+)
+STYLESHEET = os.path.join(
+    os.path.dirname(__file__), '..', '..',
+    'inspirehep', 'modules', 'workflows', 'utils', 'stylesheets', 'oaiarXiv2marcxml.xsl',
+)
+
+
+def convert_without_cache(xml, xslt_filename):
+    dom = ET.fromstring(xml)
+    transform = ET.XSLT(ET.parse(xslt_filename))
+    return ET.tostring(transform(dom), pretty_print=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=1000)
+    args = parser.parse_args()
+
+    with open(FIXTURE, 'rb') as fd:
+        xml = fd.read()
+
+    assert convert(xml, 'oaiarXiv2marcxml.xsl') == convert_without_cache(xml, STYLESHEET)
+
+    for label, function, xslt_filename in (
+        ('without cache', convert_without_cache, STYLESHEET),
+        ('with cache', convert, 'oaiarXiv2marcxml.xsl'),
+    ):
+        seconds = timeit.timeit(lambda: function(xml, xslt_filename), number=args.records)
+        print('{:<15} {:>8.2f} s {:>10.1f} records/s'.format(
+            label, seconds, args.records / seconds))
+
+
+if __name__ == '__main__':
+    main()
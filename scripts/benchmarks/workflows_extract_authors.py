@@ -0,0 +1,79 @@
+"""
+BENCHMARK THE EXTRACTION OF AUTHORS FROM AN AUTHOR LIST.
+
+Times ``inspirehep.modules.workflows.tasks.arxiv.extract_authors_from_xml``
+on a synthetic author list of a large collaboration, in the format of the
+``authors.xml`` files found in arXiv tarballs.
+
+Example:
+    $ python scripts/benchmarks/workflows_extract_authors.py --authors 3000 --organizations 300
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import timeit
+
+from inspirehep.modules.workflows.tasks.arxiv import extract_authors_from_xml
+
+HEADER = u'''<?xml version="1.0" encoding="UTF-8"?>
+<collaborationauthorlist
+    xmlns:foaf="http://xmlns.com/foaf/0.1/"
+    xmlns:cal="http://inspirehep.net/info/HepNames/tools/authors_xml/">
+'''
+
+ORGANIZATION = u'''  <foaf:Organization id="o{index}">
+    <cal:orgName source="spiresICN">Institute {index}</cal:orgName>
+    <cal:orgName source="ROR">0{index:08d}</cal:orgName>
+    <cal:orgName source="GRID">grid.{index}.1</cal:orgName>
+  </foaf:Organization>
+'''
+
+PERSON = u'''  <foaf:Person>
+    <foaf:givenName>Given{index}</foaf:givenName>
+    <foaf:familyName>Family{index}</foaf:familyName>
+    <cal:authorAffiliations>
+{affiliations}
+    </cal:authorAffiliations>
+    <cal:authorids>
+      <cal:authorid source="INSPIRE">INSPIRE-{index:08d}</cal:authorid>
+      <cal:authorid source="CCID">{index}</cal:authorid>
+    </cal:authorids>
+  </foaf:Person>
+'''
+
+AFFILIATION = u'      <cal:authorAffiliation organizationid="o{index}" connection="Affiliated with"/>'
+
+
+def make_author_list(authors, organizations, affiliations_per_author=3):
+    parts = [HEADER, u'<cal:organizations>\n']
+    parts.extend(ORGANIZATION.format(index=index) for index in range(organizations))
+    parts.append(u'</cal:organizations>\n<cal:authors>\n')
+    for index in range(authors):
+        affiliations = u'\n'.join(
+            AFFILIATION.format(index=(index + offset) % organizations)
+            for offset in range(affiliations_per_author)
+        )
+        parts.append(PERSON.format(index=index, affiliations=affiliations))
+    parts.append(u'</cal:authors>\n</collaborationauthorlist>\n')
+    return u''.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--authors', type=int, default=3000)
+    parser.add_argument('--organizations', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    xml = make_author_list(args.authors, args.organizations)
+
+    authors = extract_authors_from_xml(xml)
+    assert len(authors) == args.authors
+
+    seconds = min(timeit.repeat(lambda: extract_authors_from_xml(xml), number=1, repeat=args.repeat))
+    print('{} authors, {} organizations: {:.2f} s'.format(args.authors, args.organizations, seconds))
+
+
+if __name__ == '__main__':
+    main()
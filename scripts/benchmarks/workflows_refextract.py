@@ -0,0 +1,101 @@
+"""
+BENCHMARK THE REFERENCE EXTRACTION FROM A PDF AND FROM TEXT.
+
+Compares, for each paper of a corpus, the wall-clock time of extracting its
+references from the PDF and from the references given by the submitter one
+after the other, with running both extractions in the persistent pool of the
+``refextract`` workflow step. The pool is started once, before the corpus is
+timed, and its start-up cost is reported separately.
+
+The corpus is a directory of PDFs, ``NAME.pdf``, each with the references
+given by the submitter in ``NAME.txt``. Papers without a text file are
+skipped. The real ``pdftotext`` must be installed, as the PDF extraction
+relies on it.
+
+Example:
+    $ python scripts/benchmarks/workflows_refextract.py /data/refextract-corpus
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import glob
+import io
+import os
+import timeit
+
+from inspirehep.factory import create_app
+from inspirehep.modules.workflows.tasks.refextract import (
+    _get_refextract_pool,
+    _reset_refextract_pool,
+    extract_references_from_pdf,
+    extract_references_from_pdf_and_text,
+    extract_references_from_text,
+)
+
+
+def _noop():
+    pass
+
+
+def start_the_pool():
+    _reset_refextract_pool()
+    _get_refextract_pool().apply_async(_noop).get()
+
+
+def extract_in_series(filepath, text):
+    return (
+        extract_references_from_pdf(filepath, source='arXiv'),
+        extract_references_from_text(text, source='arXiv'),
+    )
+
+
+def extract_in_the_pool(filepath, text):
+    return extract_references_from_pdf_and_text(filepath, text, source='arXiv')
+
+
+def get_corpus(directory):
+    for filepath in sorted(glob.glob(os.path.join(directory, '*.pdf'))):
+        text_path = os.path.splitext(filepath)[0] + '.txt'
+        if not os.path.exists(text_path):
+            continue
+        with io.open(text_path, encoding='utf-8') as fd:
+            yield filepath, fd.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', help='directory with NAME.pdf and NAME.txt files')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        start_up_seconds = min(timeit.repeat(start_the_pool, number=1, repeat=args.repeat))
+        print('{:<30} {:>10.2f} s'.format('pool start-up (once)', start_up_seconds))
+
+        row = '{:<30} {:>10} {:>10} {:>12} {:>12}'
+        print(row.format('paper', 'PDF refs', 'text refs', 'series (s)', 'pool (s)'))
+        series_total = pool_total = 0
+        for filepath, text in get_corpus(args.corpus):
+            pdf_references, text_references = extract_in_series(filepath, text)
+            series_seconds = min(timeit.repeat(
+                lambda: extract_in_series(filepath, text), number=1, repeat=args.repeat))
+            pool_seconds = min(timeit.repeat(
+                lambda: extract_in_the_pool(filepath, text), number=1, repeat=args.repeat))
+            series_total += series_seconds
+            pool_total += pool_seconds
+            print(row.format(
+                os.path.basename(filepath),
+                len(pdf_references),
+                len(text_references),
+                '{:.2f}'.format(series_seconds),
+                '{:.2f}'.format(pool_seconds),
+            ))
+
+        print(row.format(
+            'total', '', '', '{:.2f}'.format(series_total), '{:.2f}'.format(pool_total)))
+
+
+if __name__ == '__main__':
+    main()
@@ -139,6 +139,7 @@ setup(
             'inspire_orcid = inspirehep.modules.orcid.tasks',
             'inspire_records = inspirehep.modules.records.tasks',
             'inspire_refextract = inspirehep.modules.refextract.tasks',
+            'inspire_workflows = inspirehep.modules.workflows.tasks.webcoll',
         ],
         'invenio_db.alembic': [
             'inspirehep = inspirehep:alembic',
@@ -23,6 +23,7 @@
 from __future__ import absolute_import, division, print_function
 
 import pytest
+from flask import current_app, has_app_context
 
 
 IS_VCR_ENABLED = True
@@ -59,3 +60,15 @@ def assert_all_played(request, vcr_cassette):
     yield
     if IS_VCR_ENABLED and IS_VCR_EPISODE_OR_ERROR and vcr_cassette:
         assert vcr_cassette.all_played
+
+
+@pytest.fixture(autouse=True, scope='function')
+def clear_http_clients():
+    """Drop the connections pooled by the HTTP clients during the test.
+
+    They were opened under the cassette of the current test, and must not be
+    reused by the following ones.
+    """
+    yield
+    if has_app_context():
+        current_app.extensions['inspire-utils'].http_clients.clear()
@@ -473,26 +473,29 @@ def test_match_reference_doesnt_touch_curated(isolated_app):
 
 
 @patch(
-    'inspirehep.modules.refextract.matcher.match',
-    return_value=[
-        {
-            '_score': 1.6650109,
-            '_type': 'hep',
-            '_id': 'AWRuwf9plgR0Y_yvhtt4',
-            '_source': {'control_number': 1},
-            '_index': 'records-hep'
-        },
-        {
-            '_score': 3.2345618,
-            '_type': 'hep',
-            '_id': 'AWRuwf9plgR0Y_yvhtt4',
-            '_source': {'control_number': 1},
-            '_index': 'records-hep'
-        }
+    'inspirehep.modules.refextract.matcher._msearch',
+    side_effect=lambda searches: [
+        [
+            {
+                '_score': 1.6650109,
+                '_type': 'hep',
+                '_id': 'AWRuwf9plgR0Y_yvhtt4',
+                '_source': {'control_number': 1},
+                '_index': 'records-hep'
+            },
+            {
+                '_score': 3.2345618,
+                '_type': 'hep',
+                '_id': 'AWRuwf9plgR0Y_yvhtt4',
+                '_source': {'control_number': 1},
+                '_index': 'records-hep'
+            }
+        ]
+        for _ in searches
     ],
 )
 def test_match_references_finds_match_when_repeated_record_with_different_scores(
-    mocked_inspire_matcher_match,
+    mocked_msearch,
     isolated_app
 ):
     references = [
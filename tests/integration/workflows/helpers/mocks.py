@@ -28,7 +28,7 @@ import os
 import pkg_resources
 
 
-def fake_download_file(workflow, name, url):
+def fake_download_file(workflow, name, url, service=None):
     """Mock download_file_to_workflow func."""
     if url == 'http://export.arxiv.org/e-print/1407.7587':
         workflow.files[name] = pkg_resources.resource_stream(
@@ -67,10 +67,11 @@ from workflow_utils import build_workflow
 from mock import patch
 
 
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link")
-def get_halted_workflow(mocked_is_pdf_link, app, record, extra_config=None):
-    mocked_is_pdf_link.return_value = True
-
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
+def get_halted_workflow(mocked_pdf_download, app, record, extra_config=None):
     extra_config = extra_config or {}
     with mock.patch.dict(app.config, extra_config):
         workflow_id = build_workflow(record).id
@@ -125,7 +126,10 @@ def get_halted_workflow(mocked_is_pdf_link, app, record, extra_config=None):
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link")
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
@@ -147,7 +151,7 @@ def test_harvesting_arxiv_workflow_manual_rejected(
     mocked_api_request_magpie,
     mocked_classifier_api,
     mocked_actions_download,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_arxiv_download,
     workflow_app,
     mocked_external_services,
@@ -186,10 +190,13 @@ def test_harvesting_arxiv_workflow_manual_rejected(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
 @mock.patch(
-    'inspirehep.modules.workflows.tasks.arxiv.is_pdf_link',
-    return_value=True
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
+@mock.patch(
+    'inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow',
+    side_effect=fake_download_file,
 )
 @mock.patch(
     'inspirehep.modules.workflows.tasks.classifier.json_api_request',
@@ -207,7 +214,7 @@ def test_harvesting_arxiv_workflow_core_record_auto_accepted(
     mocked_refextract_extract_refs,
     mocked_api_request_magpie,
     mocked_api_request_classifier,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_package_download,
     mocked_arxiv_download,
     workflow_app,
@@ -302,7 +309,10 @@ def test_harvesting_arxiv_workflow_manual_accepted(
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
@@ -319,7 +329,7 @@ def test_match_in_holdingpen_stops_pending_wf(
     mocked_api_request_magpie,
     mocked_api_request_classifier,
     mocked_package_download,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_download_arxiv,
     workflow_app,
     mocked_external_services,
@@ -366,7 +376,10 @@ def test_match_in_holdingpen_stops_pending_wf(
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
@@ -383,7 +396,7 @@ def test_match_in_holdingpen_previously_rejected_wf_stop(
     mocked_api_request_magpie,
     mocked_api_request_classifier,
     mocked_package_download,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_download_arxiv,
     workflow_app,
     mocked_external_services,
@@ -482,9 +495,12 @@ def test_article_workflow_continues_when_record_is_valid(
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 def test_update_exact_matched_goes_trough_the_workflow(
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_download_arxiv,
     mocked_api_request_classifier,
     mocked_api_request_magpie,
@@ -521,9 +537,12 @@ def test_update_exact_matched_goes_trough_the_workflow(
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 def test_fuzzy_matched_goes_trough_the_workflow(
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_download_arxiv,
     mocked_api_request_classifier,
     mocked_api_request_magpie,
@@ -762,10 +781,13 @@ def test_validation_error_callback_with_malformed_with_invalid_types(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
 @mock.patch(
-    'inspirehep.modules.workflows.tasks.arxiv.is_pdf_link',
-    return_value=True
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
+@mock.patch(
+    'inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow',
+    side_effect=fake_download_file,
 )
 @mock.patch(
     'inspirehep.modules.workflows.tasks.classifier.json_api_request',
@@ -783,7 +805,7 @@ def test_keep_previously_rejected_from_fully_harvested_category_is_auto_approved
         mocked_refextract_extract_refs,
         mocked_api_request_magpie,
         mocked_api_request_classifier,
-        mocked_is_pdf_link,
+        mocked_pdf_download,
         mocked_package_download,
         mocked_arxiv_download,
         workflow_app,
@@ -821,10 +843,13 @@ def test_keep_previously_rejected_from_fully_harvested_category_is_auto_approved
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
 @mock.patch(
-    'inspirehep.modules.workflows.tasks.arxiv.is_pdf_link',
-    return_value=True
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
+@mock.patch(
+    'inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow',
+    side_effect=fake_download_file,
 )
 @mock.patch(
     'inspirehep.modules.workflows.tasks.classifier.json_api_request',
@@ -842,7 +867,7 @@ def test_previously_rejected_from_not_fully_harvested_category_is_not_auto_appro
         mocked_refextract_extract_refs,
         mocked_api_request_magpie,
         mocked_api_request_classifier,
-        mocked_is_pdf_link,
+        mocked_pdf_download,
         mocked_package_download,
         mocked_arxiv_download,
         workflow_app,
@@ -926,10 +951,13 @@ def test_start_wf_with_no_source_data_fails(workflow_app):
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
 @mock.patch(
-    'inspirehep.modules.workflows.tasks.arxiv.is_pdf_link',
-    return_value=True
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
+@mock.patch(
+    'inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow',
+    side_effect=fake_download_file,
 )
 @mock.patch(
     'inspirehep.modules.workflows.tasks.classifier.json_api_request',
@@ -947,7 +975,7 @@ def test_do_not_repeat(
     mocked_refextract_extract_refs,
     mocked_api_request_magpie,
     mocked_api_request_classifier,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_package_download,
     mocked_arxiv_download,
     workflow_app,
@@ -1136,8 +1164,8 @@ def test_workflow_without_validation_error(
     side_effect=fake_download_file,
 )
 @mock.patch(
-    'inspirehep.modules.workflows.tasks.arxiv.is_pdf_link',
-    return_value=True
+    'inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow',
+    side_effect=fake_download_file,
 )
 @mock.patch(
     'inspirehep.modules.workflows.tasks.classifier.json_api_request',
@@ -1150,7 +1178,7 @@ def test_workflow_without_validation_error(
 def test_workflow_restart_count_initialized_properly(
     mocked_api_request_magpie,
     mocked_api_request_classifier,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_package_download,
     mocked_arxiv_download,
     workflow_app,
@@ -1183,8 +1211,8 @@ def test_workflow_restart_count_initialized_properly(
     side_effect=fake_download_file,
 )
 @mock.patch(
-    'inspirehep.modules.workflows.tasks.arxiv.is_pdf_link',
-    return_value=True
+    'inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow',
+    side_effect=fake_download_file,
 )
 @mock.patch(
     'inspirehep.modules.workflows.tasks.actions.download_file_to_workflow',
@@ -1206,7 +1234,7 @@ def test_match_in_holdingpen_different_sources_continues(
     mocked_api_request_magpie,
     mocked_api_request_classifier,
     mocked_package_download,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_download_arxiv,
     workflow_app,
     mocked_external_services,
@@ -1250,9 +1278,12 @@ def test_match_in_holdingpen_different_sources_continues(
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 def test_update_record_goes_through_api_version_of_store_record_without_issue(
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_download_arxiv,
     mocked_api_request_classifier,
     mocked_api_request_magpie,
@@ -1324,14 +1355,17 @@ def connection_error(*args, **kwargs):
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.upload.requests.put",
     side_effect=connection_error
 )
 def test_update_record_goes_through_api_version_of_store_record_wrong_api_address(
     mocked_request_in_upload,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_download_arxiv,
     mocked_api_request_classifier,
     mocked_api_request_magpie,
@@ -1371,14 +1405,17 @@ def connection_timeout(*args, **kwargs):
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.upload.requests.put",
     side_effect=connection_timeout
 )
 def test_update_record_goes_through_api_version_of_store_record_connection_timeout(
     mocked_request_in_upload,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_download_arxiv,
     mocked_api_request_classifier,
     mocked_api_request_magpie,
@@ -1406,7 +1443,10 @@ def test_update_record_goes_through_api_version_of_store_record_connection_timeo
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link")
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
@@ -1432,7 +1472,7 @@ def test_workflow_checks_affiliations_if_record_is_not_important(
     mocked_api_request_magpie,
     mocked_api_request_classifier,
     mocked_actions_download,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_arxiv_download,
     workflow_app,
     mocked_external_services,
@@ -1459,7 +1499,10 @@ def test_workflow_checks_affiliations_if_record_is_not_important(
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link")
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
@@ -1480,7 +1523,7 @@ def test_workflow_do_not_changes_to_hidden_if_record_authors_do_not_have_interes
     mocked_api_request_magpie,
     mocked_api_request_classifier,
     mocked_actions_download,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_arxiv_download,
     workflow_app,
     mocked_external_services,
@@ -1509,7 +1552,10 @@ def test_workflow_do_not_changes_to_hidden_if_record_authors_do_not_have_interes
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link")
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
@@ -1535,7 +1581,7 @@ def test_workflow_checks_affiliations_if_record_is_rejected_by_curator(
     mocked_api_request_magpie,
     mocked_api_request_classifier,
     mocked_actions_download,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_arxiv_download,
     workflow_app,
     mocked_external_services,
@@ -1566,7 +1612,10 @@ def test_workflow_checks_affiliations_if_record_is_rejected_by_curator(
     "inspirehep.modules.workflows.tasks.arxiv.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link")
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
@@ -1588,7 +1637,7 @@ def test_grobid_extracts_authors_correctly(
     mocked_api_request_magpie,
     mocked_api_request_classifier,
     mocked_actions_download,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_arxiv_download,
     workflow_app,
     mocked_external_services,
@@ -24,6 +24,7 @@ from __future__ import absolute_import, division, print_function
 
 import json
 import mock as mock
+import pytest
 import time
 from copy import deepcopy
 import requests_mock
@@ -39,6 +40,7 @@ from workflow_utils import build_workflow
 from invenio_workflows import ObjectStatus
 from utils import override_config
 
+from inspirehep.modules.workflows.models import WorkflowsPendingRecord
 from inspirehep.modules.workflows.tasks.actions import create_core_selection_wf
 
 
@@ -717,3 +719,40 @@ def test_core_selection_cannot_complete_when_wf_is_not_halted(workflow_app):
     assert result.status_code == 405
     assert result_json == expected_response
     assert WorkflowObjectModel.query.filter(WorkflowObjectModel.workflow.has(name="core_selection")).one().status == ObjectStatus.RUNNING
+
+
+@patch('inspirehep.modules.workflows.tasks.webcoll.resume')
+def test_webcoll_callback_continues_the_pending_workflows(mock_resume, workflow_app):
+    workflow = build_workflow({}, data_type='hep')
+    db.session.add(WorkflowsPendingRecord(workflow_id=workflow.id, record_id=1234))
+    db.session.commit()
+
+    with workflow_app.test_client() as client:
+        response = client.post(
+            '/callback/workflows/webcoll',
+            data={'recids': [1234, 5678]},
+            content_type='application/x-www-form-urlencoded',
+        )
+
+    assert response.status_code == 200
+    assert json.loads(response.data)['recids'] == [1234]
+    assert WorkflowsPendingRecord.query.count() == 0
+    assert workflow_object_class.get(workflow.id).extra_data['recid'] == 1234
+    mock_resume.delay.assert_called_once_with(workflow.id, 'continue_next')
+
+
+@patch('inspirehep.modules.workflows.views.continue_workflows_after_webcoll')
+def test_webcoll_callback_keeps_the_pending_records_if_the_job_is_not_sent(mock_continue, workflow_app):
+    mock_continue.delay.side_effect = IOError('Broker unavailable')
+    workflow = build_workflow({}, data_type='hep')
+    db.session.add(WorkflowsPendingRecord(workflow_id=workflow.id, record_id=1234))
+    db.session.commit()
+
+    with workflow_app.test_client() as client, pytest.raises(IOError):
+        client.post(
+            '/callback/workflows/webcoll',
+            data={'recids': [1234]},
+            content_type='application/x-www-form-urlencoded',
+        )
+
+    assert WorkflowsPendingRecord.query.count() == 1
@@ -90,6 +90,18 @@ def test_cli_restart_by_error_restarts_one_wf_from_beginning(
     assert 'Found 2 workflows to restart from first step\n' in output
 
 
+def test_cli_restart_by_error_dry_run_does_not_restart(app_cli_runner):
+    obj = build_workflow({}, data_type='hep')
+    obj.status = ObjectStatus.ERROR
+    obj.extra_data["_error_msg"] = "Error in 100% of WebColl calls"
+    obj.save()
+
+    result = app_cli_runner.invoke(workflows, ['restart_by_error', '100% of WebColl', '--dry-run'])
+
+    assert 'Found 1 workflows to restart from current step\n' in result.output_bytes
+    assert workflow_object_class.get(obj.id).status == ObjectStatus.ERROR
+
+
 @freeze_time("2020-07-11")
 def test_cli_delete_edit_article_workflows(app_cli_runner):
 
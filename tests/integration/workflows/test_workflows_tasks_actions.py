@@ -46,6 +46,7 @@ from inspirehep.modules.workflows.tasks.actions import (
     link_institutions_with_affiliations, load_from_source_data,
     normalize_author_affiliations, normalize_collaborations, normalize_journal_titles,
     refextract, replace_collection_to_hidden, update_inspire_categories)
+from inspirehep.utils.journals import invalidate_journal_kb
 
 
 @pytest.fixture(scope="function")
@@ -63,6 +64,13 @@ def insert_journals_in_db(workflow_app):
         pid_type="jou",
         index_name="records-journals",
     )
+    # The journals are not committed, so the journal titles index is not
+    # invalidated by the receiver.
+    invalidate_journal_kb()
+
+    yield
+
+    invalidate_journal_kb()
 
 
 @pytest.fixture(scope="function")
@@ -503,7 +511,10 @@ def test_dont_update_inspire_categories(workflow_app):
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.classifier.json_api_request",
     side_effect=fake_classifier_api_request,
@@ -519,7 +530,7 @@ def test_refextract_from_pdf(
     mocked_indexing_task,
     mocked_api_request_magpie,
     mocked_api_request_classifier,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_package_download,
     mocked_arxiv_download,
     workflow_app,
@@ -590,7 +601,10 @@ def test_refextract_from_pdf(
     "inspirehep.modules.workflows.tasks.actions.download_file_to_workflow",
     side_effect=fake_download_file,
 )
-@mock.patch("inspirehep.modules.workflows.tasks.arxiv.is_pdf_link", return_value=True)
+@mock.patch(
+    "inspirehep.modules.workflows.tasks.arxiv.download_pdf_to_workflow",
+    side_effect=fake_download_file,
+)
 @mock.patch(
     "inspirehep.modules.workflows.tasks.classifier.json_api_request",
     side_effect=fake_classifier_api_request,
@@ -606,7 +620,7 @@ def test_count_reference_coreness(
     mocked_indexing_task,
     mocked_api_request_magpie,
     mocked_api_request_classifier,
-    mocked_is_pdf_link,
+    mocked_pdf_download,
     mocked_package_download,
     mocked_arxiv_download,
     workflow_app,
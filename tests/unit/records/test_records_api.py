@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from flask import current_app
+from mock import patch
+
+from inspirehep.modules.records.api import _download_files
+
+
+def test_download_files_keeps_the_order_and_the_errors(tmpdir):
+    sources = tmpdir.mkdir('sources')
+    for name in ('a.pdf', 'b.png', 'c.png'):
+        sources.join(name).write(name)
+    urls = [
+        str(sources.join('a.pdf')),
+        str(sources.join('missing.png')),
+        'file://' + str(sources.join('c.png')),
+    ]
+    config = {
+        'RECORDS_DOWNLOAD_THREADS': 2,
+        'RECORDS_DOWNLOAD_THREADS_PER_HOST': 1,
+    }
+
+    with patch.dict(current_app.config, config):
+        downloads = list(_download_files(urls, str(tmpdir.mkdir('downloads'))))
+
+    with open(downloads[0]) as fd:
+        assert fd.read() == 'a.pdf'
+    assert isinstance(downloads[1], Exception)
+    with open(downloads[2]) as fd:
+        assert fd.read() == 'c.png'
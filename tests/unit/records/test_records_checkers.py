@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2018 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+from mock import MagicMock, patch
+
+from inspirehep.modules.records.checkers import (
+    compare_citation_counts,
+    find_missing_and_orphan_records,
+    get_es_citation_counts,
+)
+from inspirehep.modules.records.errors import IncompleteCitationCountsError
+
+
+def test_find_missing_and_orphan_records():
+    db_records = [
+        ('0a000000-0000-0000-0000-000000000000', '1'),
+        ('1b000000-0000-0000-0000-000000000000', '2'),
+        ('3d000000-0000-0000-0000-000000000000', '4'),
+        ('4e000000-0000-0000-0000-000000000000', '5'),
+    ]
+    es_uuids = [
+        '0a000000-0000-0000-0000-000000000000',
+        '2c000000-0000-0000-0000-000000000000',
+        '3d000000-0000-0000-0000-000000000000',
+        '5f000000-0000-0000-0000-000000000000',
+    ]
+
+    expected = [
+        ('missing', '1b000000-0000-0000-0000-000000000000', '2'),
+        ('orphan', '2c000000-0000-0000-0000-000000000000', None),
+        ('missing', '4e000000-0000-0000-0000-000000000000', '5'),
+        ('orphan', '5f000000-0000-0000-0000-000000000000', None),
+    ]
+    result = list(find_missing_and_orphan_records(db_records, es_uuids))
+
+    assert expected == result
+
+
+def test_find_missing_and_orphan_records_with_empty_es():
+    db_records = [('0a000000-0000-0000-0000-000000000000', '1')]
+
+    expected = [('missing', '0a000000-0000-0000-0000-000000000000', '1')]
+    result = list(find_missing_and_orphan_records(db_records, []))
+
+    assert expected == result
+
+
+def test_compare_citation_counts():
+    db_records = [('uuid-1', '1'), ('uuid-2', '2'), ('uuid-3', '3'), ('uuid-4', '4')]
+    db_counts = {1: 2, 3: 1}
+    es_counts = {1: 2, 3: 2}
+    es_fields = {1: 2, 2: 0, 3: 1}
+
+    expected = [
+        (True, False, {}),
+        (True, True, {}),
+        (False, False, {
+            'pid_value': '3',
+            'db_citations_count': 1,
+            'es_citations_count': 2,
+            'es_citations_field': 1,
+        }),
+        (False, False, {
+            'pid_value': '4',
+            'db_citations_count': 0,
+            'es_citations_count': 0,
+            'es_citations_field': None,
+        }),
+    ]
+    result = list(compare_citation_counts(db_records, db_counts, es_counts, es_fields))
+
+    assert expected == result
+
+
+def _mock_citations_search(mock_literature_search, citations):
+    search = MagicMock()
+    search.query.return_value.extra.return_value = search
+    search.execute.return_value.aggregations.citations = citations
+    mock_literature_search.return_value = search
+    return search
+
+
+@patch('inspirehep.modules.records.checkers.LiteratureSearch')
+def test_get_es_citation_counts(mock_literature_search):
+    citations = MagicMock(sum_other_doc_count=0, buckets=[MagicMock(key=1, doc_count=3)])
+    search = _mock_citations_search(mock_literature_search, citations)
+
+    result = get_es_citation_counts(num_partitions=2)
+
+    assert result == {1: 3}
+    assert search.execute.call_count == 2
+
+
+@patch('inspirehep.modules.records.checkers.LiteratureSearch')
+def test_get_es_citation_counts_raises_when_a_partition_is_incomplete(mock_literature_search):
+    citations = MagicMock(sum_other_doc_count=10, buckets=[])
+    _mock_citations_search(mock_literature_search, citations)
+
+    with pytest.raises(IncompleteCitationCountsError):
+        get_es_citation_counts(num_partitions=1)
+
+
+@patch('inspirehep.modules.records.checkers.LiteratureSearch')
+def test_get_es_citation_counts_computes_the_partitions_from_the_cited_records(mock_literature_search):
+    citations = MagicMock(sum_other_doc_count=0, buckets=[])
+    search = _mock_citations_search(mock_literature_search, citations)
+    search.execute.return_value.aggregations.cited_records.value = 25000
+
+    get_es_citation_counts()
+
+    assert search.execute.call_count == 1 + 6
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+from flask import current_app
+from mock import patch
+from werkzeug.contrib.cache import SimpleCache
+
+from inspirehep.modules.refextract.matcher import (
+    get_reference_fingerprint,
+    invalidate_reference_matches,
+    match_references,
+)
+
+
+@pytest.fixture
+def reference_matcher_cache():
+    cache = SimpleCache()
+    config = {
+        'FEATURE_FLAG_ENABLE_REFERENCE_MATCHER_CACHE': True,
+        'REFERENCE_MATCHER_CACHE_TIMEOUT': 600,
+        'REFERENCE_MATCHER_NEGATIVE_CACHE_TIMEOUT': 60,
+    }
+    with patch('inspirehep.modules.refextract.matcher.current_cache', cache), \
+            patch.dict(current_app.config, config):
+        yield cache
+
+
+def _response(*recids):
+    return {
+        'hits': {
+            'hits': [{'_source': {'control_number': recid}} for recid in recids],
+        },
+    }
+
+
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_sends_the_searches_of_each_config_at_once(es):
+    es.msearch.side_effect = [
+        {'responses': [_response(1), _response(1, 2)]},
+        {'responses': [_response()]},
+    ]
+    references = [
+        {'reference': {'dois': ['10.1000/a']}},
+        {'reference': {'dois': ['10.1000/b']}},
+    ]
+
+    result = match_references(references)
+
+    assert es.msearch.call_count == 2
+    assert len(es.msearch.call_args_list[0][1]['body']) == 4
+    assert len(es.msearch.call_args_list[1][1]['body']) == 2
+    assert result[0]['record'] == {'$ref': 'http://localhost:5000/api/literature/1'}
+    assert result[1]['record'] == {'$ref': 'http://localhost:5000/api/literature/1'}
+
+
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_only_tries_next_config_on_unresolved_references(es):
+    es.msearch.side_effect = [
+        {'responses': [_response(1), _response()]},
+        {'responses': [_response(7)]},
+    ]
+    references = [
+        {'reference': {'dois': ['10.1000/a']}},
+        {'reference': {'dois': ['10.1000/b']}},
+    ]
+
+    result = match_references(references)
+
+    assert len(es.msearch.call_args_list[1][1]['body']) == 2
+    assert result[0]['record'] == {'$ref': 'http://localhost:5000/api/literature/1'}
+    assert result[1]['record'] == {'$ref': 'http://localhost:5000/api/data/7'}
+
+
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_does_not_use_a_later_match_as_previous(es):
+    es.msearch.side_effect = [
+        {'responses': [_response(1, 2), _response(2)]},
+        {'responses': [_response()]},
+    ]
+    references = [
+        {'reference': {'dois': ['10.1000/a']}},
+        {'reference': {'dois': ['10.1000/b']}},
+    ]
+
+    result = match_references(references, previous_matched_recid=3)
+
+    assert 'record' not in result[0]
+    assert result[1]['record'] == {'$ref': 'http://localhost:5000/api/literature/2'}
+
+
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_skips_curated_references(es):
+    references = [
+        {
+            'curated_relation': True,
+            'record': {'$ref': 'http://localhost:5000/api/literature/1'},
+            'reference': {'dois': ['10.1000/a']},
+        },
+    ]
+
+    result = match_references(references)
+
+    es.msearch.assert_not_called()
+    assert result == references
+
+
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_casts_the_year_back_to_int(es):
+    es.msearch.side_effect = [
+        {'responses': [_response(1)]},
+    ]
+    references = [
+        {
+            'reference': {
+                'dois': ['10.1000/a'],
+                'publication_info': {'year': '2007'},
+            },
+        },
+    ]
+
+    result = match_references(references)
+
+    assert result[0]['reference']['publication_info']['year'] == 2007
+
+
+def test_get_reference_fingerprint_ignores_order_and_year_type():
+    reference = {
+        'reference': {
+            'dois': ['10.1000/a', '10.1000/b'],
+            'publication_info': {'year': 2007},
+        },
+    }
+    same_reference = {
+        'reference': {
+            'dois': ['10.1000/b', '10.1000/a'],
+            'publication_info': {'year': '2007'},
+        },
+    }
+
+    assert get_reference_fingerprint(reference) == get_reference_fingerprint(same_reference)
+    assert get_reference_fingerprint({'reference': {'title': {'title': 'Foo'}}}) is None
+
+
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_reuses_cached_matches(es, reference_matcher_cache):
+    es.msearch.side_effect = [
+        {'responses': [_response(1)]},
+    ]
+
+    match_references([{'reference': {'dois': ['10.1000/a']}}])
+    result = match_references([{'reference': {'dois': ['10.1000/a']}}])
+
+    assert es.msearch.call_count == 1
+    assert result[0]['record'] == {'$ref': 'http://localhost:5000/api/literature/1'}
+
+
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_caches_references_without_matches(es, reference_matcher_cache):
+    es.msearch.side_effect = [
+        {'responses': [_response()]},
+        {'responses': [_response()]},
+    ]
+
+    match_references([{'reference': {'dois': ['10.1000/a']}}])
+    result = match_references([{'reference': {'dois': ['10.1000/a']}}])
+
+    assert es.msearch.call_count == 2
+    assert 'record' not in result[0]
+
+
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_does_not_cache_ambiguous_matches(es, reference_matcher_cache):
+    es.msearch.side_effect = [
+        {'responses': [_response(1, 2)]},
+        {'responses': [_response()]},
+        {'responses': [_response(1, 2)]},
+        {'responses': [_response()]},
+    ]
+
+    match_references([{'reference': {'dois': ['10.1000/a']}}], previous_matched_recid=1)
+    result = match_references([{'reference': {'dois': ['10.1000/a']}}], previous_matched_recid=2)
+
+    assert es.msearch.call_count == 4
+    assert result[0]['record'] == {'$ref': 'http://localhost:5000/api/literature/2'}
+
+
+@patch('inspirehep.modules.refextract.matcher.es')
+def test_match_references_ignores_matches_to_invalidated_records(es, reference_matcher_cache):
+    es.msearch.side_effect = [
+        {'responses': [_response(1)]},
+        {'responses': [_response(2)]},
+    ]
+
+    match_references([{'reference': {'dois': ['10.1000/a']}}])
+    invalidate_reference_matches(1)
+    result = match_references([{'reference': {'dois': ['10.1000/a']}}])
+
+    assert es.msearch.call_count == 2
+    assert result[0]['record'] == {'$ref': 'http://localhost:5000/api/literature/2'}
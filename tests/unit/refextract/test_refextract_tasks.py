@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+from mock import patch
+from werkzeug.contrib.cache import SimpleCache
+
+from inspirehep.modules.refextract.tasks import get_journal_kb_dict
+from inspirehep.utils.journals import invalidate_journal_kb
+
+
+@pytest.fixture
+def journal_kb_cache():
+    cache = SimpleCache()
+    journal_kb = {'version': None, 'kb_dict': None}
+    with patch('inspirehep.modules.refextract.tasks.current_cache', cache), \
+            patch('inspirehep.utils.journals.current_cache', cache), \
+            patch.dict('inspirehep.modules.refextract.tasks._journal_kb', journal_kb):
+        yield cache
+
+
+@patch('inspirehep.modules.refextract.tasks.create_journal_kb_dict')
+def test_get_journal_kb_dict_builds_it_once(create_journal_kb_dict, journal_kb_cache):
+    create_journal_kb_dict.return_value = {'JHEP': 'JHEP'}
+
+    assert get_journal_kb_dict() == {'JHEP': 'JHEP'}
+    assert get_journal_kb_dict() == {'JHEP': 'JHEP'}
+    assert create_journal_kb_dict.call_count == 1
+
+
+@patch('inspirehep.modules.refextract.tasks.create_journal_kb_dict')
+def test_get_journal_kb_dict_reloads_it_after_invalidation(create_journal_kb_dict, journal_kb_cache):
+    create_journal_kb_dict.side_effect = [
+        {'JHEP': 'JHEP'},
+        {'JHEP': 'JHEP', 'PHYS REV D': 'Phys.Rev.D'},
+    ]
+
+    get_journal_kb_dict()
+    invalidate_journal_kb()
+
+    assert get_journal_kb_dict() == {'JHEP': 'JHEP', 'PHYS REV D': 'Phys.Rev.D'}
+    assert create_journal_kb_dict.call_count == 2
+
+
+@patch('inspirehep.modules.refextract.tasks.create_journal_kb_dict')
+def test_get_journal_kb_dict_reads_the_version_built_by_another_worker(create_journal_kb_dict, journal_kb_cache):
+    create_journal_kb_dict.return_value = {'JHEP': 'JHEP'}
+    get_journal_kb_dict()
+
+    with patch.dict(
+        'inspirehep.modules.refextract.tasks._journal_kb',
+        {'version': None, 'kb_dict': None},
+    ):
+        assert get_journal_kb_dict() == {'JHEP': 'JHEP'}
+
+    assert create_journal_kb_dict.call_count == 1
@@ -539,7 +539,7 @@ def test_proceedings_link_returns_empty_string_without_cnum():
     assert expected == result
 
 
-@patch('inspirehep.modules.theme.jinja2filters.LiteratureSearch.execute')
+@patch('inspirehep.modules.theme.lookups.LiteratureSearch.execute')
 def test_proceedings_link_returns_empty_string_with_zero_search_results(c, mock_perform_es_search_empty):
     c.return_value = mock_perform_es_search_empty
 
@@ -551,7 +551,7 @@ def test_proceedings_link_returns_empty_string_with_zero_search_results(c, mock_
     assert expected == result
 
 
-@patch('inspirehep.modules.theme.jinja2filters.LiteratureSearch.execute')
+@patch('inspirehep.modules.theme.lookups.LiteratureSearch.execute')
 def test_proceedings_link_returns_a_link_with_one_search_result(c, mock_perform_es_search_onerecord):
     c.return_value = mock_perform_es_search_onerecord
 
@@ -563,7 +563,7 @@ def test_proceedings_link_returns_a_link_with_one_search_result(c, mock_perform_
     assert expected == result
 
 
-@patch('inspirehep.modules.theme.jinja2filters.LiteratureSearch.execute')
+@patch('inspirehep.modules.theme.lookups.LiteratureSearch.execute')
 def test_proceedings_link_joins_with_a_comma_and_a_space(s, mock_perform_es_search_tworecord):
     s.return_value = mock_perform_es_search_tworecord
 
@@ -623,7 +623,7 @@ def test_link_to_hep_affiliation_returns_empty_string_when_record_has_no_ICN():
     assert expected == result
 
 
-@patch('inspirehep.modules.theme.jinja2filters.InstitutionsSearch.execute')
+@patch('inspirehep.modules.theme.lookups.InstitutionsSearch.execute')
 def test_link_to_hep_affiliation_returns_empty_string_when_empty_results(s, mock_perform_es_search_empty):
     s.return_value = mock_perform_es_search_empty
 
@@ -635,7 +635,7 @@ def test_link_to_hep_affiliation_returns_empty_string_when_empty_results(s, mock
     assert expected == result
 
 
-@patch('inspirehep.modules.theme.jinja2filters.InstitutionsSearch.execute')
+@patch('inspirehep.modules.theme.lookups.InstitutionsSearch.execute')
 def test_link_to_hep_affiliation_singular_when_one_result(s, mock_perform_es_search_onerecord):
     s.return_value = mock_perform_es_search_onerecord
 
@@ -647,7 +647,7 @@ def test_link_to_hep_affiliation_singular_when_one_result(s, mock_perform_es_sea
     assert expected == result
 
 
-@patch('inspirehep.modules.theme.jinja2filters.InstitutionsSearch.execute')
+@patch('inspirehep.modules.theme.lookups.InstitutionsSearch.execute')
 def test_link_to_hep_affiliation_plural_when_more_results(s, mock_perform_es_search_tworecord):
     s.return_value = mock_perform_es_search_tworecord
 
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from elasticsearch_dsl import response, search
+from mock import patch
+
+from inspirehep.modules.theme.jinja2filters import (
+    link_to_hep_affiliation,
+    proceedings_link,
+)
+from inspirehep.modules.theme.lookups import get_lookup
+
+
+def _make_response(total, sources=()):
+    return response.Response(
+        search.Search(),
+        {
+            'hits': {
+                'hits': [
+                    {'_index': 'records-hep', '_id': str(i), '_source': source}
+                    for i, source in enumerate(sources)
+                ],
+                'total': total,
+            },
+        },
+    )
+
+
+@patch('inspirehep.modules.theme.lookups.LiteratureSearch.execute')
+@patch('inspirehep.modules.theme.lookups.InstitutionsSearch.execute')
+def test_filters_memoize_lookups_in_the_request(
+    institutions_execute, literature_execute, request_context,
+):
+    literature_execute.return_value = _make_response(1, [{'control_number': 1410174}])
+    institutions_execute.return_value = _make_response(2)
+
+    for _ in range(2):
+        assert proceedings_link({'cnum': 'banana'}) == \
+            '<a href="/record/1410174">Proceedings</a>'
+        assert link_to_hep_affiliation({'ICN': 'CERN'}) == '2 Papers from CERN'
+
+    assert literature_execute.call_count == 1
+    assert institutions_execute.call_count == 1
+
+
+@patch('inspirehep.modules.theme.lookups.InstitutionsSearch.execute')
+def test_get_lookup_does_not_memoize_outside_of_a_request(institutions_execute):
+    institutions_execute.return_value = _make_response(1)
+
+    get_lookup('hep_affiliation', 'CERN')
+    get_lookup('hep_affiliation', 'CERN')
+
+    assert institutions_execute.call_count == 2
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import io
+import os
+
+import requests_mock
+from mock import MagicMock, patch
+
+from inspirehep.utils.file_cache import CachedFile, FileCache, put_cached_file
+
+from mocks import MockFiles
+
+
+def test_file_cache_revalidates_cached_files(tmpdir):
+    file_cache = FileCache(str(tmpdir), max_size=1024)
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.register_uri(
+            'GET', 'http://export.arxiv.org/pdf/1605.03844', [
+                {'content': b'%PDF-1.4', 'headers': {'ETag': '"v1"'}},
+                {'status_code': 304},
+            ])
+
+        first = file_cache.fetch('http://export.arxiv.org/pdf/1605.03844')
+        second = file_cache.fetch('http://export.arxiv.org/pdf/1605.03844')
+
+        assert requests_mocker.last_request.headers['If-None-Match'] == '"v1"'
+
+    assert first == second
+    assert first.checksum == 'md5:' + hashlib.md5(b'%PDF-1.4').hexdigest()
+    with open(second.path, 'rb') as fd:
+        assert fd.read() == b'%PDF-1.4'
+
+
+def test_file_cache_stores_identical_files_once(tmpdir):
+    file_cache = FileCache(str(tmpdir), max_size=1024)
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.register_uri('GET', 'http://export.arxiv.org/pdf/1605.03844v1', content=b'%PDF-1.4')
+        requests_mocker.register_uri('GET', 'http://export.arxiv.org/pdf/1605.03844v2', content=b'%PDF-1.4')
+
+        first = file_cache.fetch('http://export.arxiv.org/pdf/1605.03844v1')
+        second = file_cache.fetch('http://export.arxiv.org/pdf/1605.03844v2')
+
+    assert first.path == second.path
+    assert len(os.listdir(os.path.dirname(first.path))) == 1
+
+
+def test_file_cache_removes_the_least_recently_used_files(tmpdir):
+    file_cache = FileCache(str(tmpdir), max_size=10)
+
+    with requests_mock.Mocker() as requests_mocker:
+        for name in ('a', 'b', 'c'):
+            requests_mocker.register_uri(
+                'GET', 'http://example.org/' + name, content=name * 4,
+                headers={'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'},
+            )
+
+        a = file_cache.fetch('http://example.org/a')
+        b = file_cache.fetch('http://example.org/b')
+        os.utime(a.path, (0, 0))
+        os.utime(b.path, (1, 1))
+        c = file_cache.fetch('http://example.org/c')
+
+    assert not os.path.exists(a.path)
+    assert os.path.exists(b.path)
+    assert os.path.exists(c.path)
+
+
+def test_file_cache_keeps_track_of_its_size(tmpdir):
+    file_cache = FileCache(str(tmpdir), max_size=1024)
+
+    with requests_mock.Mocker() as requests_mocker:
+        for name in ('a', 'b', 'c'):
+            requests_mocker.register_uri('GET', 'http://example.org/' + name, content=name * 4)
+
+        with patch.object(file_cache, '_evict', wraps=file_cache._evict) as evict:
+            for name in ('a', 'b', 'c'):
+                file_cache.fetch('http://example.org/' + name)
+
+    assert evict.call_count == 1
+    assert tmpdir.join('size').read() == '12'
+
+
+@patch('inspirehep.utils.file_cache.FileInstance')
+def test_put_cached_file_does_not_reuse_files_with_another_sha1(FileInstance, tmpdir):
+    document = tmpdir.join('document.pdf')
+    document.write_binary(b'%PDF-1.4')
+    cached_file = CachedFile(
+        str(document),
+        hashlib.sha1(b'%PDF-1.4').hexdigest(),
+        'md5:' + hashlib.md5(b'%PDF-1.4').hexdigest(),
+        8,
+    )
+    same_md5 = MagicMock()
+    same_md5.storage.return_value.open.return_value = io.BytesIO(b'%PDF-1.5')
+    FileInstance.query.filter_by.return_value = [same_md5]
+    files = MockFiles({})
+
+    put_cached_file(files, 'document.pdf', cached_file)
+
+    assert 'document.pdf' in files
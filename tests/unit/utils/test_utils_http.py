@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+import requests
+import requests_mock
+from mock import MagicMock, patch
+
+from inspirehep.utils.http import HttpClients, InstrumentedSession
+
+
+def test_http_clients_get_returns_one_session_per_service():
+    app = MagicMock(config={
+        'HTTP_CLIENTS_DEFAULTS': {'timeout': 60, 'max_tries': 5},
+        'HTTP_CLIENTS': {'crossref': {'timeout': 30}},
+    })
+    http_clients = HttpClients(app)
+
+    crossref = http_clients.get('crossref')
+
+    assert crossref is http_clients.get('crossref')
+    assert crossref is not http_clients.get('arxiv')
+    assert crossref.timeout == 30
+    assert http_clients.get('arxiv').timeout == 60
+
+
+def test_http_clients_clear_drops_the_sessions():
+    http_clients = HttpClients(MagicMock(config={}))
+    session = http_clients.get('arxiv')
+
+    http_clients.clear()
+
+    assert session is not http_clients.get('arxiv')
+
+
+@patch('inspirehep.utils.http.write_metric')
+def test_instrumented_session_applies_default_timeout_and_writes_metric(write_metric):
+    session = InstrumentedSession('crossref', timeout=30)
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.register_uri('GET', 'http://example.org/api', text='')
+
+        session.get('http://example.org/api')
+
+        assert requests_mocker.last_request.timeout == 30
+
+    name, metric = write_metric.call_args[0][0], write_metric.call_args[1]
+    assert name == 'inspirehep.http.crossref'
+    assert metric['method'] == 'GET'
+    assert metric['status_code'] == 200
+    assert 'exc_fqn' not in metric
+
+
+@patch('inspirehep.utils.http.write_metric')
+def test_instrumented_session_retries_on_connection_error(write_metric):
+    session = InstrumentedSession('hep', max_tries=2)
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.register_uri(
+            'GET', 'http://example.org/api', [
+                {'exc': requests.exceptions.ConnectionError},
+                {'json': {'foo': 'bar'}},
+            ])
+
+        with patch('backoff._sync.time.sleep'):
+            result = session.get('http://example.org/api').json()
+
+    assert result == {'foo': 'bar'}
+    assert write_metric.call_count == 2
+    assert write_metric.call_args_list[0][1]['exc_fqn'] == \
+        'requests.exceptions.ConnectionError'
+
+
+@patch('inspirehep.utils.http.write_metric')
+def test_instrumented_session_gives_up_after_max_tries(write_metric):
+    session = InstrumentedSession('arxiv', max_tries=1)
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.register_uri(
+            'GET', 'http://example.org/api',
+            exc=requests.exceptions.ConnectionError,
+        )
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.get('http://example.org/api')
+
+    assert write_metric.call_count == 1
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.response import Response
+from flask import current_app
+from mock import MagicMock, patch
+from werkzeug.contrib.cache import SimpleCache
+
+from inspirehep.utils.institutions import (
+    get_institutions_refs,
+    invalidate_institutions,
+)
+
+
+def _institutions_response(*refs):
+    return Response(Search(), {
+        'hits': {
+            'total': {'value': len(refs)},
+            'hits': [{'_source': {'self': {'$ref': ref}}} for ref in refs],
+        },
+    })
+
+
+@patch('inspirehep.utils.institutions.current_cache', SimpleCache())
+@patch('inspirehep.utils.institutions.MultiSearch')
+def test_get_institutions_refs_are_cached_until_invalidated(MultiSearch):
+    multi_search = MagicMock()
+    multi_search.add.return_value = multi_search
+    multi_search.execute.side_effect = [
+        [_institutions_response('http://localhost:5000/api/institutions/902725')],
+        [_institutions_response('http://localhost:5000/api/institutions/902726')],
+    ]
+    MultiSearch.return_value = multi_search
+    config = {
+        'FEATURE_FLAG_ENABLE_INSTITUTIONS_CACHE': True,
+        'WORKFLOWS_INSTITUTIONS_CACHE_TIMEOUT': 600,
+        'WORKFLOWS_INSTITUTIONS_NEGATIVE_CACHE_TIMEOUT': 60,
+    }
+
+    with patch.dict(current_app.config, config):
+        first = get_institutions_refs([u'CERN  Geneva'])
+        second = get_institutions_refs([u'cern geneva'])
+        invalidate_institutions()
+        third = get_institutions_refs([u'CERN Geneva'])
+
+    assert multi_search.execute.call_count == 2
+    assert first == {u'CERN  Geneva': {'$ref': 'http://localhost:5000/api/institutions/902725'}}
+    assert second == {u'cern geneva': {'$ref': 'http://localhost:5000/api/institutions/902725'}}
+    assert third == {u'CERN Geneva': {'$ref': 'http://localhost:5000/api/institutions/902726'}}
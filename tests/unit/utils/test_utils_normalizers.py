@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from mock import patch
+
+from inspirehep.utils.normalizers import (
+    JournalTitlesIndex,
+    get_journal_titles_index,
+)
+
+
+JOURNALS = [
+    {
+        'short_title': 'Phys.Rev.',
+        'journal_title': 'Physical Review',
+        'title_variants': ['PHYS REV', 'PHYSICAL REV'],
+        'self': {'$ref': 'http://localhost:5000/api/journals/1214516'},
+        'inspire_categories': [{'term': 'General Physics'}],
+    },
+    {
+        'short_title': 'Phys.Rev.D',
+        'journal_title': 'Physical Review D',
+        'title_variants': None,
+        'self': {'$ref': 'http://localhost:5000/api/journals/1214518'},
+        'inspire_categories': None,
+    },
+    {
+        'short_title': None,
+        'journal_title': 'Journal without short title',
+        'title_variants': None,
+        'self': {'$ref': 'http://localhost:5000/api/journals/1'},
+        'inspire_categories': None,
+    },
+]
+
+
+def test_journal_titles_index_normalize():
+    index = JournalTitlesIndex(JOURNALS)
+
+    assert index.normalize('Physical Review') == 'Phys.Rev.'
+    assert index.normalize('physical review d') == 'Phys.Rev.D'
+    assert index.normalize('Physical Rev') == 'Phys.Rev.'
+    assert index.normalize('phys.rev.') == 'Phys.Rev.'
+
+
+def test_journal_titles_index_normalize_returns_unknown_titles_unchanged():
+    index = JournalTitlesIndex(JOURNALS)
+
+    assert index.normalize('Journal without short title') == 'Journal without short title'
+    assert index.normalize('Unknown Journal') == 'Unknown Journal'
+    assert index.normalize(None) is None
+
+
+def test_journal_titles_index_get_journal():
+    index = JournalTitlesIndex(JOURNALS)
+
+    journal = index.get_journal('Phys.Rev.')
+
+    assert journal['self'] == {'$ref': 'http://localhost:5000/api/journals/1214516'}
+    assert journal['inspire_categories'] == [{'term': 'General Physics'}]
+    assert index.get_journal('Physical Review') is None
+
+
+def test_journal_titles_index_get_journal_returns_a_copy():
+    index = JournalTitlesIndex(JOURNALS)
+
+    index.get_journal('Phys.Rev.')['inspire_categories'].append({'term': 'Other'})
+
+    assert index.get_journal('Phys.Rev.')['inspire_categories'] == [{'term': 'General Physics'}]
+
+
+@patch('inspirehep.utils.normalizers._load_journals', return_value=JOURNALS)
+@patch('inspirehep.utils.normalizers.get_journal_kb_version')
+def test_get_journal_titles_index_is_rebuilt_when_journals_change(get_journal_kb_version, load_journals):
+    get_journal_kb_version.side_effect = ['a', 'a', 'b']
+
+    with patch.dict(
+        'inspirehep.utils.normalizers._journal_titles_index',
+        {'version': None, 'index': None},
+    ):
+        first = get_journal_titles_index()
+        second = get_journal_titles_index()
+        third = get_journal_titles_index()
+
+    assert first is second
+    assert third is not second
+    assert load_journals.call_count == 2
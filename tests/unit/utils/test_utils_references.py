@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from copy import deepcopy
+
+from mock import patch
+
+from inspirehep.utils.references import get_and_format_references
+
+
+@patch('inspirehep.utils.references.get_es_records')
+@patch('inspirehep.utils.references.current_cache')
+def test_get_and_format_references_returns_cached_rows(mock_cache, mock_get_es_records):
+    mock_cache.get.return_value = [['<div>cached</div>', 3]]
+    record = {'control_number': 1, 'references': [{'recid': 2}]}
+
+    expected = [['<div>cached</div>', 3]]
+    result = get_and_format_references(record, version=4)
+
+    assert expected == result
+    mock_cache.get.assert_called_once_with('references::1::4')
+    mock_get_es_records.assert_not_called()
+
+
+@patch('inspirehep.utils.references.get_es_records')
+@patch('inspirehep.utils.references.current_cache')
+def test_get_and_format_references_does_not_modify_the_record(mock_cache, mock_get_es_records, request_context):
+    mock_get_es_records.return_value = []
+    record = {
+        'control_number': 1,
+        'references': [
+            {
+                'reference': {
+                    'publication_info': {'journal_title': 'Phys.Rev.'},
+                    'misc': ['foo'],
+                },
+            },
+        ],
+    }
+    expected = deepcopy(record)
+
+    rows = get_and_format_references(record)
+
+    assert expected == record
+    assert len(rows) == 1
+    assert 'foo' in rows[0][0]
+    mock_cache.get.assert_not_called()
+    mock_cache.set.assert_not_called()
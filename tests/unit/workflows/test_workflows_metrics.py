@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+from datetime import datetime
+
+import pytest
+from flask import current_app
+from mock import patch
+from workflow.errors import HaltProcessing, JumpCall
+
+from inspirehep.modules.workflows.metrics import (
+    aggregate_step_metrics,
+    get_step_metrics,
+    instrument_workflow,
+    with_step_metrics,
+)
+
+from mocks import MockEng, MockObj
+
+
+@patch('inspirehep.modules.workflows.metrics.write_metric')
+def test_with_step_metrics_records_duration_and_data_size_delta(write_metric):
+    def add_title(obj, eng):
+        obj.data['titles'] = [{'title': 'A title'}]
+
+    obj = MockObj({}, {})
+
+    config = {'WORKFLOWS_STEP_METRICS_MEASURE_DATA_SIZE': True}
+    with patch.dict(current_app.config, config):
+        with_step_metrics(add_title)(obj, MockEng())
+
+    metric = write_metric.call_args[1]
+    assert write_metric.call_args[0][0] == 'inspirehep.workflows.step'
+    assert metric['step'] == 'add_title'
+    assert metric['data_size_delta'] == len('"titles": [{"title": "A title"}]')
+    assert metric['value'] >= 0
+    assert 'exc_fqn' not in metric
+
+    summary = obj.extra_data['_step_metrics']['add_title']
+    assert summary['count'] == 1
+    assert summary['runs'] == [
+        [metric['started'], metric['value'], 0, metric['data_size_delta']],
+    ]
+
+
+@patch('inspirehep.modules.workflows.metrics.write_metric')
+def test_with_step_metrics_does_not_measure_the_data_size_by_default(write_metric):
+    def add_title(obj, eng):
+        obj.data['titles'] = [{'title': 'A title'}]
+
+    obj = MockObj({}, {})
+
+    with_step_metrics(add_title)(obj, MockEng())
+
+    assert 'data_size_delta' not in write_metric.call_args[1]
+    assert obj.extra_data['_step_metrics']['add_title']['runs'][0][3] is None
+
+
+@patch('inspirehep.modules.workflows.metrics.write_metric')
+def test_with_step_metrics_records_exceptions_and_halts(write_metric):
+    def fail(obj, eng):
+        raise ValueError
+
+    def halt(obj, eng):
+        raise HaltProcessing
+
+    obj = MockObj({}, {})
+
+    with pytest.raises(ValueError):
+        with_step_metrics(fail)(obj, MockEng())
+    with pytest.raises(HaltProcessing):
+        with_step_metrics(halt)(obj, MockEng())
+    with pytest.raises(HaltProcessing):
+        with_step_metrics(halt)(obj, MockEng())
+
+    first, second, third = [call[1] for call in write_metric.call_args_list]
+    assert first['exc_fqn'] == 'exceptions.ValueError'
+    assert second['transition'] == 'HaltProcessing'
+
+    summary = obj.extra_data['_step_metrics']
+    assert summary['fail']['runs'][0][2] == 1
+    assert summary['halt']['count'] == 2
+    assert [run[2] for run in summary['halt']['runs']] == [0, 0]
+
+
+@patch('inspirehep.modules.workflows.metrics.write_metric')
+def test_with_step_metrics_keeps_the_last_runs(write_metric):
+    def step(obj, eng):
+        pass
+
+    obj = MockObj({}, {})
+
+    with patch.dict(current_app.config, {'WORKFLOWS_STEP_METRICS_RUNS': 2}):
+        for _ in range(3):
+            with_step_metrics(step)(obj, MockEng())
+
+    started = [call[1]['started'] for call in write_metric.call_args_list]
+    summary = obj.extra_data['_step_metrics']['step']
+    assert summary['count'] == 3
+    assert [run[0] for run in summary['runs']] == started[1:]
+
+
+@patch('inspirehep.modules.workflows.metrics.write_metric')
+def test_with_step_metrics_ignores_control_flow_jumps(write_metric):
+    def jump(obj, eng):
+        raise JumpCall(1)
+
+    obj = MockObj({}, {})
+
+    with pytest.raises(JumpCall):
+        with_step_metrics(jump)(obj, MockEng())
+
+    assert '_step_metrics' not in obj.extra_data
+    write_metric.assert_not_called()
+
+
+def test_instrument_workflow_keeps_the_structure():
+    def first(obj, eng):
+        pass
+
+    def second(obj, eng):
+        pass
+
+    workflow = instrument_workflow([first, [second], (first,)])
+
+    assert isinstance(workflow[1], list)
+    assert isinstance(workflow[2], tuple)
+    assert workflow[1][0].__name__ == 'second'
+    assert workflow[0] is not first
+
+
+def test_aggregate_step_metrics():
+    runs = [
+        {
+            'step': 'refextract',
+            'started': '2017-01-01T00:00:00',
+            'value': value,
+            'error': 0,
+            'data_size_delta': 10,
+        }
+        for value in range(1, 101)
+    ] + [
+        {
+            'step': 'magpie',
+            'started': '2017-01-01T00:00:00',
+            'value': 5.0,
+            'error': 1,
+            'data_size_delta': None,
+        },
+    ]
+
+    refextract, magpie = aggregate_step_metrics(runs)
+
+    assert refextract['step'] == 'refextract'
+    assert refextract['count'] == 100
+    assert refextract['p50'] == 50
+    assert refextract['p95'] == 95
+    assert refextract['data_size_delta'] == 10
+    assert magpie['errors'] == 1
+    assert magpie['data_size_delta'] is None
+
+
+@patch('inspirehep.modules.workflows.metrics.WorkflowObjectModel')
+def test_get_step_metrics_only_yields_the_runs_in_the_window(model):
+    summary = {
+        'refextract': {
+            'count': 2,
+            'runs': [
+                ['2017-01-01T00:00:00', 1000.0, 0, None],
+                ['2017-01-03T00:00:00', 10.0, 1, None],
+            ],
+        },
+    }
+    query = model.query.with_entities.return_value.filter.return_value
+    query.yield_per.return_value = [(summary,)]
+
+    runs = list(get_step_metrics(datetime(2017, 1, 2)))
+
+    assert runs == [
+        {
+            'step': 'refextract',
+            'started': '2017-01-03T00:00:00',
+            'value': 10.0,
+            'error': 1,
+            'data_size_delta': None,
+        },
+    ]
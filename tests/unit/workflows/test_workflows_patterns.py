@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import time
+
+import pytest
+
+from inspirehep.modules.workflows.patterns import PARALLEL, WHEN
+
+from mocks import MockEng, MockObj
+
+
+def test_parallel_merges_extra_data_in_task_order():
+    def first(obj, eng):
+        time.sleep(0.1)
+        obj.extra_data['shared'] = 'first'
+        obj.extra_data['first'] = True
+
+    def second(obj, eng):
+        obj.extra_data['shared'] = 'second'
+        obj.extra_data['second'] = True
+        del obj.extra_data['to_delete']
+
+    obj = MockObj({}, {'kept': True, 'to_delete': True})
+    eng = MockEng()
+
+    PARALLEL([first, second])(obj, eng)
+
+    expected = {
+        'kept': True,
+        'first': True,
+        'second': True,
+        'shared': 'second',
+    }
+    result = obj.extra_data
+
+    assert expected == result
+
+
+def test_parallel_tasks_do_not_see_each_other_changes():
+    seen = {}
+
+    def first(obj, eng):
+        obj.extra_data['first'] = True
+
+    def second(obj, eng):
+        time.sleep(0.1)
+        seen['first'] = 'first' in obj.extra_data
+
+    obj = MockObj({}, {})
+    eng = MockEng()
+
+    PARALLEL([first, second])(obj, eng)
+
+    assert not seen['first']
+    assert obj.extra_data == {'first': True}
+
+
+def test_parallel_raises_the_first_error_and_keeps_successful_changes():
+    def succeeding(obj, eng):
+        obj.extra_data['succeeding'] = True
+
+    def failing_slowly(obj, eng):
+        time.sleep(0.1)
+        raise ValueError('first')
+
+    def failing(obj, eng):
+        raise KeyError('second')
+
+    obj = MockObj({}, {})
+    eng = MockEng()
+
+    with pytest.raises(ValueError):
+        PARALLEL([succeeding, failing_slowly, failing])(obj, eng)
+
+    assert obj.extra_data == {'succeeding': True}
+
+
+def test_when():
+    def task(obj, eng):
+        obj.extra_data['ran'] = True
+
+    obj = MockObj({}, {})
+    eng = MockEng()
+
+    WHEN(lambda obj, eng: False, task)(obj, eng)
+    assert 'ran' not in obj.extra_data
+
+    WHEN(lambda obj, eng: True, task)(obj, eng)
+    assert obj.extra_data['ran']
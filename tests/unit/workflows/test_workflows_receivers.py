@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+from mock import patch
+from workflow.engine import GenericWorkflowEngine
+
+from inspirehep.modules.workflows import receivers  # noqa: F401
+
+
+@patch('inspirehep.modules.workflows.receivers.close_source_archives')
+def test_remove_source_archives_when_a_step_fails(close_source_archives):
+    def fail(obj, eng):
+        raise ValueError
+
+    eng = GenericWorkflowEngine()
+    eng.callbacks.replace([fail])
+
+    with pytest.raises(ValueError):
+        eng.process([{}])
+
+    close_source_archives.assert_called_once_with()
@@ -23,12 +23,15 @@
 from __future__ import absolute_import, division, print_function
 
 import os
-from mock import patch
+from mock import MagicMock, patch
 import pkg_resources
 import pytest
 import requests_mock
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.response import Response
 from flask import current_app
 from jsonschema import ValidationError
+from werkzeug.contrib.cache import SimpleCache
 
 from inspire_schemas.api import load_schema, validate
 from inspirehep.modules.workflows.tasks.actions import (
@@ -44,6 +47,7 @@ from inspirehep.modules.workflows.tasks.actions import (
     is_record_accepted,
     is_record_relevant,
     is_submission,
+    link_institutions_with_affiliations,
     mark,
     populate_journal_coverage,
     populate_submission_document,
@@ -110,6 +114,37 @@ def test_download_documents():
         assert expected_document_url == documents[0]['url']
 
 
+def test_download_documents_skips_documents_already_downloaded():
+    with requests_mock.Mocker() as requests_mocker:
+        schema = load_schema('hep')
+        subschema = schema['properties']['documents']
+
+        data = {
+            'documents': [
+                {
+                    'key': '1605.03844.pdf',
+                    'url': '/api/files/0b9dd5d1-feae-4ba5-809d-3a029b0bc110/1605.03844.pdf'
+                },
+            ],
+        }  # literature/1458302
+        extra_data = {}
+        files = MockFiles({})
+        files['1605.03844.pdf'] = None
+        assert validate(data['documents'], subschema) is None
+
+        obj = MockObj(data, extra_data, files=files)
+        eng = MockEng()
+
+        assert download_documents(obj, eng) is None
+
+        documents = obj.data['documents']
+        expected_document_url = '/api/files/0b9dd5d1-feae-4ba5-809d-3a029b0bc110/1605.03844.pdf'
+
+        assert 1 == len(documents)
+        assert expected_document_url == documents[0]['url']
+        assert not requests_mocker.called
+
+
 def test_download_documents_with_multiple_documents():
     with requests_mock.Mocker() as requests_mocker:
         requests_mocker.register_uri(
@@ -1204,13 +1239,13 @@ def test_validate_record_raises_when_record_is_invalid():
         _validate_record(obj, eng)
 
 
-@patch('inspirehep.modules.workflows.tasks.actions.create_journal_kb_dict', return_value={})
+@patch('inspirehep.modules.workflows.tasks.actions.get_journal_kb_dict', return_value={})
 @patch('inspirehep.modules.workflows.tasks.actions.get_document_in_workflow')
 @patch(
-    'inspirehep.modules.refextract.matcher.match',
-    return_value=iter([])
+    'inspirehep.modules.refextract.matcher._msearch',
+    side_effect=lambda searches: [[] for _ in searches]
 )
-def test_refextract_from_text(mock_match, mock_get_document_in_workflow, mock_create_journal_kb_dict):
+def test_refextract_from_text(mock_match, mock_get_document_in_workflow, mock_get_journal_kb_dict):
     """TODO: Make this an integration test and also test reference matching."""
 
     mock_get_document_in_workflow.return_value.__enter__.return_value = None
@@ -1234,10 +1269,10 @@ def test_refextract_from_text(mock_match, mock_get_document_in_workflow, mock_cr
     assert obj.data['references'][0]['raw_refs'][0]['source'] == 'submitter'
 
 
-@patch('inspirehep.modules.workflows.tasks.actions.create_journal_kb_dict', return_value={})
+@patch('inspirehep.modules.workflows.tasks.actions.get_journal_kb_dict', return_value={})
 @patch(
-    'inspirehep.modules.refextract.matcher.match',
-    return_value=iter([])
+    'inspirehep.modules.refextract.matcher._msearch',
+    side_effect=lambda searches: [[] for _ in searches]
 )
 def test_refextract_from_raw_refs(mock_create_journal_dict, mock_match):
     """TODO: Make this an integration test and also test reference matching."""
@@ -1266,10 +1301,10 @@ def test_refextract_from_raw_refs(mock_create_journal_dict, mock_match):
     assert 'reference' in obj.data['references'][0]
 
 
-@patch('inspirehep.modules.workflows.tasks.actions.create_journal_kb_dict', return_value={})
+@patch('inspirehep.modules.workflows.tasks.actions.get_journal_kb_dict', return_value={})
 @patch(
-    'inspirehep.modules.refextract.matcher.match',
-    return_value=iter([])
+    'inspirehep.modules.refextract.matcher._msearch',
+    side_effect=lambda searches: [[] for _ in searches]
 )
 def test_refextract_valid_refs_from_raw_refs(mock_create_journal_dict, mock_match):
     schema = load_schema('hep')
@@ -1301,13 +1336,13 @@ def test_refextract_valid_refs_from_raw_refs(mock_create_journal_dict, mock_matc
     assert validate(obj.data['references'], subschema) is None
 
 
-@patch('inspirehep.modules.workflows.tasks.actions.create_journal_kb_dict', return_value={})
+@patch('inspirehep.modules.workflows.tasks.actions.get_journal_kb_dict', return_value={})
 @patch('inspirehep.modules.workflows.tasks.actions.get_document_in_workflow')
 @patch(
-    'inspirehep.modules.refextract.matcher.match',
-    return_value=iter([])
+    'inspirehep.modules.refextract.matcher._msearch',
+    side_effect=lambda searches: [[] for _ in searches]
 )
-def test_refextract_valid_refs_from_text(mock_match, mock_get_document_in_workflow, mock_create_journal_kb_dict):
+def test_refextract_valid_refs_from_text(mock_match, mock_get_document_in_workflow, mock_get_journal_kb_dict):
     """TODO: Make this an integration test and also test reference matching."""
 
     mock_get_document_in_workflow.return_value.__enter__.return_value = None
@@ -1365,3 +1400,74 @@ def test_url_is_correctly_escaped():
 
         assert 1 == len(documents)
         assert expected_document_url == documents[0]['url']
+
+
+def _institutions_response(*refs):
+    return Response(Search(), {
+        'hits': {
+            'total': {'value': len(refs)},
+            'hits': [{'_source': {'self': {'$ref': ref}}} for ref in refs],
+        },
+    })
+
+
+def _mock_multi_search(MultiSearch, *responses):
+    multi_search = MagicMock()
+    multi_search.add.return_value = multi_search
+    multi_search.execute.side_effect = responses
+    MultiSearch.return_value = multi_search
+    return multi_search
+
+
+@patch('inspirehep.utils.institutions.MultiSearch')
+def test_link_institutions_with_affiliations_searches_each_icn_once(MultiSearch):
+    multi_search = _mock_multi_search(MultiSearch, [
+        _institutions_response('http://localhost:5000/api/institutions/902725'),
+        _institutions_response(),
+    ])
+    data = {
+        'authors': [
+            {'full_name': 'Kowal, Michal', 'affiliations': [{'value': 'CERN'}, {'value': 'Unknown U.'}]},
+            {'full_name': 'Latacz, Barbara', 'affiliations': [{'value': 'CERN'}]},
+        ],
+    }
+    obj = MockObj(data, {})
+
+    link_institutions_with_affiliations(obj, MockEng())
+
+    assert multi_search.add.call_count == 2
+    assert multi_search.execute.call_count == 1
+    expected_record = {'$ref': 'http://localhost:5000/api/institutions/902725'}
+    assert obj.data['authors'][0]['affiliations'][0]['record'] == expected_record
+    assert 'record' not in obj.data['authors'][0]['affiliations'][1]
+    assert obj.data['authors'][1]['affiliations'][0]['record'] == expected_record
+
+
+@patch('inspirehep.utils.institutions.MultiSearch')
+def test_link_institutions_with_affiliations_uses_the_institutions_cache(MultiSearch):
+    multi_search = _mock_multi_search(MultiSearch, [
+        _institutions_response('http://localhost:5000/api/institutions/902725'),
+        _institutions_response(),
+    ])
+    config = {
+        'FEATURE_FLAG_ENABLE_INSTITUTIONS_CACHE': True,
+        'WORKFLOWS_INSTITUTIONS_CACHE_TIMEOUT': 600,
+        'WORKFLOWS_INSTITUTIONS_NEGATIVE_CACHE_TIMEOUT': 60,
+    }
+
+    with patch('inspirehep.utils.institutions.current_cache', SimpleCache()), \
+            patch.dict(current_app.config, config):
+        for _ in range(2):
+            data = {
+                'authors': [
+                    {'full_name': 'Kowal, Michal', 'affiliations': [{'value': 'CERN'}, {'value': 'Unknown U.'}]},
+                ],
+            }
+            obj = MockObj(data, {})
+            link_institutions_with_affiliations(obj, MockEng())
+
+    assert multi_search.execute.call_count == 1
+    assert obj.data['authors'][0]['affiliations'][0]['record'] == {
+        '$ref': 'http://localhost:5000/api/institutions/902725',
+    }
+    assert 'record' not in obj.data['authors'][0]['affiliations'][1]
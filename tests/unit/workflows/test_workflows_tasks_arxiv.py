@@ -29,13 +29,13 @@ import pytest
 import pkg_resources
 import requests_mock
 from mock import patch
-from wand.exceptions import DelegateError
 
 from inspire_schemas.api import load_schema, validate
 from inspirehep.modules.workflows.tasks.arxiv import (
     arxiv_author_list,
     arxiv_package_download,
     arxiv_plot_extract,
+    extract_authors_from_xml,
     populate_arxiv_document,
 )
 from plotextractor.errors import InvalidTarball
@@ -81,13 +81,15 @@ def test_populate_arxiv_document():
                 'hidden': True,
                 'material': 'preprint',
                 'original_url': 'http://export.arxiv.org/pdf/1605.03844',
-                'url': 'http://export.arxiv.org/pdf/1605.03844',
+                'url': '/api/files/0b9dd5d1-feae-4ba5-809d-3a029b0bc110/1605.03844.pdf',
                 'source': 'arxiv',
             },
         ]
         result = obj.data['documents']
 
         assert expected == result
+        assert '1605.03844.pdf' in obj.files
+        assert requests_mocker.call_count == 1
 
 
 def test_populate_arxiv_document_does_not_duplicate_files_if_called_multiple_times():
@@ -128,7 +130,7 @@ def test_populate_arxiv_document_does_not_duplicate_files_if_called_multiple_tim
                 'hidden': True,
                 'material': 'preprint',
                 'original_url': 'http://export.arxiv.org/pdf/1605.03844',
-                'url': 'http://export.arxiv.org/pdf/1605.03844',
+                'url': '/api/files/0b9dd5d1-feae-4ba5-809d-3a029b0bc110/1605.03844.pdf',
                 'source': 'arxiv',
             },
         ]
@@ -227,7 +229,7 @@ def test_populate_arxiv_document_alternative_url():
                 'hidden': True,
                 'material': 'preprint',
                 'original_url': expected_url,
-                'url': expected_url,
+                'url': '/api/files/0b9dd5d1-feae-4ba5-809d-3a029b0bc110/1605.03814.pdf',
                 'source': 'arxiv',
             }
         ]
@@ -281,7 +283,7 @@ def test_populate_arxiv_document_retries_on_error():
                 'hidden': True,
                 'material': 'preprint',
                 'original_url': expected_url,
-                'url': expected_url,
+                'url': '/api/files/0b9dd5d1-feae-4ba5-809d-3a029b0bc110/1605.03814.pdf',
                 'source': 'arxiv',
             }
         ]
@@ -293,7 +295,7 @@ def side_effect_requests_get(url, params=None, **kwargs):
     raise requests.exceptions.ConnectionError()
 
 
-@patch('inspirehep.modules.workflows.tasks.arxiv.requests.get')
+@patch('inspirehep.utils.http.InstrumentedSession.get')
 def test_populate_arxiv_document_retries_on_connection_error(mock_requests_get):
     mock_requests_get.side_effect = side_effect_requests_get
 
@@ -587,7 +589,7 @@ def test_arxiv_plot_extract_retries_on_io_error(mock_os, tmpdir):
             assert mock_open.call_count == 5
 
 
-@patch('inspirehep.modules.workflows.tasks.arxiv.process_tarball')
+@patch('inspirehep.modules.workflows.tasks.arxiv.extract_plots')
 def test_arxiv_plot_extract_logs_when_tarball_is_invalid(mock_process_tarball):
     mock_process_tarball.side_effect = InvalidTarball
 
@@ -624,44 +626,7 @@ def test_arxiv_plot_extract_logs_when_tarball_is_invalid(mock_process_tarball):
     assert '1612.00626' in obj.log._info.getvalue()
 
 
-@patch('inspirehep.modules.workflows.tasks.arxiv.process_tarball')
-def test_arxiv_plot_extract_logs_when_images_are_invalid(mock_process_tarball):
-    mock_process_tarball.side_effect = DelegateError
-
-    schema = load_schema('hep')
-    subschema = schema['properties']['arxiv_eprints']
-
-    filename = pkg_resources.resource_filename(
-        __name__, os.path.join('fixtures', '1612.00624'))
-
-    data = {
-        'arxiv_eprints': [
-            {
-                'categories': [
-                    'physics.ins-det',
-                ],
-                'value': '1612.00624',
-            },
-        ],
-    }  # synthetic data
-    extra_data = {}
-    files = MockFiles({
-        '1612.00624.tar.gz': AttrDict({
-            'file': AttrDict({
-                'uri': filename,
-            })
-        })
-    })
-    assert validate(data['arxiv_eprints'], subschema) is None
-
-    obj = MockObj(data, extra_data, files=files)
-    eng = MockEng()
-
-    assert arxiv_plot_extract(obj, eng) is None
-    assert '1612.00624' in obj.log._error.getvalue()
-
-
-@patch('inspirehep.modules.workflows.tasks.arxiv.process_tarball')
+@patch('inspirehep.modules.workflows.tasks.arxiv.extract_plots')
 def test_arxiv_plot_extract_no_file(mock_process_tarball):
 
     schema = load_schema('hep')
@@ -811,9 +776,9 @@ def test_arxiv_author_list_only_overrides_authors():
     assert obj.data['$schema'] == data['$schema']
 
 
-@patch('inspirehep.modules.workflows.tasks.arxiv.untar')
-def test_arxiv_author_list_logs_on_error(mock_untar):
-    mock_untar.side_effect = InvalidTarball
+@patch('inspirehep.modules.workflows.tasks.arxiv.get_source_archive')
+def test_arxiv_author_list_logs_on_error(mock_get_source_archive):
+    mock_get_source_archive.side_effect = InvalidTarball
 
     schema = load_schema('hep')
     subschema = schema['properties']['arxiv_eprints']
@@ -1386,3 +1351,49 @@ def test_arxiv_handles_newLines():
 
     arxiv_author_list(obj, eng)
     assert expected_author[0] == obj.data['authors'][0]
+
+
+def test_extract_authors_from_xml_with_organizations_after_authors():
+    xml_content = u"""<?xml version="1.0" encoding="UTF-8"?>
+<collaborationauthorlist xmlns:foaf="http://xmlns.com/foaf/0.1/" xmlns:cal="http://inspirehep.net/info/HepNames/tools/authors_xml/">
+  <cal:authors>
+    <foaf:Person>
+      <foaf:givenName>John</foaf:givenName>
+      <foaf:familyName>Doe</foaf:familyName>
+      <cal:authorAffiliations>
+        <cal:authorAffiliation organizationid="o2"/>
+        <cal:authorAffiliation organizationid="o1"/>
+        <cal:authorAffiliation organizationid="o3"/>
+      </cal:authorAffiliations>
+    </foaf:Person>
+  </cal:authors>
+  <cal:organizations>
+    <foaf:Organization id="o1">
+      <cal:orgName source="ROR">https://ror.org/01ggx4157</cal:orgName>
+      <cal:orgName source="spiresICN">CERN</cal:orgName>
+    </foaf:Organization>
+    <foaf:Organization id="o2">
+      <cal:orgName source="INSPIRE">INFN, Catania</cal:orgName>
+      <cal:orgName source="GRID">grid.470198.3</cal:orgName>
+      <cal:orgName source="ROR">02pq29p90</cal:orgName>
+    </foaf:Organization>
+  </cal:organizations>
+</collaborationauthorlist>
+"""
+
+    expected = [
+        {
+            'affiliations': [
+                {'value': u'INFN, Catania'},
+                {'value': u'CERN'},
+            ],
+            'affiliations_identifiers': [
+                {'schema': u'GRID', 'value': u'grid.470198.3'},
+                {'schema': u'ROR', 'value': u'https://ror.org/02pq29p90'},
+                {'schema': u'ROR', 'value': u'https://ror.org/01ggx4157'},
+            ],
+            'full_name': u'Doe, John',
+        },
+    ]
+
+    assert extract_authors_from_xml(xml_content) == expected
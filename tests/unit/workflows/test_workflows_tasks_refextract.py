@@ -28,8 +28,10 @@ import pkg_resources
 
 from inspire_schemas.api import load_schema, validate
 from inspirehep.modules.workflows.tasks.refextract import (
+    _refextract_pool,
     extract_journal_info,
     extract_references_from_pdf,
+    extract_references_from_pdf_and_text,
     extract_references_from_text,
     extract_references_from_raw_ref,
 )
@@ -37,8 +39,8 @@ from inspirehep.modules.workflows.tasks.refextract import (
 from mocks import MockEng, MockObj
 
 
-@mock.patch('inspirehep.modules.workflows.tasks.refextract.create_journal_kb_dict')
-def test_extract_journal_info(mock_create_journal_kb_dict):
+@mock.patch('inspirehep.modules.workflows.tasks.refextract.get_journal_kb_dict')
+def test_extract_journal_info(mock_get_journal_kb_dict):
     schema = load_schema('hep')
     subschema = schema['properties']['publication_info']
 
@@ -70,8 +72,8 @@ def test_extract_journal_info(mock_create_journal_kb_dict):
     assert expected == result
 
 
-@mock.patch('inspirehep.modules.workflows.tasks.refextract.create_journal_kb_dict')
-def test_extract_journal_info_handles_year_an_empty_string(mock_create_journal_kb_dict):
+@mock.patch('inspirehep.modules.workflows.tasks.refextract.get_journal_kb_dict')
+def test_extract_journal_info_handles_year_an_empty_string(mock_get_journal_kb_dict):
     schema = load_schema('hep')
     subschema = schema['properties']['publication_info']
 
@@ -103,8 +105,8 @@ def test_extract_journal_info_handles_year_an_empty_string(mock_create_journal_k
     assert expected == result
 
 
-@mock.patch('inspirehep.modules.workflows.tasks.refextract.create_journal_kb_dict')
-def test_extract_journal_info_handles_the_journal_split(mock_create_journal_kb_dict):
+@mock.patch('inspirehep.modules.workflows.tasks.refextract.get_journal_kb_dict')
+def test_extract_journal_info_handles_the_journal_split(mock_get_journal_kb_dict):
     schema = load_schema('hep')
     subschema = schema['properties']['publication_info']
 
@@ -197,6 +199,31 @@ def test_extract_references_from_text_populates_raw_refs_source():
     assert result[0]['raw_refs'][0]['source'] == 'submitter'
 
 
+def test_extract_references_from_pdf_and_text():
+    filename = pkg_resources.resource_filename(
+        __name__, os.path.join('fixtures', '1704.00452.pdf'))
+    text = u'Iskra Ł W et al 2017 Acta Phys. Pol. B 48 581'
+
+    pdf_result, text_result = extract_references_from_pdf_and_text(
+        filename, text, source='arXiv')
+
+    assert pdf_result == extract_references_from_pdf(filename, source='arXiv')
+    assert text_result == extract_references_from_text(text, source='arXiv')
+
+
+def test_extract_references_from_pdf_and_text_reuses_its_pool():
+    filename = pkg_resources.resource_filename(
+        __name__, os.path.join('fixtures', '1704.00452.pdf'))
+    text = u'Iskra Ł W et al 2017 Acta Phys. Pol. B 48 581'
+
+    extract_references_from_pdf_and_text(filename, text, source='arXiv')
+    pool = _refextract_pool['pool']
+    extract_references_from_pdf_and_text(filename, text, source='arXiv')
+
+    assert pool is not None
+    assert _refextract_pool['pool'] is pool
+
+
 def test_extract_references_from_raw_ref_single_text():
     schema = load_schema('hep')
     subschema = schema['properties']['references']
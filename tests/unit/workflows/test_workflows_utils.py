@@ -31,6 +31,7 @@ import requests_mock
 import time
 
 from contextlib import contextmanager
+from flask import current_app
 from mock import patch
 
 from timeout_decorator import timeout
@@ -39,15 +40,20 @@ from inspirehep.modules.workflows.utils import (
     convert,
     copy_file_to_workflow,
     download_file_to_workflow,
+    download_pdf_to_workflow,
     get_document_in_workflow,
     get_source_for_root,
+    get_xslt_transform,
     ignore_timeout_error,
     json_api_request,
+    mark_workflow_saved,
+    save_workflow_changes,
 )
 
-from mocks import MockFiles, MockFileObject, MockObj
+from mocks import AttrDict, MockFiles, MockFileObject, MockObj
 
 from inspirehep.modules.workflows.utils.grobid_authors_parser import GrobidAuthors
+from inspirehep.utils.file_cache import FileCache
 
 
 def test_download_file_to_workflow_retries_on_protocol_error():
@@ -74,6 +80,55 @@ def test_download_file_to_workflow_retries_on_protocol_error():
         assert expected == result
 
 
+@patch('inspirehep.modules.workflows.utils.put_cached_file')
+@patch('inspirehep.modules.workflows.utils.http_clients')
+@patch('inspirehep.modules.workflows.utils.get_file_cache')
+def test_download_pdf_to_workflow_goes_through_the_document_cache(
+    mock_get_file_cache, mock_http_clients, mock_put_cached_file, tmpdir
+):
+    mock_get_file_cache.return_value = FileCache(str(tmpdir), 10 ** 6)
+    mock_http_clients.get.return_value = requests.Session()
+    mock_put_cached_file.side_effect = lambda files, key, cached_file: files.__setitem__(key, None)
+    obj = MockObj({}, {}, files=MockFiles({}))
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get('http://export.arxiv.org/pdf/1605.03844', content=b'%PDF-1.4 ...')
+        requests_mocker.get('http://export.arxiv.org/abs/1605.03844', content=b'<html></html>')
+
+        assert download_pdf_to_workflow(
+            obj, '1605.03844.pdf', 'http://export.arxiv.org/abs/1605.03844') is None
+        result = download_pdf_to_workflow(
+            obj, '1605.03844.pdf', 'http://export.arxiv.org/pdf/1605.03844')
+
+    assert result == MockFileObject(key='1605.03844.pdf')
+    mock_http_clients.get.assert_called_with('documents')
+    assert mock_put_cached_file.call_count == 1
+    files, key, cached_file = mock_put_cached_file.call_args[0]
+    assert key == '1605.03844.pdf'
+    with open(cached_file.path, 'rb') as fd:
+        assert fd.read() == b'%PDF-1.4 ...'
+
+
+@patch('inspirehep.modules.workflows.utils.put_cached_file')
+@patch('inspirehep.modules.workflows.utils.http_clients')
+@patch('inspirehep.modules.workflows.utils.get_file_cache')
+def test_download_file_to_workflow_uses_the_documents_session(
+    mock_get_file_cache, mock_http_clients, mock_put_cached_file, tmpdir
+):
+    mock_get_file_cache.return_value = FileCache(str(tmpdir), 10 ** 6)
+    mock_http_clients.get.return_value = requests.Session()
+    mock_put_cached_file.side_effect = lambda files, key, cached_file: files.__setitem__(key, None)
+    obj = MockObj({}, {}, files=MockFiles({}))
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get('http://example.org/figure.png', content=b'figure')
+
+        result = download_file_to_workflow(obj, 'figure.png', 'http://example.org/figure.png')
+
+    assert result == MockFileObject(key='figure.png')
+    mock_http_clients.get.assert_called_once_with('documents')
+
+
 @patch('inspirehep.modules.workflows.utils.fsopen')
 def test_copy_file_to_workflow(mock_fsopen):
     mock_fsopen.return_value = 'jessica jones'
@@ -214,6 +269,98 @@ def test_xslt(oai_xml, oai_xml_result):
     assert xml == oai_xml_result
 
 
+def test_get_xslt_transform_is_cached_until_the_stylesheet_changes(tmpdir):
+    stylesheet = tmpdir.join('identity.xsl')
+    stylesheet.write(
+        '<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">'
+        '<xsl:template match="/"><xsl:copy-of select="."/></xsl:template>'
+        '</xsl:stylesheet>'
+    )
+
+    transform = get_xslt_transform(str(stylesheet))
+
+    assert get_xslt_transform(str(stylesheet)) is transform
+
+    os.utime(str(stylesheet), (0, 0))
+
+    assert get_xslt_transform(str(stylesheet)) is not transform
+
+
+class MockSavedObj(object):
+
+    def __init__(self):
+        self.model = AttrDict(
+            data={'titles': [{'title': 'A title'}]},
+            extra_data={},
+            callback_pos=[0],
+            status='RUNNING',
+        )
+        self.saves = 0
+
+    def save(self):
+        self.saves += 1
+        mark_workflow_saved(self)
+
+
+@patch('inspirehep.modules.workflows.utils.db')
+def test_save_workflow_changes_skips_unchanged_objects(mock_db):
+    obj = MockSavedObj()
+
+    save_workflow_changes(obj)
+    save_workflow_changes(obj)
+
+    assert obj.saves == 1
+    assert not mock_db.session.merge.called
+
+
+@patch('inspirehep.modules.workflows.utils.flag_modified')
+@patch('inspirehep.modules.workflows.utils.db')
+def test_save_workflow_changes_defers_the_holdingpen_index(mock_db, mock_flag_modified):
+    obj = MockSavedObj()
+
+    with patch.dict(current_app.config, {'WORKFLOWS_HOLDINGPEN_INDEX_INTERVAL': 60}):
+        save_workflow_changes(obj)
+        obj.model.extra_data['approved'] = True
+        save_workflow_changes(obj)
+
+    assert obj.saves == 1
+    mock_flag_modified.assert_called_once_with(obj.model, 'extra_data')
+    mock_db.session.merge.assert_called_once_with(obj.model)
+
+    with patch.dict(current_app.config, {'WORKFLOWS_HOLDINGPEN_INDEX_INTERVAL': 0}):
+        save_workflow_changes(obj)
+
+    assert obj.saves == 2
+
+
+@patch('inspirehep.modules.workflows.utils.db')
+def test_save_workflow_changes_ignores_the_step_metrics(mock_db):
+    obj = MockSavedObj()
+
+    save_workflow_changes(obj)
+    obj.model.extra_data['_step_metrics'] = {'refextract': {'count': 1}}
+    save_workflow_changes(obj)
+
+    assert obj.saves == 1
+    assert not mock_db.session.merge.called
+
+
+@patch('inspirehep.modules.workflows.utils._get_workflow_state')
+def test_mark_workflow_saved_does_not_fingerprint_the_object_again(mock_get_workflow_state):
+    mock_get_workflow_state.return_value = {'status': 'RUNNING'}
+    obj = MockSavedObj()
+
+    save_workflow_changes(obj)
+
+    assert mock_get_workflow_state.call_count == 1
+    assert obj._saved_state == {'status': 'RUNNING'}
+
+    mark_workflow_saved(obj)
+
+    assert mock_get_workflow_state.call_count == 1
+    assert obj._saved_state is None
+
+
 @patch('inspirehep.modules.workflows.utils.LOGGER')
 def test_ignore_timeout_decorator(mock_logger):
 
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import tarfile
+
+import pytest
+from plotextractor.errors import InvalidTarball
+
+from inspirehep.modules.workflows.utils.archives import (
+    SourceArchive,
+    close_source_archives,
+    get_source_archive,
+)
+
+
+TEX = r'''\documentclass{article}
+\begin{document}
+\begin{figure}
+\includegraphics{figures/used}
+\caption{A figure.}
+\end{figure}
+\end{document}
+'''
+
+
+def _make_tarball(tmpdir, files):
+    sources = tmpdir.mkdir('sources')
+    tarball = str(tmpdir.join('sources.tar.gz'))
+    with tarfile.open(tarball, 'w:gz') as tar:
+        for name, content in files.items():
+            sources.join(name).write(content, ensure=True)
+            tar.add(str(sources.join(name)), arcname=name)
+
+    return tarball
+
+
+def test_source_archive_only_extracts_the_needed_members(tmpdir):
+    tarball = _make_tarball(tmpdir, {
+        'main.tex': TEX,
+        'figures/used.png': 'used',
+        'figures/unused.png': 'unused',
+        'data/events.csv': 'a,b',
+        'authors.xml': '<collaborationauthorlist/>',
+    })
+    source_archive = SourceArchive(tarball)
+
+    tex_files = source_archive.get_tex_files()
+    images = source_archive.get_images(tex_files)
+
+    assert tex_files == [os.path.join(source_archive.directory, 'main.tex')]
+    assert images == [os.path.join(source_archive.directory, 'figures/used.png')]
+    assert not os.path.exists(os.path.join(source_archive.directory, 'figures/unused.png'))
+    assert not os.path.exists(os.path.join(source_archive.directory, 'data/events.csv'))
+    assert not os.path.exists(os.path.join(source_archive.directory, 'authors.xml'))
+
+    assert source_archive.get_xml_files() == [os.path.join(source_archive.directory, 'authors.xml')]
+
+    source_archive.close()
+
+    assert not os.path.exists(source_archive.directory)
+
+
+def test_source_archive_sniffs_all_members_without_tex_extension(tmpdir):
+    tarball = _make_tarball(tmpdir, {
+        'main.txt': TEX,
+        'figures/used.png': 'used',
+    })
+    source_archive = SourceArchive(tarball)
+
+    tex_files = source_archive.get_tex_files()
+
+    assert tex_files == [os.path.join(source_archive.directory, 'main.txt')]
+
+    source_archive.close()
+
+
+def test_get_source_archive_is_shared_until_closed(tmpdir):
+    tarball = _make_tarball(tmpdir, {'main.tex': TEX})
+
+    source_archive = get_source_archive(tarball)
+
+    assert get_source_archive(tarball) is source_archive
+
+    close_source_archives()
+
+    assert get_source_archive(tarball) is not source_archive
+    close_source_archives()
+
+
+def test_source_archive_raises_on_invalid_tarball(tmpdir):
+    not_a_tarball = tmpdir.join('not_a_tarball')
+    not_a_tarball.write('foo')
+
+    with pytest.raises(InvalidTarball):
+        SourceArchive(str(not_a_tarball))
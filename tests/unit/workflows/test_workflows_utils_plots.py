@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2017 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+from __future__ import absolute_import, division, print_function
+
+import tarfile
+import time
+
+import pytest
+from mock import patch
+from plotextractor.errors import NoTexFilesFound
+
+from inspirehep.modules.workflows.utils.archives import SourceArchive
+from inspirehep.modules.workflows.utils.plots import extract_plots
+
+
+TEX = r'''\documentclass{article}
+\begin{document}
+\begin{figure}
+\includegraphics{fast.png}
+\caption{A fast figure.}
+\end{figure}
+\begin{figure}
+\includegraphics{slow.png}
+\caption{A slow figure.}
+\end{figure}
+\end{document}
+'''
+
+
+def _make_tarball(tmpdir, files):
+    sources = tmpdir.mkdir('sources')
+    tarball = str(tmpdir.join('sources.tar.gz'))
+    with tarfile.open(tarball, 'w:gz') as tar:
+        for name, content in files.items():
+            sources.join(name).write(content)
+            tar.add(str(sources.join(name)), arcname=name)
+
+    return tarball
+
+
+def _convert_images(image_list):
+    if image_list[0].endswith('slow.png'):
+        time.sleep(10)
+    return {image_list[0]: image_list[0]}
+
+
+@patch('inspirehep.modules.workflows.utils.plots.convert_images', _convert_images)
+def test_extract_plots_keeps_the_figures_converted_before_the_timeout(tmpdir):
+    tarball = _make_tarball(tmpdir, {
+        'main.tex': TEX,
+        'fast.png': 'fast',
+        'slow.png': 'slow',
+    })
+
+    source_archive = SourceArchive(tarball)
+
+    start = time.time()
+    plots = extract_plots(source_archive, timeout=1, processes=2)
+    source_archive.close()
+
+    assert time.time() - start < 5
+    assert [plot['captions'] for plot in plots] == [['A fast figure.']]
+
+
+def test_extract_plots_raises_when_there_are_no_tex_files(tmpdir):
+    tarball = _make_tarball(tmpdir, {'fast.png': 'fast'})
+
+    source_archive = SourceArchive(tarball)
+
+    with pytest.raises(NoTexFilesFound):
+        extract_plots(source_archive, timeout=1)
+    source_archive.close()